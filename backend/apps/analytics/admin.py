@@ -1,3 +1,33 @@
 from django.contrib import admin
+from config.admin_performance import LargeTableAdminMixin
+from .models import CustomerStats, CustomerLaundromatStats
 
-# Analytics app doesn't have models, so no admin registration needed
+
+class ReadOnlyStatsAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """Stats rows are derived from receipts; rebuild_customer_stats fixes them"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CustomerStats)
+class CustomerStatsAdmin(ReadOnlyStatsAdmin):
+    list_display = ('customer', 'order_count', 'total_spent', 'first_order_at', 'last_order_at')
+    list_select_related = ('customer',)
+    search_fields = ('customer__username', 'customer__phone', 'customer__email')
+    ordering = ('-total_spent',)
+
+
+@admin.register(CustomerLaundromatStats)
+class CustomerLaundromatStatsAdmin(ReadOnlyStatsAdmin):
+    list_display = ('customer', 'laundromat', 'order_count', 'total_spent', 'last_order_at')
+    list_select_related = ('customer', 'laundromat')
+    list_filter = ('laundromat',)
+    search_fields = ('customer__username', 'customer__phone', 'customer__email')
+    ordering = ('-total_spent',)
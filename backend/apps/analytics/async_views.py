@@ -0,0 +1,44 @@
+"""
+Async version of the analytics overview, served under ASGI.
+See config/async_api.py and config/urls_asgi.py.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework import status
+
+from config.async_api import async_api_view, get_viewset, json_response
+from config.db_router import read_from_replica
+from .serializers import OverviewSerializer
+from . import sketches
+from .views import EXACT_CUSTOMER_AGGREGATE, OVERVIEW_AGGREGATES, AnalyticsViewSet
+
+
+@async_api_view
+async def overview(request):
+    """GET /api/analytics/overview/"""
+    view = get_viewset(AnalyticsViewSet, request, 'overview')
+    if not view.check_analytics_permission(request):
+        return json_response(
+            {'error': 'You do not have permission to view analytics'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    time_range = request.query_params.get('time_range', 'month')
+    start_date, end_date = view.get_time_range_filter(time_range)
+
+    queryset = view.get_base_queryset(request, start_date).filter(
+        created_at__gte=start_date,
+        created_at__lte=end_date
+    )
+    exact = view.use_exact_counts(request)
+    with read_from_replica():
+        totals = await queryset.aaggregate(
+            **OVERVIEW_AGGREGATES, **(EXACT_CUSTOMER_AGGREGATE if exact else {})
+        )
+        if not exact:
+            customer_sketches = await sync_to_async(view.estimate_customers)(
+                request, start_date, end_date
+            )
+            totals['total_customers'] = sketches.merged_count(customer_sketches)
+
+    serializer = OverviewSerializer(view.build_overview(totals, time_range))
+    return json_response(serializer.data)
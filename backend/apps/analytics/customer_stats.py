@@ -0,0 +1,205 @@
+"""
+Incremental upkeep of CustomerStats, CustomerLaundromatStats and
+CustomerDailyStats.
+
+Receipt writes describe each receipt before and after the change as a
+snapshot of TRACKED_FIELDS (None when it did not exist, or no longer
+does). apply_receipt_changes() turns those pairs into +/- deltas and adds
+them with one UPDATE per affected row, inserting the row on first use.
+Deleting a laundromat subtracts its customers' totals first (see
+forget_laundromats()). `manage.py rebuild_customer_stats` recomputes
+everything from receipts if the tables ever drift.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateTimeField, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate
+from django.utils import timezone
+
+from .models import CustomerDailyStats, CustomerLaundromatStats, CustomerStats
+
+# Receipt attributes that decide what a receipt adds to the stats
+TRACKED_FIELDS = ('customer_id', 'laundromat_id', 'status', 'price', 'created_at')
+TRACKED_FIELD_NAMES = ('customer', 'laundromat', 'status', 'price', 'created_at')
+
+
+def snapshot(receipt, update_fields=None, previous=None):
+    """
+    The tracked values of a receipt. With `update_fields`, fields that were
+    not saved keep their `previous` values.
+    """
+    values = tuple(getattr(receipt, field) for field in TRACKED_FIELDS)
+    if update_fields is None or previous is None:
+        return values
+    update_fields = set(update_fields)
+    return tuple(
+        value if name in update_fields or attname in update_fields else old
+        for name, attname, value, old in zip(TRACKED_FIELD_NAMES, TRACKED_FIELDS, values, previous)
+    )
+
+
+class Delta:
+    __slots__ = ('order_count', 'total_spent', 'first_order_at', 'last_order_at')
+
+    def __init__(self):
+        self.order_count = 0
+        self.total_spent = Decimal('0')
+        self.first_order_at = None
+        self.last_order_at = None
+
+    def add(self, count, spent, first_at=None, last_at=None):
+        self.order_count += count
+        self.total_spent += spent
+        if first_at is not None:
+            last_at = last_at or first_at
+            if self.first_order_at is None or first_at < self.first_order_at:
+                self.first_order_at = first_at
+            if self.last_order_at is None or last_at > self.last_order_at:
+                self.last_order_at = last_at
+
+    def is_empty(self):
+        return not self.order_count and not self.total_spent and self.first_order_at is None
+
+
+def apply_receipt_changes(changes):
+    """Add the effect of (before, after) receipt snapshots to the stats"""
+    lifetime = defaultdict(Delta)
+    per_laundromat = defaultdict(Delta)
+    daily = defaultdict(Delta)
+
+    for before, after in changes:
+        if before == after:
+            continue
+        for values, sign in ((before, -1), (after, 1)):
+            if values is None:
+                continue
+            customer_id, laundromat_id, status, price, created_at = values
+            counted = status != 'cancelled'
+            count = sign if counted else 0
+            spent = sign * Decimal(str(price)) if counted else Decimal('0')
+            # Order dates only ever widen, so only a new placement moves them
+            is_new = sign > 0 and (
+                before is None or before[:2] != after[:2] or before[4] != after[4]
+            )
+            placed_at = created_at if is_new else None
+
+            lifetime[customer_id].add(count, spent, placed_at)
+            per_laundromat[(customer_id, laundromat_id)].add(count, spent, placed_at)
+            daily[(customer_id, laundromat_id, timezone.localdate(created_at))].add(count, spent)
+
+    for customer_id, delta in lifetime.items():
+        upsert(CustomerStats, {'customer_id': customer_id}, delta, track_dates=True)
+    for (customer_id, laundromat_id), delta in per_laundromat.items():
+        upsert(
+            CustomerLaundromatStats,
+            {'customer_id': customer_id, 'laundromat_id': laundromat_id},
+            delta, track_dates=True
+        )
+    for (customer_id, laundromat_id, date), delta in daily.items():
+        upsert(
+            CustomerDailyStats,
+            {'customer_id': customer_id, 'laundromat_id': laundromat_id, 'date': date},
+            delta, track_dates=False
+        )
+
+
+def forget_laundromats(laundromat_ids):
+    """
+    Take laundromats about to be deleted out of the lifetime stats. Their
+    receipts and per-laundromat rows go by ON DELETE CASCADE, which never
+    calls Receipt.delete(), so subtract what the per-laundromat rows add up
+    to. First and last order dates are left as they are.
+    """
+    lifetime = defaultdict(Delta)
+    rows = CustomerLaundromatStats.objects.filter(laundromat_id__in=laundromat_ids).values_list(
+        'customer_id', 'order_count', 'total_spent'
+    )
+    for customer_id, order_count, total_spent in rows.iterator(chunk_size=2000):
+        lifetime[customer_id].add(-order_count, -total_spent)
+    for customer_id, delta in lifetime.items():
+        upsert(CustomerStats, {'customer_id': customer_id}, delta, track_dates=False)
+
+
+def upsert(model, lookup, delta, track_dates):
+    """Add `delta` to the row matching `lookup`, creating it if needed"""
+    if delta.is_empty():
+        return
+
+    changes = {
+        'order_count': F('order_count') + delta.order_count,
+        'total_spent': F('total_spent') + delta.total_spent,
+    }
+    initial = {'order_count': delta.order_count, 'total_spent': delta.total_spent}
+    if track_dates and delta.first_order_at is not None:
+        first = Value(delta.first_order_at, output_field=DateTimeField())
+        last = Value(delta.last_order_at, output_field=DateTimeField())
+        # SQLite's MIN()/MAX() return NULL if either side is NULL
+        changes['first_order_at'] = Coalesce(Least(F('first_order_at'), first), first)
+        changes['last_order_at'] = Coalesce(Greatest(F('last_order_at'), last), last)
+        initial['first_order_at'] = delta.first_order_at
+        initial['last_order_at'] = delta.last_order_at
+
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **initial)
+    except IntegrityError:
+        # Another worker created the row first
+        model.objects.filter(**lookup).update(**changes)
+
+
+def rebuild(sources, stats_models=(CustomerStats, CustomerLaundromatStats, CustomerDailyStats)):
+    """
+    Recompute all stats from the receipt querysets in `sources` (live and
+    archived receipts). `stats_models` lets migrations pass historical models.
+    """
+    lifetime_model, laundromat_model, daily_model = stats_models
+    lifetime = defaultdict(Delta)
+    per_laundromat = defaultdict(Delta)
+    daily = defaultdict(Delta)
+
+    counted = ~Q(status='cancelled')
+    for queryset in sources:
+        rows = queryset.values(
+            'customer_id', 'laundromat_id', day=TruncDate('created_at')
+        ).annotate(
+            order_count=Count('id', filter=counted),
+            total_spent=Sum('price', filter=counted),
+            first_at=Min('created_at'),
+            last_at=Max('created_at'),
+        ).order_by()
+        for row in rows.iterator(chunk_size=2000):
+            count, spent = row['order_count'], row['total_spent'] or Decimal('0')
+            lifetime[row['customer_id']].add(count, spent, row['first_at'], row['last_at'])
+            per_laundromat[(row['customer_id'], row['laundromat_id'])].add(
+                count, spent, row['first_at'], row['last_at']
+            )
+            if count:
+                daily[(row['customer_id'], row['laundromat_id'], row['day'])].add(count, spent)
+
+    with transaction.atomic():
+        for model in stats_models:
+            model.objects.all().delete()
+        lifetime_model.objects.bulk_create([
+            lifetime_model(customer_id=customer_id, **vars_of(delta))
+            for customer_id, delta in lifetime.items()
+        ], batch_size=1000)
+        laundromat_model.objects.bulk_create([
+            laundromat_model(customer_id=customer_id, laundromat_id=laundromat_id, **vars_of(delta))
+            for (customer_id, laundromat_id), delta in per_laundromat.items()
+        ], batch_size=1000)
+        daily_model.objects.bulk_create([
+            daily_model(
+                customer_id=customer_id, laundromat_id=laundromat_id, date=date,
+                order_count=delta.order_count, total_spent=delta.total_spent,
+            )
+            for (customer_id, laundromat_id, date), delta in daily.items()
+        ], batch_size=1000)
+    return len(lifetime)
+
+
+def vars_of(delta):
+    return {field: getattr(delta, field) for field in Delta.__slots__}
@@ -0,0 +1,125 @@
+"""
+Hourly per-laundromat rollups of orders, revenue and completions.
+
+Receipt writes add their change to the UTC hour the receipt was placed in
+(orders and revenue, with revenue leaving out cancelled receipts), and
+every `completed` status event adds a completion to the hour it happened
+in. The peak-hours heatmap reads these rows instead of the receipts table:
+at most 24 per laundromat and day. `manage.py rebuild_customer_stats`
+recomputes them along with the customer stats.
+"""
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncHour
+
+from .models import HourlyReceiptStats
+
+
+def hour_bucket(moment):
+    """The UTC hour `moment` falls in"""
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+class Bucket:
+    __slots__ = ('order_count', 'revenue', 'completed_count')
+
+    def __init__(self):
+        self.order_count = 0
+        self.revenue = Decimal('0')
+        self.completed_count = 0
+
+    def is_empty(self):
+        return not self.order_count and not self.revenue and not self.completed_count
+
+
+def apply_receipt_changes(changes):
+    """Add the effect of (before, after) receipt snapshots (see customer_stats)"""
+    buckets = defaultdict(Bucket)
+    for before, after in changes:
+        if before == after:
+            continue
+        for values, sign in ((before, -1), (after, 1)):
+            if values is None:
+                continue
+            _, laundromat_id, status, price, created_at = values
+            bucket = buckets[(laundromat_id, hour_bucket(created_at))]
+            bucket.order_count += sign
+            if status != 'cancelled':
+                bucket.revenue += sign * Decimal(str(price))
+    add(buckets)
+
+
+def record_status_events(events):
+    """Count the completions among newly written ReceiptStatusEvents"""
+    buckets = defaultdict(Bucket)
+    for event in events:
+        if event.status == 'completed':
+            buckets[(event.laundromat_id, hour_bucket(event.created_at))].completed_count += 1
+    add(buckets)
+
+
+def add(buckets):
+    """Add {(laundromat_id, hour): Bucket} to the stored rows"""
+    for (laundromat_id, hour), bucket in buckets.items():
+        if bucket.is_empty():
+            continue
+        lookup = {'laundromat_id': laundromat_id, 'hour': hour}
+        changes = {
+            'order_count': F('order_count') + bucket.order_count,
+            'revenue': F('revenue') + bucket.revenue,
+            'completed_count': F('completed_count') + bucket.completed_count,
+        }
+        if HourlyReceiptStats.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                HourlyReceiptStats.objects.create(
+                    **lookup,
+                    order_count=bucket.order_count,
+                    revenue=bucket.revenue,
+                    completed_count=bucket.completed_count,
+                )
+        except IntegrityError:
+            # Another worker created the row first
+            HourlyReceiptStats.objects.filter(**lookup).update(**changes)
+
+
+def rebuild(sources, events, model=HourlyReceiptStats):
+    """
+    Recompute every hourly row from the receipt querysets in `sources` and
+    the status events in `events`. `model` lets migrations pass the
+    historical model.
+    """
+    buckets = defaultdict(Bucket)
+    hour = TruncHour('created_at', tzinfo=dt_timezone.utc)
+    for queryset in sources:
+        rows = queryset.values('laundromat_id', bucket_hour=hour).annotate(
+            order_count=Count('id'),
+            revenue=Sum('price', filter=~Q(status='cancelled')),
+        ).order_by()
+        for row in rows.iterator(chunk_size=2000):
+            bucket = buckets[(row['laundromat_id'], row['bucket_hour'])]
+            bucket.order_count += row['order_count']
+            bucket.revenue += row['revenue'] or Decimal('0')
+
+    completions = events.filter(status='completed').values(
+        'laundromat_id', bucket_hour=hour
+    ).annotate(completed_count=Count('id')).order_by()
+    for row in completions.iterator(chunk_size=2000):
+        buckets[(row['laundromat_id'], row['bucket_hour'])].completed_count += row['completed_count']
+
+    with transaction.atomic():
+        model.objects.all().delete()
+        model.objects.bulk_create([
+            model(
+                laundromat_id=laundromat_id, hour=hour,
+                order_count=bucket.order_count, revenue=bucket.revenue,
+                completed_count=bucket.completed_count,
+            )
+            for (laundromat_id, hour), bucket in buckets.items()
+        ], batch_size=1000)
+    return len(buckets)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics import customer_stats, hourly_stats, sketches
+from apps.receipts.models import ArchivedReceipt, Receipt, ReceiptStatusEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the per-customer stats, distinct-customer sketches and '
+        'hourly rollups from live and archived receipts'
+    )
+
+    def handle(self, *args, **options):
+        sources = [Receipt.objects.all(), ArchivedReceipt.objects.all()]
+        customers = customer_stats.rebuild(sources)
+        days = sketches.rebuild(sources)
+        hours = hourly_stats.rebuild(sources, ReceiptStatusEvent.objects.all())
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats for {customers} customers, {days} daily customer sketches '
+            f'and {hours} hourly rollups'
+        ))
@@ -0,0 +1,52 @@
+from statistics import median
+
+from django.core.management.base import BaseCommand
+
+from config import startup
+
+
+class Command(BaseCommand):
+    help = (
+        'Starts the app in fresh processes and reports time to first request, '
+        'peak RSS and where import time goes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/receipts/', help='Path of the first request')
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts to take the median of')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list in the import breakdown')
+
+    def handle(self, *args, **options):
+        runs = [startup.measure(options['path']) for _ in range(options['runs'])]
+        profiled = startup.measure(options['path'], importtime=True)
+
+        self.stdout.write(
+            f"Cold start serving {options['path']} (HTTP {runs[0]['status']}), "
+            f"median of {len(runs)} runs:"
+        )
+        for label, key in (
+            ('Django setup and imports', 'setup_ms'),
+            ('First request', 'first_request_ms'),
+            ('Second request', 'second_request_ms'),
+            ('Process start to first response', 'time_to_first_response_ms'),
+        ):
+            self.stdout.write(f'  {label:<34}{median(run[key] for run in runs):8.1f} ms')
+        if runs[0]['peak_rss_mb'] is not None:
+            self.stdout.write(f"  {'Peak RSS':<34}{median(run['peak_rss_mb'] for run in runs):8.1f} MB")
+        self.stdout.write(f"  {'Modules loaded':<34}{runs[0]['modules']:8d}")
+
+        loaded = profiled['deferred_loaded']
+        if loaded:
+            self.stdout.write(self.style.WARNING(
+                f"Imported at startup although only needed on first use: {', '.join(loaded)}"
+            ))
+
+        imports = profiled['imports']
+        self.stdout.write(
+            f"\nImport time by package (self time, one -X importtime run, "
+            f"{sum(package['ms'] for package in imports):.1f} ms total):"
+        )
+        for package in imports[:options['top']]:
+            self.stdout.write(
+                f"  {package['package']:<24}{package['ms']:8.1f} ms  {package['modules']:4d} modules"
+            )
@@ -0,0 +1,92 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):
+    from apps.analytics.customer_stats import rebuild
+
+    rebuild(
+        [apps.get_model('receipts', 'Receipt').objects.all(),
+         apps.get_model('receipts', 'ArchivedReceipt').objects.all()],
+        [apps.get_model('analytics', name)
+         for name in ('CustomerStats', 'CustomerLaundromatStats', 'CustomerDailyStats')],
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('laundromats', '0002_laundromat_laundromats_name_b17e6e_idx_and_more'),
+        ('users', '0003_user_profile_picture_passwordresettoken'),
+        ('receipts', '0006_receipt_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerStats',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='lifetime_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('order_count', models.IntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('first_order_at', models.DateTimeField(null=True)),
+                ('last_order_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'db_table': 'customer_stats',
+                'indexes': [models.Index(fields=['-total_spent'], name='customer_stats_spent_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('laundromat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='laundromats.laundromat')),
+            ],
+            options={
+                'db_table': 'customer_daily_stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomerLaundromatStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_count', models.IntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('first_order_at', models.DateTimeField(null=True)),
+                ('last_order_at', models.DateTimeField(null=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='laundromat_stats', to=settings.AUTH_USER_MODEL)),
+                ('laundromat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='laundromats.laundromat')),
+            ],
+            options={
+                'db_table': 'customer_laundromat_stats',
+                'indexes': [models.Index(fields=['laundromat', '-total_spent'], name='customer_lm_stats_spent_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='customerlaundromatstats',
+            constraint=models.UniqueConstraint(fields=('customer', 'laundromat'), name='unique_customer_laundromat_stats'),
+        ),
+        migrations.AddIndex(
+            model_name='customerdailystats',
+            index=models.Index(fields=['date'], name='customer_daily_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerdailystats',
+            index=models.Index(fields=['laundromat', 'date'], name='customer_daily_laundromat_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customerdailystats',
+            constraint=models.UniqueConstraint(fields=('customer', 'laundromat', 'date'), name='unique_customer_daily_stats'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):
+    from apps.analytics.sketches import rebuild
+
+    rebuild(
+        [apps.get_model('receipts', 'Receipt').objects.all(),
+         apps.get_model('receipts', 'ArchivedReceipt').objects.all()],
+        apps.get_model('analytics', 'DailyCustomerSketch'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundromats', '0002_laundromat_laundromats_name_b17e6e_idx_and_more'),
+        ('analytics', '0001_customer_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCustomerSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('laundromat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='laundromats.laundromat')),
+            ],
+            options={
+                'db_table': 'daily_customer_sketches',
+                'indexes': [models.Index(fields=['date'], name='customer_sketch_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailycustomersketch',
+            constraint=models.UniqueConstraint(fields=('laundromat', 'date'), name='unique_daily_customer_sketch'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
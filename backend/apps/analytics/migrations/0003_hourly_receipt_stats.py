@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):
+    from apps.analytics.hourly_stats import rebuild
+
+    rebuild(
+        [apps.get_model('receipts', 'Receipt').objects.all(),
+         apps.get_model('receipts', 'ArchivedReceipt').objects.all()],
+        apps.get_model('receipts', 'ReceiptStatusEvent').objects.all(),
+        apps.get_model('analytics', 'HourlyReceiptStats'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundromats', '0003_laundromat_timezone'),
+        ('analytics', '0002_daily_customer_sketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyReceiptStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('laundromat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='laundromats.laundromat')),
+            ],
+            options={
+                'db_table': 'hourly_receipt_stats',
+                'indexes': [models.Index(fields=['hour'], name='hourly_stats_hour_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hourlyreceiptstats',
+            constraint=models.UniqueConstraint(fields=('laundromat', 'hour'), name='unique_hourly_receipt_stats'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,2 +1,139 @@
-# Analytics app uses aggregations from Receipt model
-# No dedicated models needed
+from django.db import models
+
+
+class CustomerStats(models.Model):
+    """
+    Lifetime totals per customer, kept up to date by every receipt write
+    (see customer_stats.py). Orders and spend leave out cancelled receipts;
+    first and last order cover every receipt placed.
+    """
+    customer = models.OneToOneField(
+        'users.User',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='lifetime_stats'
+    )
+    order_count = models.IntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    first_order_at = models.DateTimeField(null=True)
+    last_order_at = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = 'customer_stats'
+        indexes = [
+            # top-k by spend is a scan of this index
+            models.Index(fields=['-total_spent'], name='customer_stats_spent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id}: {self.order_count} orders, {self.total_spent}"
+
+
+class CustomerLaundromatStats(models.Model):
+    """Lifetime totals per customer at one laundromat"""
+    customer = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='laundromat_stats'
+    )
+    laundromat = models.ForeignKey(
+        'laundromats.Laundromat',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    order_count = models.IntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    first_order_at = models.DateTimeField(null=True)
+    last_order_at = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = 'customer_laundromat_stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['customer', 'laundromat'], name='unique_customer_laundromat_stats'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['laundromat', '-total_spent'], name='customer_lm_stats_spent_idx'),
+        ]
+
+
+class CustomerDailyStats(models.Model):
+    """
+    One customer's orders and spend at one laundromat on one day. Rankings
+    over a time range sum these instead of scanning receipts.
+    """
+    customer = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    laundromat = models.ForeignKey(
+        'laundromats.Laundromat',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    date = models.DateField()
+    order_count = models.IntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'customer_daily_stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['customer', 'laundromat', 'date'], name='unique_customer_daily_stats'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='customer_daily_date_idx'),
+            models.Index(fields=['laundromat', 'date'], name='customer_daily_laundromat_idx'),
+        ]
+
+
+class DailyCustomerSketch(models.Model):
+    """
+    HyperLogLog sketch of the customers who placed a receipt at one
+    laundromat on one day. Distinct-customer counts merge these (see
+    sketches.py).
+    """
+    laundromat = models.ForeignKey(
+        'laundromats.Laundromat',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    date = models.DateField()
+    registers = models.BinaryField()
+
+    class Meta:
+        db_table = 'daily_customer_sketches'
+        constraints = [
+            models.UniqueConstraint(fields=['laundromat', 'date'], name='unique_daily_customer_sketch'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='customer_sketch_date_idx'),
+        ]
+
+
+class HourlyReceiptStats(models.Model):
+    """
+    Orders, revenue and completions at one laundromat in one UTC hour,
+    kept up to date by receipt writes (see hourly_stats.py).
+    """
+    laundromat = models.ForeignKey(
+        'laundromats.Laundromat',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    hour = models.DateTimeField()
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    completed_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'hourly_receipt_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['laundromat', 'hour'], name='unique_hourly_receipt_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='hourly_stats_hour_idx'),
+        ]
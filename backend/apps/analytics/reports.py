@@ -0,0 +1,263 @@
+"""
+The analytics PDF report (GET /api/analytics/export/pdf/).
+
+Rendered reports are cached by content. The key covers the scope (all
+laundromats or one), the time range and its dates, whether customers are
+counted exactly, and a fingerprint of the receipts in range: their count
+and latest updated_at, which every save and bulk status change moves. A
+repeated export of unchanged data therefore costs one aggregate query and
+is served from the Django cache; the key doubles as the response's ETag.
+
+On a miss every figure and chart comes from one grouped pass over the
+range, by day, hour and status (summarize()), and the rendered PDF is
+cached for ANALYTICS_REPORT_CACHE_SECONDS.
+
+ReportLab is imported on first use (it is the slowest import in the
+project), and the paragraph and table styles built from it are kept for
+the life of the process (get_styles()).
+"""
+import hashlib
+import io
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+# Part of every cache key: bump it when the report's layout changes so
+# PDFs rendered by the old code are not served
+LAYOUT_VERSION = 2
+
+CACHE_PREFIX = 'analytics:report:'
+
+_styles = None
+
+
+def reportlab_available():
+    return find_spec('reportlab') is not None
+
+
+class ReportStyles:
+    """Paragraph and table styles, built once per process"""
+
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+        sheet = getSampleStyleSheet()
+        self.normal = sheet['Normal']
+        self.heading = sheet['Heading2']
+        self.title = ParagraphStyle(
+            'CustomTitle',
+            parent=sheet['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+        )
+        self.overview_table = self.table_style(colors, '#6366F1')
+        self.status_table = self.table_style(colors, '#10B981')
+        self.revenue_color = colors.HexColor('#6366F1')
+        self.orders_color = colors.HexColor('#F59E0B')
+        self.grid_color = colors.HexColor('#E5E7EB')
+
+    @staticmethod
+    def table_style(colors, header_color):
+        from reportlab.platypus import TableStyle
+
+        return TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F3F4F6')),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('TOPPADDING', (0, 1), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+        ])
+
+
+def get_styles():
+    global _styles
+    if _styles is None:
+        _styles = ReportStyles()
+    return _styles
+
+
+def data_version(queryset):
+    """Fingerprint of the receipts in `queryset`; changes with any write"""
+    fingerprint = queryset.aggregate(count=Count('id'), updated=Max('updated_at'))
+    updated = fingerprint['updated'].isoformat() if fingerprint['updated'] else ''
+    return f"{fingerprint['count']}:{updated}"
+
+
+def report_key(scope, time_range, start, end, exact, version):
+    """Content key of a report, used for the cache entry and the ETag"""
+    parts = (
+        LAYOUT_VERSION, scope, time_range,
+        timezone.localdate(start).isoformat(), timezone.localdate(end).isoformat(),
+        exact, version,
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def summarize(queryset, start, end):
+    """
+    Everything the report shows except the customer count, from one
+    query grouped by day, hour and status. Cancelled orders count as
+    orders but not as revenue, as in the overview endpoint.
+    """
+    groups = queryset.annotate(
+        day=TruncDate('created_at'), hour=ExtractHour('created_at')
+    ).values('day', 'hour', 'status').annotate(
+        orders=Count('id'), revenue=Sum('price')
+    ).order_by()
+
+    statuses = Counter()
+    hours = [0] * 24
+    daily_revenue = defaultdict(Decimal)
+    for group in groups:
+        statuses[group['status']] += group['orders']
+        hours[group['hour']] += group['orders']
+        if group['status'] != 'cancelled':
+            daily_revenue[group['day']] += group['revenue'] or Decimal('0.00')
+
+    first_day, last_day = timezone.localdate(start), timezone.localdate(end)
+    days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+    return {
+        'total_orders': sum(statuses.values()),
+        'completed_orders': statuses['completed'],
+        'total_revenue': sum(daily_revenue.values(), Decimal('0.00')),
+        'statuses': statuses.most_common(),
+        'revenue_trend': [(day, daily_revenue.get(day, Decimal('0.00'))) for day in days],
+        'orders_by_hour': hours,
+    }
+
+
+def value_axis_max(values):
+    # ReportLab cannot scale an axis whose values are all zero
+    return max(max(values, default=0) * 1.1, 1)
+
+
+def revenue_chart(trend, styles):
+    from reportlab.graphics.charts.linecharts import HorizontalLineChart
+    from reportlab.graphics.shapes import Drawing
+
+    drawing = Drawing(460, 180)
+    chart = HorizontalLineChart()
+    chart.x, chart.y, chart.width, chart.height = 45, 30, 400, 130
+    values = [float(revenue) for _, revenue in trend]
+    chart.data = [values]
+    chart.lines[0].strokeColor = styles.revenue_color
+    chart.lines[0].strokeWidth = 1.5
+    # At most about a dozen date labels, whatever the range
+    step = max(1, len(trend) // 12)
+    chart.categoryAxis.categoryNames = [
+        day.strftime('%m-%d') if index % step == 0 else '' for index, (day, _) in enumerate(trend)
+    ]
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = value_axis_max(values)
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.labelTextFormat = '$%0.0f'
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = styles.grid_color
+    drawing.add(chart)
+    return drawing
+
+
+def peak_hours_chart(hours, styles):
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    from reportlab.graphics.shapes import Drawing
+
+    drawing = Drawing(460, 170)
+    chart = VerticalBarChart()
+    chart.x, chart.y, chart.width, chart.height = 45, 25, 400, 130
+    chart.data = [hours]
+    chart.bars[0].fillColor = styles.orders_color
+    chart.bars[0].strokeColor = None
+    chart.categoryAxis.categoryNames = [f'{hour:02d}' for hour in range(24)]
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = value_axis_max(hours)
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = styles.grid_color
+    drawing.add(chart)
+    return drawing
+
+
+def build_pdf(summary, total_customers, time_range, start, end):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+
+    styles = get_styles()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = [
+        Paragraph('Lavendia Analytics Report', styles.title),
+        Paragraph(f'Time Range: {time_range.capitalize()}', styles.normal),
+        Paragraph(f'From: {start.strftime("%Y-%m-%d")} To: {end.strftime("%Y-%m-%d")}', styles.normal),
+        Spacer(1, 20),
+    ]
+
+    elements.append(Paragraph('Overview', styles.heading))
+    overview_table = Table([
+        ['Metric', 'Value'],
+        ['Total Revenue', f"${summary['total_revenue']:.2f}"],
+        ['Total Orders', str(summary['total_orders'])],
+        ['Completed Orders', str(summary['completed_orders'])],
+        ['Unique Customers', str(total_customers)],
+    ], colWidths=[3*inch, 2*inch])
+    overview_table.setStyle(styles.overview_table)
+    elements += [overview_table, Spacer(1, 20)]
+
+    elements.append(Paragraph('Order Status Distribution', styles.heading))
+    status_data = [['Status', 'Count', 'Percentage']]
+    total_orders = summary['total_orders']
+    for status, count in summary['statuses']:
+        percentage = (count / total_orders * 100) if total_orders > 0 else 0
+        status_data.append([status.capitalize(), str(count), f'{percentage:.1f}%'])
+    status_table = Table(status_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
+    status_table.setStyle(styles.status_table)
+    elements += [status_table, Spacer(1, 20)]
+
+    elements += [
+        Paragraph('Revenue Trend', styles.heading),
+        revenue_chart(summary['revenue_trend'], styles),
+        Spacer(1, 10),
+        Paragraph('Orders by Hour', styles.heading),
+        peak_hours_chart(summary['orders_by_hour'], styles),
+    ]
+
+    elements.append(Spacer(1, 30))
+    elements.append(Paragraph(
+        f'Generated on {timezone.now().strftime("%Y-%m-%d %H:%M")} by Lavendia',
+        styles.normal
+    ))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def render_report(queryset, scope, time_range, start, end, exact, count_customers):
+    """
+    (key, PDF bytes) for the receipts in `queryset`, from the cache when
+    this content was rendered before. `count_customers()` is only called
+    on a miss.
+    """
+    key = report_key(scope, time_range, start, end, exact, data_version(queryset))
+    pdf = cache.get(CACHE_PREFIX + key)
+    if pdf is None:
+        pdf = build_pdf(summarize(queryset, start, end), count_customers(), time_range, start, end)
+        cache.set(CACHE_PREFIX + key, pdf, settings.ANALYTICS_REPORT_CACHE_SECONDS)
+    return key, pdf
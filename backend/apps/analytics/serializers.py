@@ -37,6 +37,27 @@ class TopCustomerSerializer(serializers.Serializer):
     total_spent = serializers.DecimalField(max_digits=12, decimal_places=2)
 
 
+class CustomerLaundromatStatsSerializer(serializers.Serializer):
+    """Serializer for a customer's lifetime totals at one laundromat"""
+    laundromat_id = serializers.IntegerField()
+    laundromat_name = serializers.CharField()
+    order_count = serializers.IntegerField()
+    total_spent = serializers.DecimalField(max_digits=12, decimal_places=2)
+    first_order_at = serializers.DateTimeField(allow_null=True)
+    last_order_at = serializers.DateTimeField(allow_null=True)
+
+
+class CustomerStatsSerializer(serializers.Serializer):
+    """Serializer for a customer's lifetime totals"""
+    customer_id = serializers.IntegerField()
+    customer_name = serializers.CharField()
+    order_count = serializers.IntegerField()
+    total_spent = serializers.DecimalField(max_digits=12, decimal_places=2)
+    first_order_at = serializers.DateTimeField(allow_null=True)
+    last_order_at = serializers.DateTimeField(allow_null=True)
+    laundromats = CustomerLaundromatStatsSerializer(many=True)
+
+
 class StaffPerformanceSerializer(serializers.Serializer):
     """Serializer for staff performance metrics"""
     staff_id = serializers.IntegerField()
@@ -63,3 +84,40 @@ class PeakHoursSerializer(serializers.Serializer):
     hour = serializers.IntegerField()
     order_count = serializers.IntegerField()
     revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class HeatmapCellSerializer(serializers.Serializer):
+    """Serializer for one day-of-week and hour cell of the demand heatmap"""
+    day_of_week = serializers.IntegerField()
+    hour = serializers.IntegerField()
+    order_count = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    completed_count = serializers.IntegerField()
+    previous_order_count = serializers.IntegerField(allow_null=True)
+    previous_revenue = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
+    previous_completed_count = serializers.IntegerField(allow_null=True)
+
+
+class PeakHoursHeatmapSerializer(serializers.Serializer):
+    """Serializer for the 7x24 demand heatmap"""
+    timezone = serializers.CharField()
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    previous_start = serializers.DateTimeField(allow_null=True)
+    previous_end = serializers.DateTimeField(allow_null=True)
+    cells = HeatmapCellSerializer(many=True)
+
+
+class StageDurationSerializer(serializers.Serializer):
+    """Serializer for time spent per receipt stage"""
+    laundromat_id = serializers.IntegerField()
+    laundromat_name = serializers.CharField()
+    staff_id = serializers.IntegerField(allow_null=True)
+    staff_name = serializers.CharField(allow_null=True)
+    stage = serializers.CharField()
+    count = serializers.IntegerField()
+    in_progress = serializers.IntegerField()
+    avg_hours = serializers.FloatField(allow_null=True)
+    p50_hours = serializers.FloatField(allow_null=True)
+    p90_hours = serializers.FloatField(allow_null=True)
+    max_hours = serializers.FloatField(allow_null=True)
@@ -0,0 +1,226 @@
+"""
+Distinct-customer counts from HyperLogLog sketches.
+
+Every receipt placement adds its customer to the sketch of its laundromat
+and local day (DailyCustomerSketch). A count over any window or set of
+laundromats merges the matching day sketches instead of running
+COUNT(DISTINCT customer) over receipts, which cannot be pre-summed.
+
+With PRECISION = 12 (4096 registers) the standard error is
+1.04 / sqrt(4096) ~= 1.6%, so about 95% of estimates fall within 3.2% of
+the true count. Below a few hundred customers the small-range correction
+makes estimates practically exact. Sketches only grow: deleting a receipt
+or moving it to another day or laundromat leaves the old customer counted
+until `manage.py rebuild_customer_stats` recomputes them. Pass `exact=true`
+to the analytics endpoints for audited numbers.
+"""
+import hashlib
+import math
+import struct
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyCustomerSketch
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+HASH_BITS = 64
+ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+STANDARD_ERROR = 1.04 / math.sqrt(REGISTERS)
+
+SPARSE, DENSE = b'\x00', b'\x01'
+SPARSE_ENTRY = struct.Struct('>HB')
+
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(HASH_BITS - PRECISION + 2)]
+
+
+class HyperLogLog:
+    """
+    A HyperLogLog sketch with REGISTERS one-byte registers.
+
+    Serialized sparsely (index, rank pairs) while few registers are set, so
+    a quiet day costs a few bytes, and densely once that stops paying off.
+    """
+    __slots__ = ('registers',)
+
+    def __init__(self, registers=None):
+        self.registers = registers if registers is not None else bytearray(REGISTERS)
+
+    @staticmethod
+    def position(value):
+        """The register index and rank `value` hashes to"""
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> (HASH_BITS - PRECISION)
+        rest = hashed & ((1 << (HASH_BITS - PRECISION)) - 1)
+        return index, HASH_BITS - PRECISION - rest.bit_length() + 1
+
+    def add(self, value):
+        """Add `value`; return whether the sketch changed"""
+        index, rank = self.position(value)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def merge_bytes(self, data):
+        """Merge a serialized sketch without building it first"""
+        registers = self.registers
+        if data[:1] == DENSE:
+            self.registers = bytearray(map(max, registers, data[1:]))
+            return
+        for index, rank in SPARSE_ENTRY.iter_unpack(data[1:]):
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def count(self):
+        registers = self.registers
+        estimate = ALPHA * REGISTERS * REGISTERS / sum(_INVERSE_POWERS[rank] for rank in registers)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            # Linear counting is far more accurate for small cardinalities
+            estimate = REGISTERS * math.log(REGISTERS / zeros)
+        return round(estimate)
+
+    def to_bytes(self):
+        entries = [(index, rank) for index, rank in enumerate(self.registers) if rank]
+        if len(entries) * SPARSE_ENTRY.size < REGISTERS:
+            return SPARSE + b''.join(SPARSE_ENTRY.pack(*entry) for entry in entries)
+        return DENSE + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        sketch = cls()
+        if data:
+            sketch.merge_bytes(bytes(data))
+        return sketch
+
+
+def record_receipt_changes(changes):
+    """
+    Add the customers of newly placed receipts to their day sketches.
+    `changes` are (before, after) snapshots as in customer_stats.
+    """
+    entries = set()
+    for before, after in changes:
+        if after is None:
+            continue
+        customer_id, laundromat_id, _, _, created_at = after
+        if before is None or before[:2] != after[:2] or before[4] != created_at:
+            entries.add((laundromat_id, timezone.localdate(created_at), customer_id))
+    if entries:
+        record_customers(entries)
+
+
+def record_customers(entries):
+    """Add (laundromat_id, date, customer_id) entries to the stored sketches"""
+    customers = defaultdict(set)
+    for laundromat_id, date, customer_id in entries:
+        customers[(laundromat_id, date)].add(customer_id)
+
+    with transaction.atomic():
+        existing = {
+            (row.laundromat_id, row.date): row
+            for row in DailyCustomerSketch.objects.select_for_update().filter(
+                laundromat_id__in={key[0] for key in customers},
+                date__in={key[1] for key in customers},
+            )
+        }
+        changed = []
+        for key, customer_ids in customers.items():
+            row = existing.get(key)
+            sketch = HyperLogLog.from_bytes(row.registers if row else b'')
+            if not any([sketch.add(customer_id) for customer_id in customer_ids]):
+                continue
+            if row is not None:
+                row.registers = sketch.to_bytes()
+                changed.append(row)
+                continue
+            try:
+                with transaction.atomic():
+                    DailyCustomerSketch.objects.create(
+                        laundromat_id=key[0], date=key[1], registers=sketch.to_bytes()
+                    )
+            except IntegrityError:
+                # Another worker created the day's sketch first
+                row = DailyCustomerSketch.objects.select_for_update().get(
+                    laundromat_id=key[0], date=key[1]
+                )
+                sketch.merge_bytes(bytes(row.registers))
+                row.registers = sketch.to_bytes()
+                changed.append(row)
+        if changed:
+            DailyCustomerSketch.objects.bulk_update(changed, ['registers'])
+
+
+def distinct_customers(receipts, start, end, laundromat_ids=None):
+    """
+    Estimate distinct customers per laundromat for receipts created between
+    `start` and `end`, as {laundromat_id: HyperLogLog}.
+
+    Whole local days come from the stored sketches. If `start` falls inside
+    a day, that day's customers since `start` are read from `receipts` and
+    added exactly, so the window matches a created_at filter.
+    """
+    first_day = timezone.localdate(start)
+    next_midnight = timezone.make_aware(datetime.combine(first_day + timedelta(days=1), time.min))
+    if timezone.localtime(start).time() != time.min:
+        first_day += timedelta(days=1)
+
+    sketches = defaultdict(HyperLogLog)
+    rows = DailyCustomerSketch.objects.filter(
+        date__gte=first_day, date__lte=timezone.localdate(end)
+    )
+    if laundromat_ids is not None:
+        rows = rows.filter(laundromat_id__in=laundromat_ids)
+    for laundromat_id, registers in rows.values_list('laundromat_id', 'registers').iterator():
+        sketches[laundromat_id].merge_bytes(bytes(registers))
+
+    if first_day > timezone.localdate(start):
+        partial_day = receipts.filter(
+            created_at__gte=start, created_at__lt=min(next_midnight, end)
+        )
+        if laundromat_ids is not None:
+            partial_day = partial_day.filter(laundromat_id__in=laundromat_ids)
+        for laundromat_id, customer_id in partial_day.values_list(
+            'laundromat_id', 'customer_id'
+        ).distinct().order_by():
+            sketches[laundromat_id].add(customer_id)
+    return dict(sketches)
+
+
+def merged_count(sketches):
+    """Distinct customers across all the given per-laundromat sketches"""
+    total = HyperLogLog()
+    for sketch in sketches.values():
+        total.merge(sketch)
+    return total.count()
+
+
+def rebuild(sources, model=DailyCustomerSketch):
+    """
+    Recompute every day sketch from the receipt querysets in `sources`.
+    `model` lets migrations pass the historical model.
+    """
+    sketches = defaultdict(HyperLogLog)
+    for queryset in sources:
+        rows = queryset.values_list(
+            'laundromat_id', TruncDate('created_at'), 'customer_id'
+        ).distinct().order_by()
+        for laundromat_id, date, customer_id in rows.iterator(chunk_size=2000):
+            sketches[(laundromat_id, date)].add(customer_id)
+
+    with transaction.atomic():
+        model.objects.all().delete()
+        model.objects.bulk_create([
+            model(laundromat_id=laundromat_id, date=date, registers=sketch.to_bytes())
+            for (laundromat_id, date), sketch in sketches.items()
+        ], batch_size=500)
+    return len(sketches)
@@ -1,10 +1,12 @@
 import csv
-import io
+import zoneinfo
 from datetime import timedelta
+from collections import defaultdict
 from decimal import Decimal
 
-from django.db.models import Count, Sum, Avg, F, Q
-from django.db.models.functions import TruncDate, TruncHour, ExtractHour
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Sum, Avg, F, Q, DurationField, ExpressionWrapper, Window
+from django.db.models.functions import TruncDate, TruncHour, ExtractHour, ExtractIsoWeekDay, Lead
 from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import viewsets, status
@@ -12,9 +14,21 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.receipts.models import Receipt
+from apps.analytics import reports, sketches, spreadsheets
+from apps.analytics.hourly_stats import Bucket as HourlyBucket, hour_bucket
+from apps.analytics.models import (
+    CustomerDailyStats,
+    CustomerLaundromatStats,
+    CustomerStats,
+    HourlyReceiptStats,
+)
+from apps.receipts.archive import receipts_for_range
+from apps.receipts.models import Receipt, ReceiptStatusEvent
 from apps.users.models import User
-from apps.laundromats.models import Laundromat
+from apps.laundromats.models import Laundromat, validate_timezone
+from config.db_router import ReadReplicaMixin
+from config.downloads import bytes_response
+from config.streaming import streaming_response
 from .serializers import (
     OverviewSerializer,
     RevenueTrendSerializer,
@@ -23,25 +37,46 @@ from .serializers import (
     StaffPerformanceSerializer,
     LaundromatComparisonSerializer,
     PeakHoursSerializer,
+    StageDurationSerializer,
+    PeakHoursHeatmapSerializer,
+    CustomerStatsSerializer,
+)
+
+# Overview metrics, computed in a single aggregate query.
+OVERVIEW_AGGREGATES = {
+    'total_orders': Count('id'),
+    'active_orders': Count('id', filter=Q(status__in=['pending', 'washing', 'drying', 'ready'])),
+    'completed_orders': Count('id', filter=Q(status='completed')),
+    'cancelled_orders': Count('id', filter=Q(status='cancelled')),
+    'total_revenue': Sum('price', filter=~Q(status='cancelled')),
+    'average_order_value': Avg('price', filter=~Q(status='cancelled')),
+}
+
+# Distinct customers are estimated from sketches unless `exact` is requested
+# (see sketches.py); this is the audited, full-scan version.
+EXACT_CUSTOMER_AGGREGATE = {'total_customers': Count('customer', distinct=True)}
+
+
+# Customer columns shown in customer rankings and profiles
+CUSTOMER_COLUMNS = (
+    'customer__id',
+    'customer__username',
+    'customer__email',
+    'customer__phone',
+    'customer__first_name',
+    'customer__last_name',
 )
+LIFETIME_COLUMNS = ('order_count', 'total_spent', 'first_order_at', 'last_order_at')
 
-# PDF generation imports
-try:
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+MAX_TOP_CUSTOMERS = 100
 
 
-class AnalyticsViewSet(viewsets.ViewSet):
+class AnalyticsViewSet(ReadReplicaMixin, viewsets.ViewSet):
     """
     ViewSet for analytics endpoints.
     Staff can see analytics for their laundromat.
     Admin can see analytics for all laundromats.
+    Reads are served from a read replica when one is configured.
     """
     permission_classes = [IsAuthenticated]
 
@@ -65,10 +100,13 @@ class AnalyticsViewSet(viewsets.ViewSet):
 
         return start, now
 
-    def get_base_queryset(self, request):
-        """Apply role-based filtering to receipts queryset"""
+    def get_base_queryset(self, request, start_date=None):
+        """
+        Apply role-based filtering to receipts queryset.
+        Ranges starting before the archive cutoff include archived receipts.
+        """
         user = request.user
-        queryset = Receipt.objects.all()
+        queryset = receipts_for_range(start_date) if start_date else Receipt.objects.all()
 
         if hasattr(user, 'is_customer') and user.is_customer:
             # Customers shouldn't access analytics
@@ -80,6 +118,47 @@ class AnalyticsViewSet(viewsets.ViewSet):
         # Admin sees all
         return queryset
 
+    def get_status_event_queryset(self, request):
+        """Apply the same role-based filtering to receipt status events"""
+        user = request.user
+        queryset = ReceiptStatusEvent.objects.all()
+
+        if hasattr(user, 'is_customer') and user.is_customer:
+            return ReceiptStatusEvent.objects.none()
+        elif hasattr(user, 'is_staff_member') and user.is_staff_member and user.laundromat:
+            return queryset.filter(laundromat=user.laundromat)
+
+        return queryset
+
+    def get_staff_laundromat(self, request):
+        """The laundromat a staff member's analytics are limited to, if any"""
+        user = request.user
+        if hasattr(user, 'is_staff_member') and user.is_staff_member and user.laundromat:
+            return user.laundromat
+        return None
+
+    def get_customer_name(self, item):
+        """Full name from CUSTOMER_COLUMNS values, or the username"""
+        name_parts = [
+            item['customer__first_name'] or '',
+            item['customer__last_name'] or ''
+        ]
+        return ' '.join(filter(None, name_parts)) or item['customer__username']
+
+    def use_exact_counts(self, request):
+        """Whether distinct counts must be exact rather than sketch estimates"""
+        return request.query_params.get('exact', '').lower() in ('1', 'true', 'yes')
+
+    def estimate_customers(self, request, start_date, end_date):
+        """Estimated distinct customers in range, per laundromat in scope"""
+        laundromat = self.get_staff_laundromat(request)
+        return sketches.distinct_customers(
+            self.get_base_queryset(request, start_date),
+            start_date,
+            end_date,
+            laundromat_ids=[laundromat.pk] if laundromat is not None else None,
+        )
+
     def check_analytics_permission(self, request):
         """Check if user has permission to view analytics"""
         user = request.user
@@ -87,11 +166,25 @@ class AnalyticsViewSet(viewsets.ViewSet):
             return False
         return True
 
+    def build_overview(self, totals, time_range):
+        """Shape OVERVIEW_AGGREGATES results into the overview payload"""
+        return {
+            'total_revenue': totals['total_revenue'] or Decimal('0.00'),
+            'total_orders': totals['total_orders'],
+            'active_orders': totals['active_orders'],
+            'completed_orders': totals['completed_orders'],
+            'cancelled_orders': totals['cancelled_orders'],
+            'total_customers': totals['total_customers'],
+            'average_order_value': totals['average_order_value'] or Decimal('0.00'),
+            'time_range': time_range,
+        }
+
     @action(detail=False, methods=['get'])
     def overview(self, request):
         """
         Get analytics overview with key metrics.
-        Query params: time_range (today|week|month|quarter|year)
+        Query params: time_range (today|week|month|quarter|year),
+        exact (count distinct customers exactly instead of estimating)
         """
         if not self.check_analytics_permission(request):
             return Response(
@@ -102,44 +195,18 @@ class AnalyticsViewSet(viewsets.ViewSet):
         time_range = request.query_params.get('time_range', 'month')
         start_date, end_date = self.get_time_range_filter(time_range)
 
-        queryset = self.get_base_queryset(request).filter(
+        queryset = self.get_base_queryset(request, start_date).filter(
             created_at__gte=start_date,
             created_at__lte=end_date
         )
 
-        # Calculate metrics
-        total_orders = queryset.count()
-        active_orders = queryset.filter(
-            status__in=['pending', 'washing', 'drying', 'ready']
-        ).count()
-        completed_orders = queryset.filter(status='completed').count()
-        cancelled_orders = queryset.filter(status='cancelled').count()
-
-        # Revenue calculation
-        revenue_data = queryset.exclude(status='cancelled').aggregate(
-            total=Sum('price')
-        )
-        total_revenue = revenue_data['total'] or Decimal('0.00')
-
-        # Average order value
-        avg_order = queryset.exclude(status='cancelled').aggregate(
-            avg=Avg('price')
-        )
-        average_order_value = avg_order['avg'] or Decimal('0.00')
-
-        # Unique customers
-        total_customers = queryset.values('customer').distinct().count()
-
-        data = {
-            'total_revenue': total_revenue,
-            'total_orders': total_orders,
-            'active_orders': active_orders,
-            'completed_orders': completed_orders,
-            'cancelled_orders': cancelled_orders,
-            'total_customers': total_customers,
-            'average_order_value': average_order_value,
-            'time_range': time_range,
-        }
+        exact = self.use_exact_counts(request)
+        totals = queryset.aggregate(**OVERVIEW_AGGREGATES, **(EXACT_CUSTOMER_AGGREGATE if exact else {}))
+        if not exact:
+            totals['total_customers'] = sketches.merged_count(
+                self.estimate_customers(request, start_date, end_date)
+            )
+        data = self.build_overview(totals, time_range)
 
         serializer = OverviewSerializer(data)
         return Response(serializer.data)
@@ -159,7 +226,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
         time_range = request.query_params.get('time_range', 'month')
         start_date, end_date = self.get_time_range_filter(time_range)
 
-        queryset = self.get_base_queryset(request).filter(
+        queryset = self.get_base_queryset(request, start_date).filter(
             created_at__gte=start_date,
             created_at__lte=end_date
         ).exclude(status='cancelled')
@@ -199,7 +266,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
         time_range = request.query_params.get('time_range', 'month')
         start_date, end_date = self.get_time_range_filter(time_range)
 
-        queryset = self.get_base_queryset(request).filter(
+        queryset = self.get_base_queryset(request, start_date).filter(
             created_at__gte=start_date,
             created_at__lte=end_date
         )
@@ -228,7 +295,12 @@ class AnalyticsViewSet(viewsets.ViewSet):
     def top_customers(self, request):
         """
         Get top customers by total spent.
-        Query params: time_range, limit (default 10)
+        Query params: time_range (today|week|month|quarter|year|all),
+        limit (default 10, at most 100)
+
+        Served from the customer stats tables: `all` reads lifetime totals in
+        spend order, other ranges sum the daily partials from the range's
+        first day.
         """
         if not self.check_analytics_permission(request):
             return Response(
@@ -237,39 +309,41 @@ class AnalyticsViewSet(viewsets.ViewSet):
             )
 
         time_range = request.query_params.get('time_range', 'month')
-        limit = int(request.query_params.get('limit', 10))
-        start_date, end_date = self.get_time_range_filter(time_range)
-
-        queryset = self.get_base_queryset(request).filter(
-            created_at__gte=start_date,
-            created_at__lte=end_date
-        ).exclude(status='cancelled')
-
-        # Group by customer
-        top_customers = queryset.values(
-            'customer__id',
-            'customer__username',
-            'customer__email',
-            'customer__phone',
-            'customer__first_name',
-            'customer__last_name',
-        ).annotate(
-            order_count=Count('id'),
-            total_spent=Sum('price')
-        ).order_by('-total_spent')[:limit]
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, MAX_TOP_CUSTOMERS))
+
+        laundromat = self.get_staff_laundromat(request)
+        if time_range == 'all':
+            if laundromat is not None:
+                stats = CustomerLaundromatStats.objects.filter(laundromat=laundromat)
+            else:
+                stats = CustomerStats.objects.all()
+            top_customers = stats.filter(order_count__gt=0).values(
+                *CUSTOMER_COLUMNS, 'order_count', 'total_spent'
+            ).order_by('-total_spent')[:limit]
+        else:
+            start_date, end_date = self.get_time_range_filter(time_range)
+            stats = CustomerDailyStats.objects.filter(date__gte=timezone.localdate(start_date))
+            if laundromat is not None:
+                stats = stats.filter(laundromat=laundromat)
+            # Cancelled orders leave zero-count daily rows behind
+            top_customers = stats.values(*CUSTOMER_COLUMNS).annotate(
+                order_count=Sum('order_count'),
+                total_spent=Sum('total_spent')
+            ).filter(order_count__gt=0).order_by('-total_spent')[:limit]
 
         # Format response
         customer_data = []
         for item in top_customers:
-            name_parts = [
-                item['customer__first_name'] or '',
-                item['customer__last_name'] or ''
-            ]
-            customer_name = ' '.join(filter(None, name_parts)) or item['customer__username']
-
             customer_data.append({
                 'customer_id': item['customer__id'],
-                'customer_name': customer_name,
+                'customer_name': self.get_customer_name(item),
                 'customer_email': item['customer__email'],
                 'customer_phone': item['customer__phone'],
                 'order_count': item['order_count'],
@@ -279,6 +353,60 @@ class AnalyticsViewSet(viewsets.ViewSet):
         serializer = TopCustomerSerializer(customer_data, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='customer-stats')
+    def customer_stats(self, request):
+        """
+        Get a customer's lifetime orders and spend, overall and per laundromat.
+        Query params: customer_id
+        Staff only see the customer's history at their own laundromat.
+        """
+        if not self.check_analytics_permission(request):
+            return Response(
+                {'error': 'You do not have permission to view analytics'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        customer_id = request.query_params.get('customer_id')
+        if not customer_id or not customer_id.isdigit():
+            return Response(
+                {'error': 'customer_id parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        per_laundromat = CustomerLaundromatStats.objects.filter(
+            customer_id=customer_id
+        ).select_related('laundromat').order_by('-total_spent')
+        laundromat = self.get_staff_laundromat(request)
+        if laundromat is not None:
+            per_laundromat = per_laundromat.filter(laundromat=laundromat)
+            totals = per_laundromat.values(*CUSTOMER_COLUMNS, *LIFETIME_COLUMNS).first()
+        else:
+            totals = CustomerStats.objects.filter(
+                customer_id=customer_id
+            ).values(*CUSTOMER_COLUMNS, *LIFETIME_COLUMNS).first()
+
+        if totals is None:
+            return Response(
+                {'error': 'No orders found for this customer'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        data = {
+            'customer_id': totals['customer__id'],
+            'customer_name': self.get_customer_name(totals),
+            **{column: totals[column] for column in LIFETIME_COLUMNS},
+            'laundromats': [
+                {
+                    'laundromat_id': stats.laundromat_id,
+                    'laundromat_name': stats.laundromat.name,
+                    **{column: getattr(stats, column) for column in LIFETIME_COLUMNS},
+                }
+                for stats in per_laundromat
+            ],
+        }
+        serializer = CustomerStatsSerializer(data)
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'], url_path='staff-performance')
     def staff_performance(self, request):
         """
@@ -294,7 +422,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
         time_range = request.query_params.get('time_range', 'month')
         start_date, end_date = self.get_time_range_filter(time_range)
 
-        queryset = self.get_base_queryset(request).filter(
+        queryset = self.get_base_queryset(request, start_date).filter(
             created_at__gte=start_date,
             created_at__lte=end_date,
             staff__isnull=False
@@ -310,30 +438,22 @@ class AnalyticsViewSet(viewsets.ViewSet):
             order_count=Count('id'),
             completed_orders=Count('id', filter=Q(status='completed')),
             total_revenue=Sum('price', filter=~Q(status='cancelled')),
+            # Average processing time for completed orders, computed in the
+            # same grouped query instead of one query per staff member.
+            avg_processing=Avg(
+                ExpressionWrapper(
+                    F('actual_pickup_date') - F('drop_off_date'),
+                    output_field=DurationField()
+                ),
+                filter=Q(status='completed', actual_pickup_date__isnull=False)
+            ),
         ).order_by('-order_count')
 
-        # Calculate average processing time for completed orders
         performance_data = []
         for item in staff_stats:
-            # Get completed receipts with both dates set
-            completed_receipts = queryset.filter(
-                staff__id=item['staff__id'],
-                status='completed',
-                actual_pickup_date__isnull=False
-            )
-
-            # Calculate average processing time
             avg_hours = None
-            if completed_receipts.exists():
-                total_hours = 0
-                count = 0
-                for receipt in completed_receipts:
-                    if receipt.actual_pickup_date and receipt.drop_off_date:
-                        delta = receipt.actual_pickup_date - receipt.drop_off_date
-                        total_hours += delta.total_seconds() / 3600
-                        count += 1
-                if count > 0:
-                    avg_hours = round(total_hours / count, 2)
+            if item['avg_processing'] is not None:
+                avg_hours = round(item['avg_processing'].total_seconds() / 3600, 2)
 
             name_parts = [
                 item['staff__first_name'] or '',
@@ -357,7 +477,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     def laundromat_comparison(self, request):
         """
         Compare all laundromats (admin only).
-        Query params: time_range
+        Query params: time_range, exact
         """
         user = request.user
 
@@ -371,23 +491,29 @@ class AnalyticsViewSet(viewsets.ViewSet):
         time_range = request.query_params.get('time_range', 'month')
         start_date, end_date = self.get_time_range_filter(time_range)
 
-        queryset = Receipt.objects.filter(
+        queryset = receipts_for_range(start_date).filter(
             created_at__gte=start_date,
             created_at__lte=end_date
         )
 
+        exact = self.use_exact_counts(request)
+        aggregates = {
+            'order_count': Count('id'),
+            'revenue': Sum('price', filter=~Q(status='cancelled')),
+            'active_orders': Count('id', filter=Q(
+                status__in=['pending', 'washing', 'drying', 'ready']
+            )),
+        }
+        if exact:
+            aggregates['customer_count'] = Count('customer', distinct=True)
+        else:
+            customer_sketches = self.estimate_customers(request, start_date, end_date)
+
         # Group by laundromat
         laundromat_stats = queryset.values(
             'laundromat__id',
             'laundromat__name',
-        ).annotate(
-            order_count=Count('id'),
-            revenue=Sum('price', filter=~Q(status='cancelled')),
-            customer_count=Count('customer', distinct=True),
-            active_orders=Count('id', filter=Q(
-                status__in=['pending', 'washing', 'drying', 'ready']
-            )),
-        ).order_by('-revenue')
+        ).annotate(**aggregates).order_by('-revenue')
 
         # Format response
         comparison_data = []
@@ -401,7 +527,10 @@ class AnalyticsViewSet(viewsets.ViewSet):
                 'laundromat_name': item['laundromat__name'],
                 'revenue': item['revenue'] or Decimal('0.00'),
                 'order_count': item['order_count'],
-                'customer_count': item['customer_count'],
+                'customer_count': item['customer_count'] if exact else (
+                    customer_sketches[item['laundromat__id']].count()
+                    if item['laundromat__id'] in customer_sketches else 0
+                ),
                 'active_orders': item['active_orders'],
                 'avg_order_value': avg_order_value,
             })
@@ -413,7 +542,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
     def peak_hours(self, request):
         """
         Analyze peak hours for orders.
-        Query params: time_range
+        Query params: time_range, mode (hourly|heatmap; see peak_hours_heatmap)
         """
         if not self.check_analytics_permission(request):
             return Response(
@@ -421,10 +550,13 @@ class AnalyticsViewSet(viewsets.ViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
+        if request.query_params.get('mode') == 'heatmap':
+            return self.peak_hours_heatmap(request)
+
         time_range = request.query_params.get('time_range', 'month')
         start_date, end_date = self.get_time_range_filter(time_range)
 
-        queryset = self.get_base_queryset(request).filter(
+        queryset = self.get_base_queryset(request, start_date).filter(
             created_at__gte=start_date,
             created_at__lte=end_date
         )
@@ -448,11 +580,242 @@ class AnalyticsViewSet(viewsets.ViewSet):
         serializer = PeakHoursSerializer(peak_data, many=True)
         return Response(serializer.data)
 
+    def peak_hours_heatmap(self, request):
+        """
+        Day-of-week x hour demand heatmap from the hourly rollups.
+        Query params: time_range, laundromat (admin only), tz (IANA zone;
+        defaults to each laundromat's own), compare (add the previous period)
+
+        Days run Monday (0) to Sunday (6). The window is widened to whole
+        UTC hours, so at most 24 rollup rows per day are read. A UTC hour
+        spans two local hours in zones whose offset is not whole hours
+        (Asia/Kolkata, Asia/Kathmandu), so those are counted from the
+        receipts and status events instead.
+        """
+        time_range = request.query_params.get('time_range', 'month')
+        start_date, end_date = self.get_time_range_filter(time_range)
+
+        tz_name = request.query_params.get('tz')
+        if tz_name:
+            try:
+                validate_timezone(tz_name)
+            except DjangoValidationError:
+                return Response(
+                    {'error': f"Unknown time zone '{tz_name}'"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        laundromat = self.get_staff_laundromat(request)
+        laundromat_id = request.query_params.get('laundromat')
+        if laundromat is None and laundromat_id:
+            if not laundromat_id.isdigit():
+                return Response(
+                    {'error': 'laundromat must be an id'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            laundromat = Laundromat.objects.filter(pk=laundromat_id).first()
+            if laundromat is None:
+                return Response(
+                    {'error': 'Laundromat not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        scope = {} if laundromat is None else {'laundromat': laundromat}
+
+        cells = self.heatmap_cells(request, scope, start_date, end_date, tz_name)
+        previous_start = previous_end = None
+        compare = request.query_params.get('compare', '').lower() in ('1', 'true', 'yes')
+        if compare:
+            previous_start, previous_end = start_date - (end_date - start_date), start_date
+            previous = self.heatmap_cells(
+                request, scope, previous_start, previous_end, tz_name, end_inclusive=False
+            )
+
+        data = []
+        for day_of_week in range(7):
+            for hour in range(24):
+                cell = cells[day_of_week][hour]
+                before = previous[day_of_week][hour] if compare else None
+                data.append({
+                    'day_of_week': day_of_week,
+                    'hour': hour,
+                    'order_count': cell.order_count,
+                    'revenue': cell.revenue,
+                    'completed_count': cell.completed_count,
+                    'previous_order_count': before.order_count if before else None,
+                    'previous_revenue': before.revenue if before else None,
+                    'previous_completed_count': before.completed_count if before else None,
+                })
+
+        if tz_name is None and laundromat is not None:
+            tz_name = laundromat.timezone
+        serializer = PeakHoursHeatmapSerializer({
+            'timezone': tz_name or 'local',
+            'start': start_date,
+            'end': end_date,
+            'previous_start': previous_start,
+            'previous_end': previous_end,
+            'cells': data,
+        })
+        return Response(serializer.data)
+
+    def heatmap_cells(self, request, scope, start, end, tz_name=None, end_inclusive=True):
+        """
+        Fold the hourly rollups of the laundromats matching `scope` into a
+        [day_of_week][hour] grid of Buckets
+        """
+        window = {'__gte': hour_bucket(start)}
+        if end_inclusive:
+            window['__lte'] = end
+        else:
+            # The next window starts with the hour `end` falls in
+            window['__lt'] = hour_bucket(end)
+        rollups = HourlyReceiptStats.objects.filter(
+            **scope, **{f'hour{lookup}': value for lookup, value in window.items()}
+        )
+        # Summed in SQL per hour (and per zone when laundromats use their own)
+        group_by = ('hour',) if tz_name else ('laundromat__timezone', 'hour')
+        rows = rollups.values(*group_by).annotate(
+            orders=Sum('order_count'),
+            total_revenue=Sum('revenue'),
+            completions=Sum('completed_count'),
+        ).order_by()
+
+        zones = {}
+        local_rows = []
+        for row in rows:
+            name = tz_name or row['laundromat__timezone']
+            if name not in zones:
+                zones[name] = zoneinfo.ZoneInfo(name)
+            local_rows.append((name, row['hour'].astimezone(zones[name]), row))
+        # Zones where some hour does not start on a local hour
+        split = {name for name, local, _ in local_rows if local.minute}
+
+        grid = [[HourlyBucket() for _ in range(24)] for _ in range(7)]
+        for name, local, row in local_rows:
+            if name in split:
+                continue
+            cell = grid[local.weekday()][local.hour]
+            cell.order_count += row['orders']
+            cell.revenue += row['total_revenue']
+            cell.completed_count += row['completions']
+
+        for name in split:
+            in_zone = dict(scope) if tz_name else {**scope, 'laundromat__timezone': name}
+            in_zone.update({f'created_at{lookup}': value for lookup, value in window.items()})
+            local_time = {
+                'day': ExtractIsoWeekDay('created_at', tzinfo=zones[name]),
+                'local_hour': ExtractHour('created_at', tzinfo=zones[name]),
+            }
+            receipts = self.get_base_queryset(request, start).filter(**in_zone).values(
+                **local_time
+            ).annotate(
+                orders=Count('id'),
+                total_revenue=Sum('price', filter=~Q(status='cancelled')),
+            ).order_by()
+            for row in receipts:
+                cell = grid[row['day'] - 1][row['local_hour']]
+                cell.order_count += row['orders']
+                cell.revenue += row['total_revenue'] or Decimal('0')
+            completions = self.get_status_event_queryset(request).filter(
+                **in_zone, status='completed'
+            ).values(**local_time).annotate(completions=Count('id')).order_by()
+            for row in completions:
+                grid[row['day'] - 1][row['local_hour']].completed_count += row['completions']
+        return grid
+
+    @action(detail=False, methods=['get'], url_path='stage-durations')
+    def stage_durations(self, request):
+        """
+        Time receipts spend in each stage (pending, washing, drying, ready).
+        Query params: time_range, group_by (laundromat|staff, default laundromat)
+
+        A stage lasts from the status event that starts it to the receipt's
+        next event, found with a LEAD() window over the event log. Stages a
+        receipt is still in are counted as in_progress.
+        """
+        if not self.check_analytics_permission(request):
+            return Response(
+                {'error': 'You do not have permission to view analytics'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        group_by = request.query_params.get('group_by', 'laundromat')
+        if group_by not in ('laundromat', 'staff'):
+            return Response(
+                {'error': "group_by must be 'laundromat' or 'staff'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        time_range = request.query_params.get('time_range', 'month')
+        start_date, end_date = self.get_time_range_filter(time_range)
+
+        # The window must see every event, so final statuses are skipped in
+        # Python rather than filtered out in SQL.
+        events = self.get_status_event_queryset(request).filter(
+            created_at__gte=start_date
+        ).annotate(
+            left_at=Window(
+                Lead('created_at'),
+                partition_by=[F('receipt_id')],
+                order_by=F('created_at').asc(),
+            )
+        ).values_list(
+            'laundromat_id', 'laundromat__name',
+            'staff_id', 'staff__username', 'staff__first_name', 'staff__last_name',
+            'status', 'created_at', 'left_at',
+        )
+
+        stages = [choice for choice, _ in Receipt.STATUS_CHOICES if Receipt.STATUS_TRANSITIONS[choice]]
+        groups = defaultdict(lambda: {'durations': [], 'in_progress': 0})
+        for (laundromat_id, laundromat_name, staff_id, username, first_name, last_name,
+             stage, entered_at, left_at) in events.iterator(chunk_size=2000):
+            if stage not in stages:
+                continue
+            if group_by == 'staff':
+                staff_name = ' '.join(filter(None, [first_name, last_name])) or username
+                key = (laundromat_id, laundromat_name, staff_id, staff_name, stage)
+            else:
+                key = (laundromat_id, laundromat_name, None, None, stage)
+            if left_at is None:
+                groups[key]['in_progress'] += 1
+            else:
+                groups[key]['durations'].append((left_at - entered_at).total_seconds() / 3600)
+
+        duration_data = []
+        for key in sorted(groups, key=lambda k: (k[1], k[0], k[3] or '', k[2] or 0, stages.index(k[4]))):
+            laundromat_id, laundromat_name, staff_id, staff_name, stage = key
+            hours = sorted(groups[key]['durations'])
+            duration_data.append({
+                'laundromat_id': laundromat_id,
+                'laundromat_name': laundromat_name,
+                'staff_id': staff_id,
+                'staff_name': staff_name,
+                'stage': stage,
+                'count': len(hours),
+                'in_progress': groups[key]['in_progress'],
+                'avg_hours': round(sum(hours) / len(hours), 2) if hours else None,
+                'p50_hours': round(self.percentile(hours, 50), 2) if hours else None,
+                'p90_hours': round(self.percentile(hours, 90), 2) if hours else None,
+                'max_hours': round(hours[-1], 2) if hours else None,
+            })
+
+        serializer = StageDurationSerializer(duration_data, many=True)
+        return Response(serializer.data)
+
+    @staticmethod
+    def percentile(sorted_values, percent):
+        """Nearest-rank percentile of an already sorted list"""
+        rank = max(1, -(-len(sorted_values) * percent // 100))
+        return sorted_values[int(rank) - 1]
+
     @action(detail=False, methods=['get'], url_path='export/pdf')
     def export_pdf(self, request):
         """
-        Export analytics report as PDF.
-        Query params: time_range
+        Export analytics report as PDF, with revenue and peak-hour charts.
+        Query params: time_range, exact
+
+        Reports are cached by content (see reports.py), and served with an
+        ETag and byte-range support.
         """
         if not self.check_analytics_permission(request):
             return Response(
@@ -460,7 +823,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        if not REPORTLAB_AVAILABLE:
+        if not reports.reportlab_available():
             return Response(
                 {'error': 'PDF generation is not available. Please install reportlab.'},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
@@ -469,111 +832,30 @@ class AnalyticsViewSet(viewsets.ViewSet):
         time_range = request.query_params.get('time_range', 'month')
         start_date, end_date = self.get_time_range_filter(time_range)
 
-        # Get analytics data
-        queryset = self.get_base_queryset(request).filter(
+        queryset = self.get_base_queryset(request, start_date).filter(
             created_at__gte=start_date,
             created_at__lte=end_date
         )
-
-        # Calculate metrics
-        total_orders = queryset.count()
-        completed_orders = queryset.filter(status='completed').count()
-        revenue_data = queryset.exclude(status='cancelled').aggregate(total=Sum('price'))
-        total_revenue = revenue_data['total'] or Decimal('0.00')
-        total_customers = queryset.values('customer').distinct().count()
-
-        # Create PDF
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
+        exact = self.use_exact_counts(request)
+
+        def count_customers():
+            if exact:
+                return queryset.values('customer').distinct().count()
+            return sketches.merged_count(self.estimate_customers(request, start_date, end_date))
+
+        laundromat = self.get_staff_laundromat(request)
+        key, pdf = reports.render_report(
+            queryset,
+            scope=laundromat.pk if laundromat is not None else 'all',
+            time_range=time_range,
+            start=start_date,
+            end=end_date,
+            exact=exact,
+            count_customers=count_customers,
         )
-        elements.append(Paragraph('Lavendia Analytics Report', title_style))
-
-        # Time range
-        elements.append(Paragraph(f'Time Range: {time_range.capitalize()}', styles['Normal']))
-        elements.append(Paragraph(f'From: {start_date.strftime("%Y-%m-%d")} To: {end_date.strftime("%Y-%m-%d")}', styles['Normal']))
-        elements.append(Spacer(1, 20))
-
-        # Overview table
-        elements.append(Paragraph('Overview', styles['Heading2']))
-        overview_data = [
-            ['Metric', 'Value'],
-            ['Total Revenue', f'${total_revenue:.2f}'],
-            ['Total Orders', str(total_orders)],
-            ['Completed Orders', str(completed_orders)],
-            ['Unique Customers', str(total_customers)],
-        ]
-        overview_table = Table(overview_data, colWidths=[3*inch, 2*inch])
-        overview_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#6366F1')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F3F4F6')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ]))
-        elements.append(overview_table)
-        elements.append(Spacer(1, 20))
-
-        # Status distribution table
-        elements.append(Paragraph('Order Status Distribution', styles['Heading2']))
-        status_data = [['Status', 'Count', 'Percentage']]
-        status_counts = queryset.values('status').annotate(count=Count('id')).order_by('-count')
-        for item in status_counts:
-            percentage = (item['count'] / total_orders * 100) if total_orders > 0 else 0
-            status_data.append([
-                item['status'].capitalize(),
-                str(item['count']),
-                f'{percentage:.1f}%'
-            ])
 
-        status_table = Table(status_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
-        status_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10B981')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F3F4F6')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ]))
-        elements.append(status_table)
-        elements.append(Spacer(1, 20))
-
-        # Footer
-        elements.append(Spacer(1, 30))
-        elements.append(Paragraph(
-            f'Generated on {timezone.now().strftime("%Y-%m-%d %H:%M")} by Lavendia',
-            styles['Normal']
-        ))
-
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-
-        # Create response
-        response = HttpResponse(buffer, content_type='application/pdf')
         filename = f'lavendia_analytics_{time_range}_{timezone.now().strftime("%Y%m%d")}.pdf'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        return response
+        return bytes_response(request, pdf, 'application/pdf', filename=filename, etag=key)
 
     @action(detail=False, methods=['get'], url_path='export/csv')
     def export_csv(self, request):
@@ -590,7 +872,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
         time_range = request.query_params.get('time_range', 'month')
         start_date, end_date = self.get_time_range_filter(time_range)
 
-        queryset = self.get_base_queryset(request).filter(
+        queryset = self.get_base_queryset(request, start_date).filter(
             created_at__gte=start_date,
             created_at__lte=end_date
         ).select_related('customer', 'staff', 'laundromat').order_by('-created_at')
@@ -603,22 +885,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
         writer = csv.writer(response)
 
         # Write header
-        writer.writerow([
-            'Receipt Number',
-            'Date',
-            'Customer',
-            'Customer Phone',
-            'Laundromat',
-            'Staff',
-            'Status',
-            'Items Count',
-            'Items Description',
-            'Price',
-            'Drop Off Date',
-            'Expected Pickup',
-            'Actual Pickup',
-            'Special Instructions'
-        ])
+        writer.writerow(spreadsheets.TRANSACTION_HEADERS)
 
         # Write data rows
         for receipt in queryset:
@@ -656,3 +923,41 @@ class AnalyticsViewSet(viewsets.ViewSet):
             ])
 
         return response
+
+    @action(detail=False, methods=['get'], url_path='export/xlsx')
+    def export_xlsx(self, request):
+        """
+        Export transactions as a typed Excel workbook, with overview and
+        status distribution sheets (see spreadsheets.py).
+        Query params: time_range, exact
+        """
+        if not self.check_analytics_permission(request):
+            return Response(
+                {'error': 'You do not have permission to export analytics'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        time_range = request.query_params.get('time_range', 'month')
+        start_date, end_date = self.get_time_range_filter(time_range)
+
+        queryset = self.get_base_queryset(request, start_date).filter(
+            created_at__gte=start_date,
+            created_at__lte=end_date
+        )
+
+        exact = self.use_exact_counts(request)
+        totals = queryset.aggregate(**OVERVIEW_AGGREGATES, **(EXACT_CUSTOMER_AGGREGATE if exact else {}))
+        if not exact:
+            totals['total_customers'] = sketches.merged_count(
+                self.estimate_customers(request, start_date, end_date)
+            )
+        statuses = queryset.values_list('status').annotate(count=Count('id')).order_by('-count')
+
+        response = streaming_response(
+            request,
+            spreadsheets.workbook(self.build_overview(totals, time_range), list(statuses), queryset),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+        filename = f'lavendia_transactions_{time_range}_{timezone.now().strftime("%Y%m%d")}.xlsx'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
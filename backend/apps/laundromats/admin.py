@@ -11,7 +11,7 @@ class LaundromatAdmin(admin.ModelAdmin):
 
     fieldsets = (
         ('Basic Information', {
-            'fields': ('name', 'address', 'phone', 'email')
+            'fields': ('name', 'address', 'phone', 'email', 'timezone')
         }),
         ('Status', {
             'fields': ('is_active',)
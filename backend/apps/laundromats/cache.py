@@ -0,0 +1,148 @@
+"""
+In-process cache of laundromat reference data.
+
+There are a handful of laundromats and they rarely change, yet every
+receipt row shows its laundromat's name and `laundromats/` is fetched on
+every app start. Each worker process keeps:
+
+- every laundromat row, loaded in one query and read by the receipt
+  serializers instead of joining the laundromats table, and
+- rendered `laundromats/` list payloads, keyed by the request URL.
+
+Writes to Laundromat (save, delete, and the queryset's bulk_create,
+update and delete) drop this worker's copy straight away and, on commit,
+replace a version token kept in the shared Django cache
+(CACHES['default']). Other workers compare their version with the shared
+one at most every LAUNDROMAT_CACHE_CHECK_SECONDS and reload when it has
+moved, so their view is at most that many seconds old. Checking never queries the database;
+only a reload does.
+
+Hit counters are per process; `GET /api/laundromats/cache-stats/` reports
+the serving worker's.
+"""
+import asyncio
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'laundromats:reference-version'
+
+
+def on_event_loop():
+    """Whether this is async code, where the ORM may not be called"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class LaundromatCache:
+    """Laundromat rows and list payloads, tagged with the shared version"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.checked_at = None
+        self.rows = None
+        self.payloads = {}
+        self.stats = dict.fromkeys(('hits', 'misses', 'loads', 'invalidations'), 0)
+
+    def get(self, laundromat_id):
+        """The Laundromat with this id (shared, read-only), or None"""
+        rows = self.fresh_rows()
+        laundromat = rows.get(laundromat_id)
+        if laundromat is not None:
+            self.stats['hits'] += 1
+            return laundromat
+
+        # Created after our load: reload if the shared version has moved
+        self.stats['misses'] += 1
+        if not on_event_loop():
+            rows = self.fresh_rows(check_now=True)
+        return rows.get(laundromat_id)
+
+    def payload(self, key, build):
+        """A cached list payload, or build() it and cache it"""
+        self.fresh_rows()
+        version = self.version
+        data = self.payloads.get(key)
+        if data is not None:
+            self.stats['hits'] += 1
+            return data
+        self.stats['misses'] += 1
+        data = build()
+        with self.lock:
+            if version == self.version:
+                if len(self.payloads) >= getattr(settings, 'LAUNDROMAT_CACHE_MAX_PAYLOADS', 256):
+                    self.payloads.clear()
+                self.payloads[key] = data
+        return data
+
+    def fresh_rows(self, check_now=False):
+        """The rows, reloaded first if the shared version has changed"""
+        if on_event_loop():
+            # Only awarm(), run beforehand in a thread, may load on this path
+            return self.rows or {}
+
+        interval = getattr(settings, 'LAUNDROMAT_CACHE_CHECK_SECONDS', 1)
+        now = time.monotonic()
+        if self.rows is not None and not check_now and now - self.checked_at < interval:
+            return self.rows
+
+        with self.lock:
+            version = cache.get(VERSION_KEY)
+            self.checked_at = now
+            if self.rows is None or version != self.version:
+                self.load(version)
+            return self.rows
+
+    def load(self, version):
+        from .models import Laundromat
+
+        self.rows = {laundromat.pk: laundromat for laundromat in Laundromat.objects.all()}
+        self.payloads = {}
+        self.version = version
+        self.stats['loads'] += 1
+
+    async def awarm(self, laundromat_ids=()):
+        """Run any pending reload before serializing `laundromat_ids` on the event loop"""
+        from asgiref.sync import sync_to_async
+
+        def warm():
+            if not set(laundromat_ids) <= self.fresh_rows().keys():
+                self.fresh_rows(check_now=True)
+        await sync_to_async(warm)()
+
+    def invalidate(self):
+        """
+        Drop this worker's copy now, and move the shared version on once the
+        current transaction commits, so other workers cannot reload the
+        rows before the change is visible to them.
+        """
+        with self.lock:
+            self.rows = None
+            self.payloads = {}
+            self.stats['invalidations'] += 1
+        transaction.on_commit(self.publish_version)
+
+    def publish_version(self):
+        # A fresh token rather than an increment: no cache backend can lose it
+        cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+    def get_stats(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else None,
+            'version': self.version,
+            'laundromats': len(self.rows or {}),
+            'payloads': len(self.payloads),
+        }
+
+
+laundromat_cache = LaundromatCache()
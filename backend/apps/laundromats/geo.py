@@ -0,0 +1,158 @@
+"""
+Geohash grid index for nearest-laundromat search.
+
+Each laundromat with coordinates stores the geohash of its location
+(GEOHASH_PRECISION characters, cells of about 5 m). A geohash names a cell
+of a grid that halves in longitude and latitude alternately with every bit,
+so all points inside a coarser cell share its hash as a prefix, and a
+prefix is a contiguous range of the indexed `geohash` column.
+
+nearest() answers "the k closest laundromats within radius_km" without a
+spatial database extension. For each search radius it picks the finest
+precision whose cells are at least that big, takes the (at most 3x3) cells
+of that precision covering the circle's bounding box, and reads only the
+rows in those prefix ranges. Candidates are ranked by great-circle
+distance. The search starts small and widens until k laundromats are found
+or the requested radius is covered, so dense areas read a few rows and
+sparse ones a few more queries.
+"""
+import math
+
+from django.db.models import Q
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# First search radius; each pass widens it by WIDEN_FACTOR
+START_RADIUS_KM = 1
+WIDEN_FACTOR = 4
+
+
+def cell_degrees(precision):
+    """(latitude, longitude) size in degrees of a cell of this precision"""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def cell_hash(lat_index, lng_index, precision):
+    """Geohash of the cell at these grid indices"""
+    bits = 5 * precision
+    lat_bits, lng_bits = bits // 2, (bits + 1) // 2
+    value = 0
+    for bit in range(bits):
+        # Bits alternate longitude, latitude, ... from the most significant
+        if bit % 2 == 0:
+            lng_bits -= 1
+            value = value << 1 | (lng_index >> lng_bits & 1)
+        else:
+            lat_bits -= 1
+            value = value << 1 | (lat_index >> lat_bits & 1)
+    return ''.join(BASE32[value >> shift & 31] for shift in range(bits - 5, -1, -5))
+
+
+def cell_index(lat, lng, precision):
+    lat_size, lng_size = cell_degrees(precision)
+    lat_cells, lng_cells = round(180 / lat_size), round(360 / lng_size)
+    return (
+        min(math.floor((lat + 90) / lat_size), lat_cells - 1),
+        math.floor((lng + 180) / lng_size) % lng_cells,
+    )
+
+
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    return cell_hash(*cell_index(lat, lng, precision), precision)
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1, math.sqrt(a)))
+
+
+def covering_cells(lat, lng, radius_km):
+    """Geohash prefixes whose cells together cover the circle"""
+    lat_span = radius_km / KM_PER_DEGREE
+    if abs(lat) + lat_span >= 90:
+        # The circle takes in a pole, and with it every longitude
+        return ['']
+    # Longitude degrees shrink towards the poles; use the widest latitude
+    lng_span = radius_km / (KM_PER_DEGREE * math.cos(math.radians(abs(lat) + lat_span)))
+    if lng_span >= 180:
+        return ['']
+
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        lat_size, lng_size = cell_degrees(candidate)
+        if lat_size >= lat_span and lng_size >= lng_span:
+            precision = candidate
+            break
+
+    south, west = cell_index(max(-90, lat - lat_span), lng - lng_span, precision)
+    north, east = cell_index(min(90, lat + lat_span), lng + lng_span, precision)
+    lng_cells = round(360 / cell_degrees(precision)[1])
+    # Across the antimeridian the east index wraps round below the west one
+    lng_indices = range(west, west + (east - west) % lng_cells + 1)
+    return sorted({
+        cell_hash(lat_index, lng_index % lng_cells, precision)
+        for lat_index in range(south, north + 1)
+        for lng_index in lng_indices
+    })
+
+
+def prefix_end(prefix):
+    """The first geohash after every one starting with `prefix`, or None"""
+    prefix = prefix.rstrip(BASE32[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + BASE32[BASE32.index(prefix[-1]) + 1]
+
+
+def prefix_filter(prefixes):
+    """Q matching geohashes under any of `prefixes`, as index range scans"""
+    ranges = []
+    for prefix in sorted(prefixes):
+        end = prefix_end(prefix)
+        if ranges and ranges[-1][1] == prefix:
+            # Neighbouring cells often follow on in hash order: one range
+            ranges[-1][1] = end
+        else:
+            ranges.append([prefix, end])
+
+    query = Q()
+    for start, end in ranges:
+        cell = Q(geohash__gte=start)
+        if end is not None:
+            cell &= Q(geohash__lt=end)
+        query |= cell
+    return query
+
+
+def nearest(queryset, lat, lng, radius_km, limit):
+    """
+    Up to `limit` (laundromat, distance_km) pairs from `queryset` within
+    `radius_km` of the point, closest first.
+    """
+    # Ordering by anything else would lead the planner away from the index
+    queryset = queryset.exclude(geohash='').order_by()
+    radius = min(START_RADIUS_KM, radius_km)
+    while True:
+        # Every laundromat within `radius` is in these cells, so once there
+        # are `limit` of them no farther one can be among the nearest
+        candidates = queryset.filter(prefix_filter(covering_cells(lat, lng, radius)))
+        found = sorted(
+            (
+                (laundromat, distance)
+                for laundromat in candidates
+                if (distance := distance_km(lat, lng, laundromat.latitude, laundromat.longitude)) <= radius
+            ),
+            key=lambda pair: pair[1],
+        )
+        if len(found) >= limit or radius >= radius_km:
+            return found[:limit]
+        radius = min(radius * WIDEN_FACTOR, radius_km)
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:41
+
+import apps.laundromats.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundromats', '0002_laundromat_laundromats_name_b17e6e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laundromat',
+            name='timezone',
+            field=models.CharField(default=apps.laundromats.models.default_timezone, max_length=64, validators=[apps.laundromats.models.validate_timezone]),
+        ),
+    ]
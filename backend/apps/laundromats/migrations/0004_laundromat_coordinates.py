@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:08
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundromats', '0003_laundromat_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laundromat',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='laundromat',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='laundromat',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddIndex(
+            model_name='laundromat',
+            index=models.Index(fields=['geohash'], name='laundromats_geohash_495e86_idx'),
+        ),
+    ]
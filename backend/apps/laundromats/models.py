@@ -1,4 +1,67 @@
-from django.db import models
+import zoneinfo
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+
+from apps.analytics import customer_stats
+from . import geo
+from .cache import laundromat_cache
+
+
+def validate_timezone(value):
+    try:
+        zoneinfo.ZoneInfo(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f"'{value}' is not a known time zone")
+
+
+def default_timezone():
+    return settings.TIME_ZONE
+
+
+class LaundromatQuerySet(models.QuerySet):
+    """QuerySet whose bulk writes invalidate the laundromat cache and whose deletes
+    take the cascaded receipts out of the lifetime customer stats"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_geohash()
+        created = super().bulk_create(objs, *args, **kwargs)
+        laundromat_cache.invalidate()
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if {'latitude', 'longitude'} & set(fields):
+            objs = list(objs)
+            for obj in objs:
+                obj.set_geohash()
+            fields = [*fields, 'geohash']
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        laundromat_cache.invalidate()
+        return updated
+
+    def update(self, **kwargs):
+        if {'latitude', 'longitude'} & kwargs.keys() and 'geohash' not in kwargs:
+            # The geohash is computed in Python, so moved rows are rewritten by pk
+            laundromats = list(self)
+            for laundromat in laundromats:
+                for name, value in kwargs.items():
+                    setattr(laundromat, name, value)
+            self.model.objects.bulk_update(laundromats, list(kwargs))
+            return len(laundromats)
+        updated = super().update(**kwargs)
+        laundromat_cache.invalidate()
+        return updated
+
+    def delete(self):
+        with transaction.atomic():
+            customer_stats.forget_laundromats(self.values('pk'))
+            deleted = super().delete()
+        laundromat_cache.invalidate()
+        return deleted
 
 
 class Laundromat(models.Model):
@@ -10,9 +73,21 @@ class Laundromat(models.Model):
     phone = models.CharField(max_length=20)
     email = models.EmailField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # IANA zone for local-time analytics such as the peak-hours heatmap
+    timezone = models.CharField(max_length=64, default=default_timezone, validators=[validate_timezone])
+    latitude = models.FloatField(
+        blank=True, null=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        blank=True, null=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    # Grid cell of (latitude, longitude) for nearby/, see geo.py; blank without them
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LaundromatQuerySet.as_manager()
+
     class Meta:
         db_table = 'laundromats'
         ordering = ['name']
@@ -21,11 +96,33 @@ class Laundromat(models.Model):
             models.Index(fields=['is_active']),
             models.Index(fields=['created_at']),
             models.Index(fields=['updated_at']),
+            models.Index(fields=['geohash']),
         ]
 
     def __str__(self):
         return self.name
 
+    def set_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ''
+        else:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.set_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+        laundromat_cache.invalidate()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            customer_stats.forget_laundromats([self.pk])
+            deleted = super().delete(*args, **kwargs)
+        laundromat_cache.invalidate()
+        return deleted
+
     @property
     def active_receipts_count(self):
         """Count of active receipts (not completed)"""
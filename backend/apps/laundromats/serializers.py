@@ -1,25 +1,68 @@
 from rest_framework import serializers
+from config.sparse_fields import SparseFieldsMixin
+from .cache import laundromat_cache
 from .models import Laundromat
 
 
-class LaundromatSerializer(serializers.ModelSerializer):
-    """Serializer for Laundromat model"""
+class LaundromatSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for Laundromat model; supports ?fields= and ?expand="""
     staff_count = serializers.IntegerField(read_only=True)
     active_receipts_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Laundromat
         fields = (
-            'id', 'name', 'address', 'phone', 'email',
+            'id', 'name', 'address', 'phone', 'email', 'timezone',
+            'latitude', 'longitude',
             'is_active', 'staff_count', 'active_receipts_count',
             'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
+        # Counted with their own queries, so pruning them saves two per row
+        sparse_sources = {'staff_count': (), 'active_receipts_count': ()}
 
+    def validate(self, attrs):
+        latitude = attrs.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = attrs.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError('Set both latitude and longitude, or neither.')
+        return attrs
 
-class LaundromatListSerializer(serializers.ModelSerializer):
+
+class LaundromatListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for listing laundromats"""
 
     class Meta:
         model = Laundromat
         fields = ('id', 'name', 'address', 'phone', 'is_active')
+
+
+class NearbyLaundromatSerializer(serializers.ModelSerializer):
+    """A laundromat found by nearby/, with its distance from the search point"""
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Laundromat
+        fields = ('id', 'name', 'address', 'phone', 'latitude', 'longitude', 'distance_km')
+
+
+class CachedLaundromatSerializer(LaundromatListSerializer):
+    """
+    LaundromatListSerializer for a foreign key, reading the laundromat from
+    the reference-data cache rather than a join
+    """
+
+    def get_attribute(self, instance):
+        return laundromat_cache.get(getattr(instance, f'{self.source}_id'))
+
+
+class CachedLaundromatField(serializers.ReadOnlyField):
+    """One attribute of a foreign-key laundromat, read from the cache"""
+
+    def __init__(self, attribute, **kwargs):
+        self.attribute = attribute
+        kwargs.setdefault('source', 'laundromat_id')
+        super().__init__(**kwargs)
+
+    def to_representation(self, laundromat_id):
+        return getattr(laundromat_cache.get(laundromat_id), self.attribute, None)
@@ -1,13 +1,43 @@
-from rest_framework import viewsets
+import math
+
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from config.fast_serializers import fast_streaming_response
+from config.sparse_fields import SparseFieldsViewMixin
+from . import geo
+from .cache import laundromat_cache
 from .models import Laundromat
-from .serializers import LaundromatSerializer, LaundromatListSerializer
+from .serializers import LaundromatSerializer, LaundromatListSerializer, NearbyLaundromatSerializer
+
+NEARBY_DEFAULT_RADIUS_KM = 10
+NEARBY_MAX_RADIUS_KM = 200
+NEARBY_DEFAULT_LIMIT = 10
+NEARBY_MAX_LIMIT = 50
+
 
+def parse_number(params, name, default=None, cast=float, minimum=None, maximum=None):
+    """A finite number query parameter within bounds; ValueError otherwise"""
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise ValueError(f'{name} is required')
+        return default
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+    if not math.isfinite(number) or not minimum <= number <= maximum:
+        raise ValueError(f'{name} must be between {minimum} and {maximum}')
+    return number
 
-class LaundromatViewSet(viewsets.ModelViewSet):
-    """ViewSet for Laundromat model"""
+
+class LaundromatViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for Laundromat model.
+    list and retrieve accept ?fields= and ?expand=.
+    """
     queryset = Laundromat.objects.all()
     serializer_class = LaundromatSerializer
     permission_classes = [IsAuthenticated]
@@ -15,18 +45,65 @@ class LaundromatViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'address', 'phone']
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action == 'list' and not self.is_sparse_request():
             return LaundromatListSerializer
         return LaundromatSerializer
 
+    def list(self, request, *args, **kwargs):
+        """The default list is the same for everyone, so it is cached per URL"""
+        if self.is_sparse_request():
+            return super().list(request, *args, **kwargs)
+        data = laundromat_cache.payload(
+            request.build_absolute_uri(),
+            lambda: super(LaundromatViewSet, self).list(request, *args, **kwargs).data,
+        )
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Active laundromats closest to ?lat=&lng=, within ?radius= km
+        (default 10) and at most ?limit= of them, with their distance
+        """
+        params = request.query_params
+        try:
+            lat = parse_number(params, 'lat', minimum=-90, maximum=90)
+            lng = parse_number(params, 'lng', minimum=-180, maximum=180)
+            radius = parse_number(
+                params, 'radius', NEARBY_DEFAULT_RADIUS_KM, minimum=0, maximum=NEARBY_MAX_RADIUS_KM
+            )
+            limit = parse_number(
+                params, 'limit', NEARBY_DEFAULT_LIMIT, cast=int, minimum=1, maximum=NEARBY_MAX_LIMIT
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Laundromat.objects.filter(is_active=True).only(
+            *NearbyLaundromatSerializer.Meta.fields[:-1]
+        )
+        laundromats = []
+        for laundromat, distance in geo.nearest(queryset, lat, lng, radius, limit):
+            laundromat.distance_km = round(distance, 3)
+            laundromats.append(laundromat)
+        return Response(NearbyLaundromatSerializer(laundromats, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """Hit counters of this worker's laundromat cache"""
+        user = request.user
+        if not (hasattr(user, 'is_admin_user') and user.is_admin_user):
+            return Response(
+                {'error': 'Only admin users can view cache statistics'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return Response(laundromat_cache.get_stats())
+
     @action(detail=True, methods=['get'])
     def receipts(self, request, pk=None):
         """Get all receipts for a laundromat"""
         laundromat = self.get_object()
         from apps.receipts.serializers import ReceiptListSerializer
-        receipts = laundromat.receipts.all()
-        serializer = ReceiptListSerializer(receipts, many=True)
-        return Response(serializer.data)
+        return fast_streaming_response(self, laundromat.receipts.all(), ReceiptListSerializer)
 
     @action(detail=True, methods=['get'])
     def staff(self, request, pk=None):
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from config.admin_performance import LargeTableAdminMixin
+from .models import Device, OutboxEvent
+
+
+@admin.register(Device)
+class DeviceAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'platform', 'is_active', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('platform', 'is_active')
+    search_fields = ('user__username', 'user__phone', 'token')
+    autocomplete_fields = ('user',)
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """Queued notifications; dispatch_notifications sends them"""
+    list_display = ('receipt_number', 'status', 'user', 'created_at', 'attempts', 'next_attempt_at', 'sent_at', 'failed_at')
+    list_select_related = ('user',)
+    search_fields = ('receipt_number',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
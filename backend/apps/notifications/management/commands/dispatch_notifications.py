@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.notifications.outbox import backlog, dispatch_batch
+from apps.notifications.transports import get_transport
+
+
+class Command(BaseCommand):
+    help = 'Sends queued push notifications through PUSH_TRANSPORT, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.PUSH_DISPATCH_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=None)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running as a worker, polling every --interval seconds once the queue is empty'
+        )
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        transport = get_transport()
+        remaining = options['max_batches']
+        while True:
+            totals = self.drain(transport, options['batch_size'], remaining)
+            self.report(totals)
+            if remaining is not None:
+                remaining -= totals['batches']
+            if not options['loop'] or remaining == 0:
+                break
+            time.sleep(options['interval'])
+
+    def drain(self, transport, batch_size, max_batches):
+        """Dispatch batches until nothing is due; the summed counters"""
+        totals = {'batches': 0}
+        while max_batches is None or totals['batches'] < max_batches:
+            stats = dispatch_batch(transport, batch_size)
+            if not stats['events']:
+                break
+            totals['batches'] += 1
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def report(self, totals):
+        pending, oldest = backlog()
+        if not totals['batches']:
+            self.stdout.write(f'Nothing to send; {pending} pending, oldest {oldest:.0f}s')
+            return
+        seconds = max(totals['seconds'], 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['events']} events ({totals['coalesced']} coalesced) as "
+            f"{totals['messages']} messages in {totals['seconds']:.2f}s: "
+            f"{totals['events'] / seconds:.0f} events/s, {totals['delivered'] / seconds:.0f} messages/s"
+        ))
+        self.stdout.write(
+            f"{totals['failed_messages']} messages failed, {totals['retried']} events to retry, "
+            f"{totals['failed']} given up, {totals['no_device']} without a device, "
+            f"{totals['deactivated_devices']} devices deactivated; "
+            f"{pending} pending, oldest {oldest:.0f}s"
+        )
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Device(models.Model):
+    """A phone or browser registered to receive a user's push notifications"""
+    PLATFORM_CHOICES = (
+        ('android', 'Android'),
+        ('ios', 'iOS'),
+        ('web', 'Web'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='devices'
+    )
+    token = models.CharField(max_length=255, unique=True, help_text='Push token from the provider')
+    platform = models.CharField(max_length=10, choices=PLATFORM_CHOICES)
+    # Cleared when the provider rejects the token
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'notification_devices'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_active'], name='devices_user_active_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.get_platform_display()} device"
+
+
+class OutboxEventQuerySet(models.QuerySet):
+
+    def pending(self):
+        return self.filter(sent_at__isnull=True, failed_at__isnull=True)
+
+
+class OutboxEvent(models.Model):
+    """
+    A notification waiting to be pushed, written in the same transaction as
+    the change it announces. `manage.py dispatch_notifications` sends it.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # Not a foreign key: the receipt may be archived before this is sent
+    receipt_id = models.BigIntegerField()
+    receipt_number = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Set once PUSH_MAX_ATTEMPTS attempts have failed
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    objects = OutboxEventQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'notification_outbox'
+        ordering = ['id']
+        indexes = [
+            # Only the undelivered rows, which the dispatcher reads by due time
+            models.Index(
+                fields=['next_attempt_at'], name='outbox_pending_due_idx',
+                condition=Q(sent_at__isnull=True, failed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.receipt_number} -> {self.status} for {self.user_id}"
@@ -0,0 +1,189 @@
+"""
+Transactional outbox for receipt status notifications.
+
+Status changes never talk to a push provider. Receipt.save() and
+bulk-status call enqueue_status_changes() inside their own transaction,
+which inserts OutboxEvent rows: the notification exists if and only if the
+change committed, and the request pays for one INSERT.
+
+dispatch_batch(), run by `manage.py dispatch_notifications`, drains the
+table:
+
+1. Claims up to `batch_size` due rows by pushing their next_attempt_at
+   CLAIM_SECONDS ahead, so a second dispatcher skips them and a crashed
+   one's rows come due again.
+2. Coalesces them per user: only the latest status of each receipt is
+   kept, and all of a user's receipts go in one message per device.
+3. Sends every message through the transport in one call.
+4. Marks delivered rows sent. Rows whose message failed are retried after
+   an exponential, jittered backoff, and marked failed after
+   PUSH_MAX_ATTEMPTS attempts. Devices whose token was rejected are
+   deactivated.
+
+Delivery is at least once: if one of a user's devices fails, the retry
+goes to all of them.
+"""
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import Device, OutboxEvent
+from .transports import DeliveryError, InvalidDevice
+
+# How long a claimed row is left to its dispatcher before it is due again
+CLAIM_SECONDS = 300
+
+STATUS_PHRASES = {
+    'pending': 'has been received',
+    'washing': 'is being washed',
+    'drying': 'is drying',
+    'ready': 'is ready for pickup',
+    'completed': 'has been picked up',
+    'cancelled': 'has been cancelled',
+}
+
+
+def enqueue_status_changes(changes):
+    """
+    Queue a notification for each (receipt_id, receipt_number, customer_id,
+    status) change. Call inside the transaction that makes the change.
+    """
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(receipt_id=receipt_id, receipt_number=number, user_id=customer_id, status=status)
+        for receipt_id, number, customer_id, status in changes
+    ])
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the `attempts`-th failure: doubling, capped, jittered"""
+    delay = min(settings.PUSH_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.PUSH_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1)
+
+
+def claim_due_events(now, batch_size):
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.pending()
+            .filter(next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS)
+        )
+    return events
+
+
+def build_message(device, events):
+    """One push message telling `device` about `events` (one per receipt)"""
+    receipts = [
+        {'id': event.receipt_id, 'receipt_number': event.receipt_number, 'status': event.status}
+        for event in events
+    ]
+    if len(events) == 1:
+        event = events[0]
+        title = 'Order ready for pickup' if event.status == 'ready' else 'Order update'
+        body = f"Order {event.receipt_number} {STATUS_PHRASES.get(event.status, 'was updated')}."
+    else:
+        title = f'{len(events)} order updates'
+        body = ' '.join(
+            f"{event.receipt_number} {STATUS_PHRASES.get(event.status, 'was updated')}." for event in events
+        )
+    return {
+        'token': device.token,
+        'platform': device.platform,
+        'title': title,
+        'body': body,
+        'data': {'receipts': receipts},
+    }
+
+
+def dispatch_batch(transport, batch_size=None, now=None):
+    """
+    Send one batch of due notifications. Returns counters for the batch;
+    'events' is 0 once nothing is due.
+    """
+    now = now or timezone.now()
+    started = time.perf_counter()
+    events = claim_due_events(now, batch_size or settings.PUSH_DISPATCH_BATCH_SIZE)
+    stats = dict.fromkeys((
+        'events', 'coalesced', 'messages', 'delivered', 'failed_messages',
+        'retried', 'failed', 'no_device', 'deactivated_devices',
+    ), 0)
+    stats['events'] = len(events)
+    if not events:
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    # Latest status per receipt, per user
+    by_user = defaultdict(dict)
+    for event in sorted(events, key=lambda event: (event.created_at, event.pk)):
+        by_user[event.user_id][event.receipt_id] = event
+    stats['coalesced'] = len(events) - sum(len(receipts) for receipts in by_user.values())
+
+    devices = defaultdict(list)
+    for device in Device.objects.filter(user_id__in=by_user, is_active=True).order_by('pk'):
+        devices[device.user_id].append(device)
+
+    messages, recipients = [], []
+    for user_id, receipts in by_user.items():
+        for device in devices[user_id]:
+            messages.append(build_message(device, list(receipts.values())))
+            recipients.append(device)
+    try:
+        errors = transport.send(messages) if messages else []
+    except Exception as e:
+        # A transport bug or outage must not strand the claimed rows
+        errors = [DeliveryError(f'{type(e).__name__}: {e}')] * len(messages)
+    stats['messages'] = len(messages)
+
+    failed_users = {}
+    invalid_devices = []
+    for device, error in zip(recipients, errors):
+        if error is None:
+            stats['delivered'] += 1
+        elif isinstance(error, InvalidDevice):
+            invalid_devices.append(device.pk)
+        else:
+            stats['failed_messages'] += 1
+            failed_users[device.user_id] = str(error)
+
+    sent, retried = [], []
+    for event in events:
+        if event.user_id not in failed_users:
+            if not devices[event.user_id]:
+                stats['no_device'] += 1
+            sent.append(event.pk)
+            continue
+        event.attempts += 1
+        event.last_error = failed_users[event.user_id]
+        if event.attempts >= settings.PUSH_MAX_ATTEMPTS:
+            event.failed_at = now
+            stats['failed'] += 1
+        else:
+            event.next_attempt_at = now + timedelta(seconds=retry_delay(event.attempts))
+            stats['retried'] += 1
+        retried.append(event)
+
+    with transaction.atomic():
+        OutboxEvent.objects.filter(pk__in=sent).update(sent_at=now)
+        OutboxEvent.objects.bulk_update(retried, ['attempts', 'last_error', 'next_attempt_at', 'failed_at'])
+        if invalid_devices:
+            stats['deactivated_devices'] = Device.objects.filter(pk__in=invalid_devices).update(is_active=False)
+
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def backlog(now=None):
+    """(undelivered events, seconds the oldest has waited) for monitoring"""
+    now = now or timezone.now()
+    pending = OutboxEvent.objects.pending().aggregate(count=Count('pk'), oldest=Min('created_at'))
+    age = (now - pending['oldest']).total_seconds() if pending['oldest'] else 0
+    return pending['count'], age
@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import Device
+
+
+class DeviceSerializer(serializers.ModelSerializer):
+    """Serializer for registering a push device"""
+
+    class Meta:
+        model = Device
+        fields = ('id', 'token', 'platform', 'is_active', 'created_at')
+        read_only_fields = ('id', 'is_active', 'created_at')
+        # A token moves to whoever registers it last; see DeviceViewSet.create
+        extra_kwargs = {'token': {'validators': []}}
@@ -0,0 +1,94 @@
+"""
+Ways of handing push messages to a provider.
+
+A transport's send(messages) delivers a list of message dicts
+({'token', 'platform', 'title', 'body', 'data'}) and returns a list of the
+same length holding None for each delivered message, or the DeliveryError
+it failed with. The dispatcher retries DeliveryErrors with backoff and
+deactivates the device on InvalidDevice.
+
+PUSH_TRANSPORT picks the class. The two here are stand-ins for a real
+provider: FileTransport appends each message to a JSON-lines file, for
+development and tests, and HTTPTransport posts batches to a push gateway
+at PUSH_HTTP_URL.
+"""
+import json
+import urllib.request
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class DeliveryError(Exception):
+    """The message was not delivered this time; try again later"""
+
+
+class InvalidDevice(DeliveryError):
+    """The provider no longer accepts the device's token"""
+
+
+def get_transport():
+    return import_string(settings.PUSH_TRANSPORT)()
+
+
+class Transport(ABC):
+    """Base class of transports; one without send() can't be created"""
+
+    @abstractmethod
+    def send(self, messages):
+        """Deliver `messages`; return None or a DeliveryError for each"""
+
+
+class FileTransport(Transport):
+    """Appends messages to PUSH_FILE_PATH, one JSON object per line"""
+
+    def __init__(self, path=None):
+        self.path = path or settings.PUSH_FILE_PATH
+
+    def send(self, messages):
+        sent_at = timezone.now().isoformat()
+        with open(self.path, 'a', encoding='utf-8') as file:
+            for message in messages:
+                file.write(json.dumps({**message, 'sent_at': sent_at}) + '\n')
+        return [None] * len(messages)
+
+
+class HTTPTransport(Transport):
+    """
+    Posts {"messages": [...]} to PUSH_HTTP_URL. The gateway answers
+    {"results": [{"error": null | "invalid_token" | "<reason>"}, ...]} in
+    the same order; a failed or non-2xx request fails the whole batch.
+    """
+
+    def __init__(self, url=None, timeout=None):
+        self.url = url or settings.PUSH_HTTP_URL
+        self.timeout = timeout or settings.PUSH_HTTP_TIMEOUT
+
+    def send(self, messages):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({'messages': messages}).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                results = json.loads(response.read())['results']
+        except (OSError, ValueError, KeyError) as e:
+            # URLError and timeouts are OSErrors, bad JSON a ValueError
+            return [DeliveryError(f'Push gateway request failed: {e}')] * len(messages)
+        if len(results) != len(messages):
+            return [DeliveryError('Push gateway returned the wrong number of results')] * len(messages)
+
+        errors = []
+        for result in results:
+            error = result.get('error')
+            if error is None:
+                errors.append(None)
+            elif error == 'invalid_token':
+                errors.append(InvalidDevice('Push token rejected by the provider'))
+            else:
+                errors.append(DeliveryError(error))
+        return errors
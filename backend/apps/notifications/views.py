@@ -0,0 +1,35 @@
+from rest_framework import mixins, status, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import Device
+from .serializers import DeviceSerializer
+
+
+class DeviceViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
+                    mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    The current user's push devices. Registering a token again (after a
+    reinstall, or from another account) reactivates it for the caller.
+    """
+    serializer_class = DeviceSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return Device.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        device, created = Device.objects.update_or_create(
+            token=serializer.validated_data['token'],
+            defaults={
+                'user': request.user,
+                'platform': serializer.validated_data['platform'],
+                'is_active': True,
+            },
+        )
+        return Response(
+            self.get_serializer(device).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
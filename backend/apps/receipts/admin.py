@@ -1,13 +1,45 @@
 from django.contrib import admin
-from .models import Receipt
+from config.admin_performance import LargeTableAdminMixin
+from .models import ArchivedReceipt, Receipt, ReceiptStatusEvent
+from .numbering import PREFIX, normalize_receipt_number
+
+
+class ReceiptNumberSearchMixin:
+    """Search that finds receipt numbers typed in lower case or with look-alike characters"""
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = ' '.join(
+            normalize_receipt_number(term) if term.upper().startswith(f'{PREFIX}-') else term
+            for term in search_term.split()
+        )
+        return super().get_search_results(request, queryset, search_term)
+
+
+class ReceiptStatusEventInline(admin.TabularInline):
+    """Read-only view of a receipt's status history"""
+    model = ReceiptStatusEvent
+    fields = ('status', 'staff', 'created_at')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('staff')
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Receipt)
-class ReceiptAdmin(admin.ModelAdmin):
+class ReceiptAdmin(ReceiptNumberSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('receipt_number', 'customer', 'laundromat', 'status', 'price', 'drop_off_date', 'expected_pickup_date')
+    list_select_related = ('customer', 'laundromat')
+    # Each filter has an index leading with its column
     list_filter = ('status', 'laundromat', 'drop_off_date')
     search_fields = ('receipt_number', 'customer__username', 'customer__phone')
+    autocomplete_fields = ('customer', 'staff')
     readonly_fields = ('receipt_number', 'qr_code', 'created_at', 'updated_at', 'drop_off_date')
+    inlines = [ReceiptStatusEventInline]
 
     fieldsets = (
         ('Receipt Information', {
@@ -28,3 +60,22 @@ class ReceiptAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def get_queryset(self, request):
+        # Also for the video form's autocomplete, as str(receipt) reads the
+        # customer. The changelist skips list_select_related once this is set.
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
+
+@admin.register(ArchivedReceipt)
+class ArchivedReceiptAdmin(ReceiptNumberSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('receipt_number', 'customer', 'laundromat', 'status', 'price', 'created_at', 'archived_at')
+    list_select_related = ('customer', 'laundromat')
+    list_filter = ('status', 'laundromat')
+    search_fields = ('receipt_number', 'customer__username', 'customer__phone')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
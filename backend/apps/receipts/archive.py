@@ -0,0 +1,90 @@
+"""
+Hot/cold storage for receipts.
+
+Completed and cancelled receipts that have not changed for
+RECEIPT_ARCHIVE_AFTER_DAYS are moved, with their videos, from receipts and
+videos into archived_receipts and archived_videos. Ids are kept, so URLs and
+status events still point at the right order. Operational queries only read
+the hot tables; retrieve, customer history and analytics fall through to
+the archive (see ReceiptViewSet and AnalyticsViewSet).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.videos.models import ArchivedVideo, Video
+from .models import ArchivedReceipt, Receipt, ReceiptRecord
+
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+RECEIPT_FIELDS = [
+    field.attname for field in ArchivedReceipt._meta.concrete_fields
+    if field.name != 'archived_at'
+]
+VIDEO_FIELDS = [field.attname for field in ArchivedVideo._meta.concrete_fields]
+
+
+def archive_cutoff(now=None):
+    """Receipts closed before this moment belong in the archive"""
+    now = now or timezone.now()
+    return now - timedelta(days=getattr(settings, 'RECEIPT_ARCHIVE_AFTER_DAYS', 180))
+
+
+def archivable_receipts(cutoff):
+    return Receipt.objects.filter(status__in=CLOSED_STATUSES, updated_at__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Move up to `batch_size` archivable receipts and their videos in one
+    transaction. Return (receipts moved, videos moved).
+    """
+    with transaction.atomic():
+        ids = list(
+            archivable_receipts(cutoff).order_by('pk').select_for_update()
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, 0
+
+        now = timezone.now()
+        receipts = [
+            ArchivedReceipt(archived_at=now, **row)
+            for row in Receipt.objects.filter(pk__in=ids).values(*RECEIPT_FIELDS)
+        ]
+        videos = [
+            ArchivedVideo(**row)
+            for row in Video.objects.filter(receipt_id__in=ids).values(*VIDEO_FIELDS)
+        ]
+        ArchivedReceipt.objects.bulk_create(receipts)
+        ArchivedVideo.objects.bulk_create(videos)
+
+        Video.objects.filter(receipt_id__in=ids).delete()
+        Receipt.objects.filter(pk__in=ids).delete()
+    return len(receipts), len(videos)
+
+
+def archive_closed_receipts(cutoff=None, batch_size=500, max_batches=None):
+    """Archive in batches until nothing is left; return the totals moved"""
+    cutoff = cutoff or archive_cutoff()
+    total_receipts = total_videos = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved, videos = archive_batch(cutoff, batch_size)
+        if not moved:
+            break
+        total_receipts += moved
+        total_videos += videos
+        batches += 1
+    return total_receipts, total_videos
+
+
+def receipts_for_range(start):
+    """
+    Queryset to read receipts created since `start` from. Ranges that reach
+    past the archive cutoff read the hot and archived tables together.
+    """
+    if start < archive_cutoff():
+        return ReceiptRecord.objects.all()
+    return Receipt.objects.all()
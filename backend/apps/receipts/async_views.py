@@ -0,0 +1,73 @@
+"""
+Async versions of the hottest receipt read endpoints, served under ASGI.
+See config/async_api.py and config/urls_asgi.py.
+"""
+from django.http import Http404
+
+from apps.laundromats.cache import laundromat_cache
+from config.async_api import (
+    async_api_view,
+    filter_queryset,
+    get_object_or_404,
+    get_viewset,
+    json_response,
+    paginate_queryset,
+)
+from .serializers import ArchivedReceiptSerializer, ReceiptListSerializer, ReceiptSerializer
+from .views import ReceiptViewSet
+
+
+def laundromat_ids(receipts):
+    """
+    The laundromats to warm the cache for. ?fields= without the laundromat
+    defers its column, and loading it here would be a query on the event
+    loop; those receipts don't need the cache anyway.
+    """
+    return {
+        receipt.__dict__['laundromat_id'] for receipt in receipts
+        if 'laundromat_id' in receipt.__dict__
+    }
+
+
+async def paginated_list(view, queryset, serializer_class=ReceiptListSerializer):
+    """Serialize one page of receipts, or all of them without pagination."""
+    page = await paginate_queryset(view.paginator, queryset, view.request)
+    context = view.get_serializer_context()
+    if page is not None:
+        await laundromat_cache.awarm(laundromat_ids(page))
+        serializer = serializer_class(page, many=True, context=context)
+        return json_response(view.paginator.get_paginated_response(serializer.data).data)
+    receipts = [receipt async for receipt in queryset]
+    await laundromat_cache.awarm(laundromat_ids(receipts))
+    return json_response(serializer_class(receipts, many=True, context=context).data)
+
+
+@async_api_view
+async def receipt_list(request):
+    """GET /api/receipts/"""
+    view = get_viewset(ReceiptViewSet, request, 'list')
+    queryset = await filter_queryset(view, view.get_queryset())
+    return await paginated_list(view, queryset, view.get_serializer_class())
+
+
+@async_api_view
+async def receipt_detail(request, pk):
+    """GET /api/receipts/{id}/"""
+    view = get_viewset(ReceiptViewSet, request, 'retrieve', pk=pk)
+    queryset = await filter_queryset(view, view.get_queryset())
+    serializer_class = ReceiptSerializer
+    try:
+        receipt = await get_object_or_404(queryset, pk=pk)
+    except Http404:
+        receipt = await get_object_or_404(view.get_archived_queryset(), pk=pk)
+        serializer_class = ArchivedReceiptSerializer
+    await laundromat_cache.awarm(laundromat_ids([receipt]))
+    return json_response(serializer_class(receipt, context=view.get_serializer_context()).data)
+
+
+@async_api_view
+async def receipt_active(request):
+    """GET /api/receipts/active/"""
+    view = get_viewset(ReceiptViewSet, request, 'active')
+    queryset = view.get_queryset().exclude(status__in=['completed', 'cancelled'])
+    return await paginated_list(view, queryset)
@@ -0,0 +1,40 @@
+"""
+Filter backends that read receipt numbers the way people type them.
+
+Numbers are upper-cased and look-alike characters fixed (see numbering.py)
+before they reach the database, so ``lv-o1z-0004k7`` finds ``LV-01Z-0004K7``.
+A whole number whose check character is wrong gets a 400 rather than an
+empty result, so a mistyped number is not mistaken for a missing receipt.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from .numbering import PREFIX, clean_receipt_number
+
+
+def clean(value, param):
+    try:
+        return clean_receipt_number(value)
+    except ValueError as exc:
+        raise ValidationError({param: [str(exc)]})
+
+
+class ReceiptNumberFilter(BaseFilterBackend):
+    """?receipt_number= finds one receipt by its exact number"""
+    param = 'receipt_number'
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.param, '').strip()
+        if not value:
+            return queryset
+        return queryset.filter(receipt_number=clean(value, self.param))
+
+
+class ReceiptSearchFilter(SearchFilter):
+    """SearchFilter whose terms that start like a receipt number are cleaned first"""
+
+    def get_search_terms(self, request):
+        return [
+            clean(term, self.search_param) if term.upper().startswith(f'{PREFIX}-') else term
+            for term in super().get_search_terms(request)
+        ]
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.receipts.archive import archivable_receipts, archive_closed_receipts
+
+
+class Command(BaseCommand):
+    help = 'Moves receipts closed for more than RECEIPT_ARCHIVE_AFTER_DAYS, and their videos, to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.RECEIPT_ARCHIVE_AFTER_DAYS,
+            help='Archive receipts completed or cancelled more than this many days ago'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None)
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would move')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            count = archivable_receipts(cutoff).count()
+            self.stdout.write(f'{count} receipts closed before {cutoff:%Y-%m-%d} would be archived')
+            return
+
+        receipts, videos = archive_closed_receipts(
+            cutoff, batch_size=options['batch_size'], max_batches=options['max_batches']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {receipts} receipts and {videos} videos closed before {cutoff:%Y-%m-%d}'
+        ))
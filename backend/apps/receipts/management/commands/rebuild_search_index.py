@@ -0,0 +1,34 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.receipts import search
+from apps.receipts.models import Receipt
+
+
+class Command(BaseCommand):
+    help = 'Reindexes the items descriptions and special instructions of every receipt for ?q= searches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=min(4, os.cpu_count() or 1),
+            help='Processes tokenizing batches; 1 does everything in this process'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--laundromat', type=int, help='Only reindex this laundromat\'s receipts')
+
+    def handle(self, *args, **options):
+        receipts = Receipt.objects.all()
+        if options['laundromat']:
+            receipts = receipts.filter(laundromat_id=options['laundromat'])
+
+        started = time.perf_counter()
+        indexed, terms = search.rebuild(
+            receipts, workers=options['workers'], batch_size=options['batch_size']
+        )
+        seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} receipts ({terms} terms) in {seconds:.1f}s '
+            f'with {options["workers"]} workers'
+        ))
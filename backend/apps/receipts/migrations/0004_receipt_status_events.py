@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_current_status(apps, schema_editor):
+    """
+    Earlier status changes were never recorded, so start each receipt's log
+    with its current status, timed at its last update.
+    """
+    Receipt = apps.get_model('receipts', 'Receipt')
+    ReceiptStatusEvent = apps.get_model('receipts', 'ReceiptStatusEvent')
+    rows = Receipt.objects.values_list('id', 'laundromat_id', 'staff_id', 'status', 'updated_at')
+    batch = []
+    for receipt_id, laundromat_id, staff_id, status, updated_at in rows.iterator(chunk_size=2000):
+        batch.append(ReceiptStatusEvent(
+            receipt_id=receipt_id, laundromat_id=laundromat_id, staff_id=staff_id,
+            status=status, created_at=updated_at,
+        ))
+        if len(batch) >= 2000:
+            ReceiptStatusEvent.objects.bulk_create(batch)
+            batch = []
+    ReceiptStatusEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundromats', '0002_laundromat_laundromats_name_b17e6e_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('receipts', '0003_add_analytics_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('washing', 'Washing'), ('drying', 'Drying'), ('ready', 'Ready for Pickup'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('laundromat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='laundromats.laundromat')),
+                ('receipt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='receipts.receipt')),
+                ('staff', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'receipt_status_events',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['laundromat', 'created_at'], name='status_events_laundromat_idx'), models.Index(fields=['receipt', 'created_at'], name='status_events_receipt_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_current_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundromats', '0002_laundromat_laundromats_name_b17e6e_idx_and_more'),
+        ('receipts', '0004_receipt_status_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptNumberSequence',
+            fields=[
+                ('laundromat', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='laundromats.laundromat')),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'receipt_number_sequences',
+            },
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='receipt_number',
+            field=models.CharField(blank=True, max_length=20, unique=True),
+        ),
+    ]
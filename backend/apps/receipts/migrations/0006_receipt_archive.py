@@ -0,0 +1,87 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+RECEIPT_COLUMNS = (
+    'id, receipt_number, laundromat_id, customer_id, staff_id, status, '
+    'drop_off_date, expected_pickup_date, actual_pickup_date, items_description, '
+    'items_count, special_instructions, price, created_at, updated_at'
+)
+
+CREATE_VIEW = f"""
+CREATE VIEW receipts_with_archive AS
+SELECT {RECEIPT_COLUMNS}, FALSE AS is_archived FROM receipts
+UNION ALL
+SELECT {RECEIPT_COLUMNS}, TRUE AS is_archived FROM archived_receipts
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundromats', '0002_laundromat_laundromats_name_b17e6e_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('receipts', '0005_receipt_number_blocks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptRecord',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('receipt_number', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('washing', 'Washing'), ('drying', 'Drying'), ('ready', 'Ready for Pickup'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('drop_off_date', models.DateTimeField()),
+                ('expected_pickup_date', models.DateTimeField()),
+                ('actual_pickup_date', models.DateTimeField(null=True)),
+                ('items_description', models.TextField()),
+                ('items_count', models.IntegerField()),
+                ('special_instructions', models.TextField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('is_archived', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'receipts_with_archive',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.AlterField(
+            model_name='receiptstatusevent',
+            name='receipt',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='status_events', to='receipts.receipt'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedReceipt',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('receipt_number', models.CharField(max_length=20, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('washing', 'Washing'), ('drying', 'Drying'), ('ready', 'Ready for Pickup'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('drop_off_date', models.DateTimeField()),
+                ('expected_pickup_date', models.DateTimeField()),
+                ('actual_pickup_date', models.DateTimeField(blank=True, null=True)),
+                ('items_description', models.TextField()),
+                ('items_count', models.IntegerField(default=0)),
+                ('special_instructions', models.TextField(blank=True)),
+                ('price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('qr_code', models.ImageField(blank=True, upload_to='qr_codes/')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_customer_receipts', to=settings.AUTH_USER_MODEL)),
+                ('laundromat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_receipts', to='laundromats.laundromat')),
+                ('staff', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'archived_receipts',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['customer', 'created_at'], name='archived_customer_date_idx'), models.Index(fields=['laundromat', 'created_at'], name='archived_laundromat_date_idx')],
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW, 'DROP VIEW receipts_with_archive'),
+    ]
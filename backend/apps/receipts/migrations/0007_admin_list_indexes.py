@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0006_receipt_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedreceipt',
+            index=models.Index(fields=['created_at'], name='archived_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedreceipt',
+            index=models.Index(fields=['status', 'created_at'], name='archived_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['status', 'created_at'], name='receipts_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):
+    from apps.receipts.search import rebuild
+
+    rebuild(
+        apps.get_model('receipts', 'Receipt').objects.all(),
+        model=apps.get_model('receipts', 'ReceiptSearchTerm'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundromats', '0004_laundromat_coordinates'),
+        ('receipts', '0007_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=32)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('laundromat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='laundromats.laundromat')),
+                ('receipt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='receipts.receipt')),
+            ],
+            options={
+                'db_table': 'receipt_search_terms',
+                'indexes': [models.Index(fields=['laundromat', 'term', 'receipt', 'weight'], name='search_terms_laundromat_idx'), models.Index(fields=['term', 'receipt', 'weight'], name='search_terms_term_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='receiptsearchterm',
+            constraint=models.UniqueConstraint(fields=('receipt', 'term'), name='unique_receipt_search_term'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
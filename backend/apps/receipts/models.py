@@ -1,16 +1,56 @@
-from django.db import models
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.crypto import get_random_string
-import qrcode
 from io import BytesIO
 from django.core.files import File
-from PIL import Image
+
+from apps.analytics import customer_stats, hourly_stats, sketches
+from apps.notifications import outbox
+from . import search
+from .numbering import allocate_receipt_number, allocate_receipt_numbers
 
 
 def generate_receipt_number():
-    """Generate unique receipt number"""
+    """
+    Random receipt number used before numbers were allocated in blocks.
+    Kept because migration 0001 refers to it; see numbering.py.
+    """
     return f"LV-{get_random_string(8, allowed_chars='0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')}"
 
 
+def track_receipt_changes(changes):
+    """
+    Update the analytics tables kept alongside receipts for (before, after)
+    snapshots from customer_stats.snapshot(). Call inside the write's
+    transaction.
+    """
+    customer_stats.apply_receipt_changes(changes)
+    sketches.record_receipt_changes(changes)
+    hourly_stats.apply_receipt_changes(changes)
+
+
+class ReceiptManager(models.Manager):
+    """Manager that numbers and counts receipts created in bulk"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        unnumbered = defaultdict(list)
+        for obj in objs:
+            if not obj.receipt_number:
+                unnumbered[obj.laundromat_id].append(obj)
+        for laundromat_id, receipts in unnumbered.items():
+            numbers = allocate_receipt_numbers(laundromat_id, len(receipts))
+            for receipt, number in zip(receipts, numbers):
+                receipt.receipt_number = number
+        with transaction.atomic():
+            created = super().bulk_create(objs, *args, **kwargs)
+            track_receipt_changes([(None, customer_stats.snapshot(receipt)) for receipt in created])
+            search.index_receipts(created)
+        return created
+
+
 class Receipt(models.Model):
     """
     Receipt/Order model for laundry items
@@ -24,7 +64,18 @@ class Receipt(models.Model):
         ('cancelled', 'Cancelled'),
     )
 
-    receipt_number = models.CharField(max_length=20, unique=True, default=generate_receipt_number)
+    # Allowed status changes: each stage moves to the next one, and any
+    # active receipt can be cancelled. Completed and cancelled are final.
+    STATUS_TRANSITIONS = {
+        'pending': ('washing', 'cancelled'),
+        'washing': ('drying', 'cancelled'),
+        'drying': ('ready', 'cancelled'),
+        'ready': ('completed', 'cancelled'),
+        'completed': (),
+        'cancelled': (),
+    }
+
+    receipt_number = models.CharField(max_length=20, unique=True, blank=True)
     laundromat = models.ForeignKey(
         'laundromats.Laundromat',
         on_delete=models.CASCADE,
@@ -59,6 +110,8 @@ class Receipt(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ReceiptManager()
+
     class Meta:
         db_table = 'receipts'
         ordering = ['-created_at']
@@ -67,14 +120,45 @@ class Receipt(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['customer']),
             models.Index(fields=['laundromat']),
+            models.Index(fields=['created_at'], name='receipts_created_at_idx'),
+            models.Index(fields=['drop_off_date'], name='receipts_drop_off_idx'),
+            models.Index(fields=['actual_pickup_date'], name='receipts_pickup_idx'),
+            models.Index(fields=['laundromat', 'created_at'], name='receipts_laundromat_date_idx'),
+            models.Index(fields=['laundromat', 'status'], name='receipts_laundromat_status_idx'),
+            models.Index(fields=['status', 'created_at'], name='receipts_status_date_idx'),
+            models.Index(fields=['staff', 'created_at'], name='receipts_staff_date_idx'),
         ]
 
     def __str__(self):
         return f"{self.receipt_number} - {self.customer.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so save() can tell what changed
+        instance._saved_status = instance.__dict__.get('status')
+        if all(field in instance.__dict__ for field in customer_stats.TRACKED_FIELDS):
+            instance._saved_stats = customer_stats.snapshot(instance)
+        if all(field in instance.__dict__ for field in ('laundromat_id', *search.INDEXED_FIELDS)):
+            instance._saved_document = search.document(instance)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or 'status' in fields:
+            self._saved_status = self.status
+        self._saved_stats = customer_stats.snapshot(self) if fields is None else None
+        self._saved_document = search.document(self) if fields is None else None
+
     def save(self, *args, **kwargs):
+        if not self.receipt_number:
+            self.receipt_number = allocate_receipt_number(self.laundromat_id)
+
         # Generate QR code if not exists
         if not self.qr_code:
+            # Imported here so workers that never create a receipt skip
+            # qrcode and Pillow at startup
+            import qrcode
             qr_img = qrcode.make(self.receipt_number)
             buffer = BytesIO()
             qr_img.save(buffer, format='PNG')
@@ -82,7 +166,64 @@ class Receipt(models.Model):
             self.qr_code.save(file_name, File(buffer), save=False)
             buffer.close()
 
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        status_changed = (
+            self._state.adding or self.status != getattr(self, '_saved_status', None)
+        ) and (update_fields is None or 'status' in update_fields)
+
+        document = search.document(self)
+        reindex = document != getattr(self, '_saved_document', None) and (
+            update_fields is None
+            or not {'laundromat', 'laundromat_id', *search.INDEXED_FIELDS}.isdisjoint(update_fields)
+        )
+
+        adding = self._state.adding
+        with transaction.atomic():
+            before = None
+            if not adding:
+                before = getattr(self, '_saved_stats', None) or Receipt.objects.filter(
+                    pk=self.pk
+                ).values_list(*customer_stats.TRACKED_FIELDS).first()
+            super().save(*args, **kwargs)
+            after = customer_stats.snapshot(self, update_fields, before)
+            track_receipt_changes([(before, after)])
+            if reindex:
+                search.index_receipts([self])
+            if status_changed:
+                event = ReceiptStatusEvent.objects.create(
+                    receipt=self,
+                    laundromat_id=self.laundromat_id,
+                    staff_id=self.staff_id,
+                    status=self.status,
+                )
+                hourly_stats.record_status_events([event])
+                if not adding:
+                    # Sent later by dispatch_notifications, only if this commits
+                    outbox.enqueue_status_changes(
+                        [(self.pk, self.receipt_number, self.customer_id, self.status)]
+                    )
+        self._saved_status = self.status
+        self._saved_stats = after
+        if reindex:
+            self._saved_document = document
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            before = getattr(self, '_saved_stats', None) or customer_stats.snapshot(self)
+            track_receipt_changes([(before, None)])
+            return super().delete(*args, **kwargs)
+
+    @classmethod
+    def statuses_leading_to(cls, status):
+        """Statuses from which a receipt may move to `status`"""
+        return [
+            source for source, targets in cls.STATUS_TRANSITIONS.items()
+            if status in targets
+        ]
+
+    def can_transition_to(self, status):
+        """Check if the receipt may move from its current status to `status`"""
+        return status in self.STATUS_TRANSITIONS.get(self.status, ())
 
     @property
     def is_active(self):
@@ -95,3 +236,213 @@ class Receipt(models.Model):
         from django.utils import timezone
         delta = timezone.now() - self.drop_off_date
         return delta.days
+
+
+class ReceiptStatusEvent(models.Model):
+    """
+    Append-only log of receipt status changes.
+
+    One row is written, in the same transaction, whenever a receipt enters a
+    status. The time spent in a stage is the gap to the receipt's next event.
+    Laundromat and staff are copied from the receipt so stage analytics never
+    join back to receipts.
+    """
+    # Events outlive archival, so the receipt may have moved to
+    # archived_receipts (with the same id).
+    receipt = models.ForeignKey(
+        Receipt,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='status_events'
+    )
+    laundromat = models.ForeignKey(
+        'laundromats.Laundromat',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    staff = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    status = models.CharField(max_length=20, choices=Receipt.STATUS_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'receipt_status_events'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['laundromat', 'created_at'], name='status_events_laundromat_idx'),
+            models.Index(fields=['receipt', 'created_at'], name='status_events_receipt_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.receipt_id} -> {self.status} at {self.created_at}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Receipt status events are append-only.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Receipt status events are append-only.')
+
+
+class ArchivedReceipt(models.Model):
+    """
+    A completed or cancelled receipt moved out of the receipts table by
+    `manage.py archive_receipts`. Keeps the receipt's id, so links and
+    status events still resolve.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    receipt_number = models.CharField(max_length=20, unique=True)
+    laundromat = models.ForeignKey(
+        'laundromats.Laundromat',
+        on_delete=models.CASCADE,
+        related_name='archived_receipts'
+    )
+    customer = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='archived_customer_receipts'
+    )
+    staff = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+
+    status = models.CharField(max_length=20, choices=Receipt.STATUS_CHOICES)
+
+    drop_off_date = models.DateTimeField()
+    expected_pickup_date = models.DateTimeField()
+    actual_pickup_date = models.DateTimeField(null=True, blank=True)
+
+    items_description = models.TextField()
+    items_count = models.IntegerField(default=0)
+    special_instructions = models.TextField(blank=True)
+
+    price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    qr_code = models.ImageField(upload_to='qr_codes/', blank=True)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'archived_receipts'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['customer', 'created_at'], name='archived_customer_date_idx'),
+            models.Index(fields=['laundromat', 'created_at'], name='archived_laundromat_date_idx'),
+            # Admin changelist: newest first, optionally by status
+            models.Index(fields=['created_at'], name='archived_created_at_idx'),
+            models.Index(fields=['status', 'created_at'], name='archived_status_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.receipt_number} (archived)"
+
+    @property
+    def is_active(self):
+        return False
+
+    @property
+    def days_since_dropoff(self):
+        return (timezone.now() - self.drop_off_date).days
+
+
+class ReceiptRecord(models.Model):
+    """
+    Read-only view over receipts and archived_receipts together, for reports
+    that reach further back than the archive horizon.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    receipt_number = models.CharField(max_length=20)
+    laundromat = models.ForeignKey(
+        'laundromats.Laundromat',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    customer = models.ForeignKey(
+        'users.User',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    staff = models.ForeignKey(
+        'users.User',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+'
+    )
+    status = models.CharField(max_length=20, choices=Receipt.STATUS_CHOICES)
+    drop_off_date = models.DateTimeField()
+    expected_pickup_date = models.DateTimeField()
+    actual_pickup_date = models.DateTimeField(null=True)
+    items_description = models.TextField()
+    items_count = models.IntegerField()
+    special_instructions = models.TextField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    is_archived = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = 'receipts_with_archive'
+        ordering = ['-created_at']
+
+
+class ReceiptNumberSequence(models.Model):
+    """Next unreserved receipt sequence number for a laundromat"""
+    laundromat = models.OneToOneField(
+        'laundromats.Laundromat',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+'
+    )
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        db_table = 'receipt_number_sequences'
+
+    def __str__(self):
+        return f"{self.laundromat_id}: {self.next_value}"
+
+
+class ReceiptSearchTerm(models.Model):
+    """
+    One term of a receipt's items description and special instructions,
+    with how often it occurs. Maintained by search.py.
+    """
+    receipt = models.ForeignKey(Receipt, on_delete=models.CASCADE, related_name='+')
+    # Copied from the receipt so a laundromat's searches read only its rows
+    laundromat = models.ForeignKey(
+        'laundromats.Laundromat',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    term = models.CharField(max_length=32)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        db_table = 'receipt_search_terms'
+        constraints = [
+            models.UniqueConstraint(fields=['receipt', 'term'], name='unique_receipt_search_term'),
+        ]
+        # Covering, so a search reads only the index
+        indexes = [
+            models.Index(
+                fields=['laundromat', 'term', 'receipt', 'weight'], name='search_terms_laundromat_idx'
+            ),
+            models.Index(fields=['term', 'receipt', 'weight'], name='search_terms_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.receipt_id}: {self.term}"
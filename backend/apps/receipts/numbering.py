@@ -0,0 +1,172 @@
+"""
+Receipt number allocation.
+
+Receipt numbers look like ``LV-01Z-0004K7``: the laundromat id and a
+per-laundromat sequence number, both in Crockford base 32 (digits and
+capitals without I, L, O, U), followed by one check character. They are
+short enough to read out over the phone, and a mistyped character or a
+swapped pair of neighbours fails the check.
+
+Each worker thread reserves a block of RECEIPT_NUMBER_BLOCK_SIZE sequence
+numbers per laundromat in one short transaction and then hands them out
+from memory. Blocks never overlap, so numbers are unique without retries,
+and each laundromat's numbers grow steadily, which keeps inserts into the
+unique index mostly sequential. Numbers left in a block when a worker
+exits are skipped.
+"""
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+BASE = len(ALPHABET)
+
+PREFIX = 'LV'
+LAUNDROMAT_WIDTH = 3
+SEQUENCE_WIDTH = 5
+
+# Characters commonly typed in place of the Crockford ones
+TYPO_MAP = str.maketrans({'O': '0', 'I': '1', 'L': '1'})
+
+_local = threading.local()
+
+
+def encode(value, width):
+    """Write a non-negative integer in base 32, zero-padded to `width`"""
+    chars = []
+    while value:
+        value, digit = divmod(value, BASE)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars)).rjust(width, '0')
+
+
+def check_character(payload):
+    """Luhn mod 32 check character for a base-32 string"""
+    total = 0
+    factor = 2
+    for char in reversed(payload):
+        addend = factor * ALPHABET.index(char)
+        total += addend // BASE + addend % BASE
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[(BASE - total % BASE) % BASE]
+
+
+def format_receipt_number(laundromat_id, sequence):
+    laundromat_part = encode(laundromat_id, LAUNDROMAT_WIDTH)
+    sequence_part = encode(sequence, SEQUENCE_WIDTH)
+    check = check_character(laundromat_part + sequence_part)
+    return f'{PREFIX}-{laundromat_part}-{sequence_part}{check}'
+
+
+def normalize_receipt_number(value):
+    """Upper-case a typed receipt number and fix look-alike characters"""
+    value = value.strip().upper()
+    # Random numbers from before blocks (LV-XXXXXXXX) use O, I and L
+    if not value.startswith(f'{PREFIX}-') or value.count('-') != 2:
+        return value
+    return f'{PREFIX}-' + value[len(PREFIX) + 1:].translate(TYPO_MAP)
+
+
+def is_complete_receipt_number(value):
+    """Whether a normalized value is as long as an allocated number, check character included"""
+    parts = value.split('-')
+    return (
+        len(parts) == 3 and parts[0] == PREFIX
+        and len(parts[1]) >= LAUNDROMAT_WIDTH and len(parts[2]) > SEQUENCE_WIDTH
+    )
+
+
+def clean_receipt_number(value):
+    """
+    Normalize a typed receipt number, or the start of one, for a lookup.
+    Raise ValueError for a whole number whose check character is wrong,
+    which no receipt can have.
+    """
+    value = normalize_receipt_number(value)
+    if is_complete_receipt_number(value) and not is_valid_receipt_number(value):
+        raise ValueError(f'{value} is not a valid receipt number; check for a mistyped character')
+    return value
+
+
+def is_valid_receipt_number(value):
+    """Check the format and check character of an allocated receipt number"""
+    parts = normalize_receipt_number(value).split('-')
+    if len(parts) != 3 or parts[0] != PREFIX or len(parts[2]) < 2:
+        return False
+    payload = parts[1] + parts[2][:-1]
+    if not payload or any(char not in ALPHABET for char in parts[1] + parts[2]):
+        return False
+    return check_character(payload) == parts[2][-1]
+
+
+class Block:
+    """A reserved range [next, end) of sequence numbers"""
+    __slots__ = ('next', 'end', 'committed')
+
+    def __init__(self, start, end, committed):
+        self.next = start
+        self.end = end
+        self.committed = committed
+
+    def confirm(self):
+        self.committed = True
+
+    def is_usable(self):
+        if self.next >= self.end:
+            return False
+        if self.committed:
+            return True
+        # Reserved inside a transaction that has not committed yet: the
+        # block is only safe while its on_commit hook is still pending. A
+        # rollback discards the hook, and with it the reservation.
+        return any(entry[1] == self.confirm for entry in connection.run_on_commit)
+
+
+def reserve_block(laundromat_id, size):
+    """Reserve `size` sequence numbers for a laundromat; return a Block"""
+    from .models import ReceiptNumberSequence
+
+    with transaction.atomic():
+        sequence, _ = ReceiptNumberSequence.objects.select_for_update().get_or_create(
+            laundromat_id=laundromat_id
+        )
+        start = sequence.next_value
+        ReceiptNumberSequence.objects.filter(pk=sequence.pk).update(
+            next_value=F('next_value') + size
+        )
+
+    block = Block(start, start + size, committed=not connection.in_atomic_block)
+    if not block.committed:
+        transaction.on_commit(block.confirm)
+    return block
+
+
+def allocate_receipt_numbers(laundromat_id, count=1):
+    """Return `count` new receipt numbers for a laundromat"""
+    blocks = getattr(_local, 'blocks', None)
+    if blocks is None:
+        blocks = _local.blocks = {}
+    block_size = getattr(settings, 'RECEIPT_NUMBER_BLOCK_SIZE', 50)
+
+    numbers = []
+    while len(numbers) < count:
+        block = blocks.get(laundromat_id)
+        if block is None or not block.is_usable():
+            block = blocks[laundromat_id] = reserve_block(
+                laundromat_id, max(block_size, count - len(numbers))
+            )
+        while block.next < block.end and len(numbers) < count:
+            numbers.append(format_receipt_number(laundromat_id, block.next))
+            block.next += 1
+    return numbers
+
+
+def allocate_receipt_number(laundromat_id):
+    return allocate_receipt_numbers(laundromat_id)[0]
+
+
+def clear_cache():
+    """Forget this thread's reserved blocks"""
+    _local.blocks = {}
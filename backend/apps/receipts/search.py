@@ -0,0 +1,246 @@
+"""
+Full-text search over receipt items and special instructions.
+
+`items_description` and `special_instructions` are split into terms
+(tokenize) and kept in receipt_search_terms, one row per receipt and term
+with how often the term occurs. Receipt.save and bulk_create rewrite a
+receipt's rows in the same transaction when its text or laundromat
+changes; deleting or archiving a receipt deletes them with it, so only
+live receipts are found. Each row carries the laundromat, so a staff
+member's search reads only their laundromat's part of the index.
+
+GET /api/receipts/?q=red wool coat ranks the receipts holding any of the
+terms: those matching more terms first, then by BM25 score (rarer terms
+weigh more, repeats count less and less), keeping the list's other filters.
+`manage.py rebuild_search_index` reindexes every receipt.
+"""
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import IntegerField
+from django.db.models.expressions import RawSQL
+
+INDEXED_FIELDS = ('items_description', 'special_instructions')
+
+WORD_RE = re.compile(r'\w+')
+MIN_TERM_LENGTH = 2
+# Longer words are cut to fit the term column
+MAX_TERM_LENGTH = 32
+# Terms of a query beyond this are ignored
+MAX_QUERY_TERMS = 10
+
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'do', 'for', 'from', 'in', 'is', 'it',
+    'no', 'not', 'of', 'on', 'or', 'our', 'please', 'the', 'to', 'with', 'x',
+))
+
+# BM25 term-frequency saturation
+K1 = 1.2
+
+# Ranked matches checked against the list's filters per query
+CHECK_BATCH_SIZE = 500
+
+
+def fold_plural(word):
+    """Reduce common English plurals, so 'coats' finds 'coat' and back"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('sses', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """The search terms in `text`, in order, repeats included"""
+    if not text:
+        return []
+    # Case and accents are ignored: 'Café' and 'cafe' are one term
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    terms = []
+    for word in WORD_RE.findall(text):
+        if len(word) < MIN_TERM_LENGTH or word in STOP_WORDS:
+            continue
+        terms.append(fold_plural(word)[:MAX_TERM_LENGTH])
+    return terms
+
+
+def query_terms(query):
+    """Distinct terms of a search query, in the order given"""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def document(receipt):
+    """What a receipt's index rows are built from"""
+    return (receipt.laundromat_id, receipt.items_description, receipt.special_instructions)
+
+
+def postings_for(rows):
+    """
+    (receipt_id, laundromat_id, term, count) for (receipt_id, laundromat_id,
+    description, instructions) rows. Plain data in and out, so the rebuild
+    can run it in worker processes.
+    """
+    postings = []
+    for receipt_id, laundromat_id, description, instructions in rows:
+        counts = Counter(tokenize(description))
+        counts.update(tokenize(instructions))
+        postings += [(receipt_id, laundromat_id, term, count) for term, count in counts.items()]
+    return postings
+
+
+def write_postings(receipt_ids, postings, model=None):
+    """Replace the index rows of `receipt_ids` with `postings`"""
+    if model is None:
+        from .models import ReceiptSearchTerm as model
+    using = router.db_for_write(model)
+    connection = connections[using]
+    columns = ', '.join(
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in ('receipt', 'laundromat', 'term', 'weight')
+    )
+    with transaction.atomic(using=using):
+        model.objects.using(using).filter(receipt_id__in=receipt_ids).delete()
+        # Building model instances for bulk_create took most of a rebuild's time
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) '
+                f'VALUES (%s, %s, %s, %s)',
+                postings,
+            )
+
+
+def index_receipts(receipts):
+    """Reindex saved Receipt instances; call inside the write's transaction"""
+    rows = [(receipt.pk, *document(receipt)) for receipt in receipts if receipt.pk]
+    if rows:
+        write_postings([row[0] for row in rows], postings_for(rows))
+
+
+def rebuild(receipts, workers=1, batch_size=1000, model=None):
+    """
+    Reindex every receipt in the `receipts` queryset, `batch_size` receipts
+    per transaction. With several `workers`, batches are tokenized in that
+    many processes while this one reads and writes; at most two batches per
+    worker are in flight. `model` lets migrations pass the historical model.
+    Return (receipts, index rows) written.
+    """
+    rows = receipts.order_by('pk').values_list(
+        'pk', 'laundromat_id', *INDEXED_FIELDS
+    ).iterator(chunk_size=batch_size)
+
+    def batches():
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    indexed = written = 0
+
+    def write(batch, postings):
+        nonlocal indexed, written
+        write_postings([row[0] for row in batch], postings, model)
+        indexed += len(batch)
+        written += len(postings)
+
+    if workers <= 1:
+        for batch in batches():
+            write(batch, postings_for(batch))
+        return indexed, written
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches():
+            pending.append((batch, pool.submit(postings_for, batch)))
+            if len(pending) >= workers * 2:
+                batch, future = pending.popleft()
+                write(batch, future.result())
+        while pending:
+            batch, future = pending.popleft()
+            write(batch, future.result())
+    return indexed, written
+
+
+def max_results():
+    return getattr(settings, 'RECEIPT_SEARCH_MAX_RESULTS', 200)
+
+
+def ranked(queryset, query, laundromat_id=None):
+    """
+    The receipts of `queryset` matching `query`, best first, at most
+    RECEIPT_SEARCH_MAX_RESULTS. Pass the laundromat the queryset is limited
+    to, if any: only that laundromat's index rows are read, straight from
+    the covering index, and the best of them are then checked against the
+    queryset's other filters. Otherwise the index rows are limited to the
+    queryset up front (a customer's own receipts, or an admin's search of
+    every laundromat).
+    """
+    from .models import ReceiptSearchTerm
+
+    postings = ReceiptSearchTerm.objects.filter(term__in=query_terms(query))
+    if laundromat_id is not None:
+        postings = postings.filter(laundromat_id=laundromat_id)
+        total = queryset.model.objects.filter(laundromat_id=laundromat_id).count()
+    else:
+        postings = postings.filter(receipt_id__in=queryset.order_by().values('pk'))
+        total = None
+
+    # Scored here from one read of the matching rows: fewer passes over them
+    # than counting and summing in grouped queries
+    rows = list(postings.values_list('receipt_id', 'term', 'weight'))
+    if not rows:
+        return queryset.none()
+    if total is None:
+        total = queryset.count()
+    document_counts = Counter(term for _, term, _ in rows)
+    idf = {
+        term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+        for term, count in document_counts.items()
+    }
+    matched = Counter()
+    scores = defaultdict(float)
+    for receipt_id, term, weight in rows:
+        matched[receipt_id] += 1
+        scores[receipt_id] += idf[term] * weight * (K1 + 1) / (weight + K1)
+
+    def rank_key(receipt_id):
+        return matched[receipt_id], scores[receipt_id], receipt_id
+
+    limit = max_results()
+    if laundromat_id is None:
+        ids = heapq.nlargest(limit, matched, key=rank_key)
+    else:
+        best = sorted(matched, key=rank_key, reverse=True)
+        ids = []
+        for start in range(0, len(best), CHECK_BATCH_SIZE):
+            batch = best[start:start + CHECK_BATCH_SIZE]
+            allowed = set(queryset.filter(pk__in=batch).values_list('pk', flat=True))
+            ids += [receipt_id for receipt_id in batch if receipt_id in allowed]
+            if len(ids) >= limit:
+                break
+        ids = ids[:limit]
+    if not ids:
+        return queryset.none()
+
+    # One raw CASE: a When() per id cost more to build than the queries took
+    quote_name = connections[queryset.db].ops.quote_name
+    meta = queryset.model._meta
+    pk_column = f'{quote_name(meta.db_table)}.{quote_name(meta.pk.column)}'
+    rank = RawSQL(
+        f'CASE {pk_column} {"WHEN %s THEN %s " * len(ids)}END',
+        [value for position, pk in enumerate(ids) for value in (pk, position)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(rank)
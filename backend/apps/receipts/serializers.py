@@ -1,16 +1,26 @@
 from rest_framework import serializers
-from .models import Receipt
+from .models import ArchivedReceipt, Receipt
 from apps.videos.serializers import VideoListSerializer
 from apps.users.serializers import UserSerializer
-from apps.laundromats.serializers import LaundromatListSerializer
+from apps.laundromats.serializers import CachedLaundromatField, CachedLaundromatSerializer
+from config.sparse_fields import SparseFieldsMixin
 
 
-class ReceiptSerializer(serializers.ModelSerializer):
-    """Full serializer for Receipt model"""
+def validate_status_transition(instance, value):
+    """Reject a status the receipt may not move to from its current one"""
+    if instance is not None and value != instance.status and not instance.can_transition_to(value):
+        raise serializers.ValidationError(
+            f"Cannot change status from '{instance.status}' to '{value}'."
+        )
+    return value
+
+
+class ReceiptSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Full serializer for Receipt model; supports ?fields= and ?expand="""
     videos = VideoListSerializer(many=True, read_only=True)
     customer = UserSerializer(read_only=True)
     staff = UserSerializer(read_only=True)
-    laundromat = LaundromatListSerializer(read_only=True)
+    laundromat = CachedLaundromatSerializer(read_only=True)
     is_active = serializers.BooleanField(read_only=True)
     days_since_dropoff = serializers.IntegerField(read_only=True)
     qr_code_url = serializers.SerializerMethodField()
@@ -28,6 +38,16 @@ class ReceiptSerializer(serializers.ModelSerializer):
             'id', 'receipt_number', 'qr_code', 'drop_off_date',
             'created_at', 'updated_at'
         )
+        # Columns read by fields that are not model fields
+        sparse_sources = {
+            'laundromat': ('laundromat',),
+            'qr_code_url': ('qr_code',),
+            'is_active': ('status',),
+            'days_since_dropoff': ('drop_off_date',),
+        }
+
+    def validate_status(self, value):
+        return validate_status_transition(self.instance, value)
 
     def get_qr_code_url(self, obj):
         """Get full URL for QR code"""
@@ -37,6 +57,15 @@ class ReceiptSerializer(serializers.ModelSerializer):
         return None
 
 
+class ArchivedReceiptSerializer(ReceiptSerializer):
+    """Full serializer for an archived receipt, same shape as a live one"""
+
+    class Meta(ReceiptSerializer.Meta):
+        model = ArchivedReceipt
+        fields = ReceiptSerializer.Meta.fields + ('archived_at',)
+        read_only_fields = fields
+
+
 class ReceiptCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating receipts"""
     customer_id = serializers.IntegerField(write_only=True)
@@ -72,7 +101,7 @@ class ReceiptCreateSerializer(serializers.ModelSerializer):
 class ReceiptListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for listing receipts"""
     customer_name = serializers.CharField(source='customer.username', read_only=True)
-    laundromat_name = serializers.CharField(source='laundromat.name', read_only=True)
+    laundromat_name = CachedLaundromatField('name')
 
     class Meta:
         model = Receipt
@@ -83,6 +112,13 @@ class ReceiptListSerializer(serializers.ModelSerializer):
         )
 
 
+class ArchivedReceiptListSerializer(ReceiptListSerializer):
+    """Lightweight serializer for archived receipts in a customer's history"""
+
+    class Meta(ReceiptListSerializer.Meta):
+        model = ArchivedReceipt
+
+
 class ReceiptUpdateStatusSerializer(serializers.ModelSerializer):
     """Serializer for updating receipt status"""
 
@@ -90,6 +126,25 @@ class ReceiptUpdateStatusSerializer(serializers.ModelSerializer):
         model = Receipt
         fields = ('status',)
 
+    def validate_status(self, value):
+        return validate_status_transition(self.instance, value)
+
+
+class ReceiptBulkStatusSerializer(serializers.Serializer):
+    """Serializer for moving several receipts to the same status"""
+    MAX_IDS = 500
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS
+    )
+    status = serializers.ChoiceField(choices=Receipt.STATUS_CHOICES)
+
+    def validate_ids(self, value):
+        # Keep the caller's order but drop repeats
+        return list(dict.fromkeys(value))
+
 
 class ReceiptCompleteSerializer(serializers.ModelSerializer):
     """Serializer for completing receipt (pickup)"""
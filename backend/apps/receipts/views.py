@@ -1,25 +1,47 @@
+import heapq
+
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from .models import Receipt
+from apps.analytics import hourly_stats
+from apps.notifications import outbox
+from config.fast_serializers import RowSerializer, fast_list_response
+from config.sparse_fields import SparseFieldsViewMixin
+from config.streaming import stream_chunk_size, streaming_list_response
+from . import search
+from .filters import ReceiptNumberFilter, ReceiptSearchFilter
+from .models import ArchivedReceipt, Receipt, ReceiptStatusEvent, track_receipt_changes
 from .serializers import (
+    ArchivedReceiptSerializer,
+    ArchivedReceiptListSerializer,
     ReceiptSerializer,
     ReceiptCreateSerializer,
     ReceiptListSerializer,
     ReceiptUpdateStatusSerializer,
+    ReceiptBulkStatusSerializer,
     ReceiptCompleteSerializer
 )
 
 
-class ReceiptViewSet(viewsets.ModelViewSet):
-    """ViewSet for Receipt model"""
-    queryset = Receipt.objects.select_related(
-        'customer', 'staff', 'laundromat'
-    ).prefetch_related('videos')
+class ReceiptViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for Receipt model.
+    list and retrieve accept ?fields= and ?expand= (see config/sparse_fields.py);
+    list also takes ?q= to search items and special instructions (see search.py)
+    and ?receipt_number= for one number as typed (see filters.py).
+    """
+    # Laundromats come from apps/laundromats/cache.py, not a join
+    queryset = Receipt.objects.select_related('customer', 'staff').prefetch_related('videos')
     serializer_class = ReceiptSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, ReceiptNumberFilter, ReceiptSearchFilter, OrderingFilter]
     filterset_fields = ['status', 'laundromat', 'customer', 'staff']
     search_fields = ['receipt_number', 'customer__username', 'customer__phone']
     ordering_fields = ['created_at', 'drop_off_date', 'expected_pickup_date']
@@ -27,18 +49,28 @@ class ReceiptViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return ReceiptCreateSerializer
-        elif self.action == 'list':
+        elif self.action == 'list' and not self.is_sparse_request():
             return ReceiptListSerializer
         elif self.action == 'update_status':
             return ReceiptUpdateStatusSerializer
+        elif self.action == 'bulk_status':
+            return ReceiptBulkStatusSerializer
         elif self.action == 'complete':
             return ReceiptCompleteSerializer
         return ReceiptSerializer
 
     def get_queryset(self):
         """Filter receipts based on user role"""
+        return self.scope_to_user(super().get_queryset())
+
+    def get_archived_queryset(self):
+        """Archived receipts the user may see"""
+        return self.scope_to_user(
+            ArchivedReceipt.objects.select_related('customer', 'staff').prefetch_related('videos')
+        )
+
+    def scope_to_user(self, queryset):
         user = self.request.user
-        queryset = super().get_queryset()
 
         if user.is_customer:
             # Customers can only see their own receipts
@@ -50,6 +82,28 @@ class ReceiptViewSet(viewsets.ModelViewSet):
         # Admins can see all receipts
         return queryset
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        query = self.request.query_params.get('q', '').strip()
+        if query and self.action == 'list':
+            return search.ranked(queryset, query, self.search_laundromat_id())
+        return queryset
+
+    def search_laundromat_id(self):
+        """The one laundromat a search is limited to, if any"""
+        user = self.request.user
+        if user.is_staff_member and user.laundromat_id:
+            return user.laundromat_id
+        laundromat = self.request.query_params.get('laundromat', '')
+        return int(laundromat) if laundromat.isdigit() and not user.is_customer else None
+
+    def list(self, request, *args, **kwargs):
+        """List receipts; plain lists are serialized straight from rows"""
+        if self.is_sparse_request():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return fast_list_response(self, queryset, ReceiptListSerializer)
+
     def create(self, request, *args, **kwargs):
         """Create receipt and return full receipt data"""
         serializer = self.get_serializer(data=request.data)
@@ -59,23 +113,43 @@ class ReceiptViewSet(viewsets.ModelViewSet):
         response_serializer = ReceiptSerializer(receipt, context={'request': request})
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
+    def retrieve(self, request, *args, **kwargs):
+        """Get receipt details, falling back to the archive for old receipts"""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            receipt = get_object_or_404(self.get_archived_queryset(), pk=kwargs['pk'])
+            serializer = ArchivedReceiptSerializer(receipt, context=self.get_serializer_context())
+            return Response(serializer.data)
+
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get all active receipts (not completed/cancelled)"""
         receipts = self.get_queryset().exclude(status__in=['completed', 'cancelled'])
-        page = self.paginate_queryset(receipts)
-        if page is not None:
-            serializer = ReceiptListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = ReceiptListSerializer(receipts, many=True)
-        return Response(serializer.data)
+        return fast_list_response(self, receipts, ReceiptListSerializer)
 
     @action(detail=False, methods=['get'])
     def my_receipts(self, request):
-        """Get current user's receipts"""
-        receipts = Receipt.objects.filter(customer=request.user)
-        serializer = ReceiptListSerializer(receipts, many=True)
-        return Response(serializer.data)
+        """Get current user's receipts, including archived ones"""
+        live = RowSerializer(ReceiptListSerializer)
+        archived = RowSerializer(ArchivedReceiptListSerializer)
+        chunk_size = stream_chunk_size()
+
+        def tagged(row_serializer, queryset):
+            # created_at rides along as a last column to merge the two by
+            rows = row_serializer.rows(queryset.filter(customer=request.user), 'created_at')
+            return ((row_serializer, row) for row in rows.iterator(chunk_size=chunk_size))
+
+        # Both come newest first; merge keeps live rows ahead on ties
+        history = heapq.merge(
+            tagged(live, Receipt.objects.all()),
+            tagged(archived, ArchivedReceipt.objects.all()),
+            key=lambda item: item[1][-1], reverse=True,
+        )
+        return streaming_list_response(
+            request, history,
+            lambda chunk: [row_serializer.to_dict(row) for row_serializer, row in chunk],
+        )
 
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
@@ -86,6 +160,77 @@ class ReceiptViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(ReceiptSerializer(receipt, context={'request': request}).data)
 
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Move several receipts to one status with a single UPDATE.
+
+        Only receipts in the caller's scope whose current status allows the
+        transition are changed; the response reports the outcome per id.
+        """
+        if request.user.is_customer:
+            return Response(
+                {'error': 'Only staff can update receipt status'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        new_status = serializer.validated_data['status']
+        allowed_from = Receipt.statuses_leading_to(new_status)
+
+        now = timezone.now()
+        changes = {'status': new_status, 'updated_at': now}
+        if new_status == 'completed':
+            changes['actual_pickup_date'] = now
+
+        scope = self.get_queryset().select_related(None).prefetch_related(None)
+        with transaction.atomic():
+            rows = scope.filter(pk__in=ids).select_for_update().values_list(
+                'pk', 'status', 'laundromat_id', 'staff_id', 'customer_id', 'price', 'created_at',
+                'receipt_number'
+            )
+            current = {}
+            events = []
+            stats_changes = []
+            notifications = []
+            for pk, old_status, laundromat_id, staff_id, customer_id, price, created_at, number in rows:
+                current[pk] = old_status
+                if old_status in allowed_from:
+                    events.append(ReceiptStatusEvent(
+                        receipt_id=pk, laundromat_id=laundromat_id, staff_id=staff_id,
+                        status=new_status, created_at=now,
+                    ))
+                    stats_changes.append((
+                        (customer_id, laundromat_id, old_status, price, created_at),
+                        (customer_id, laundromat_id, new_status, price, created_at),
+                    ))
+                    notifications.append((pk, number, customer_id, new_status))
+            updated = 0
+            if events:
+                updated = scope.filter(
+                    pk__in=[event.receipt_id for event in events], status__in=allowed_from
+                ).update(**changes)
+                ReceiptStatusEvent.objects.bulk_create(events)
+                track_receipt_changes(stats_changes)
+                hourly_stats.record_status_events(events)
+                outbox.enqueue_status_changes(notifications)
+
+        results = []
+        for pk in ids:
+            if pk not in current:
+                outcome = 'not_found'
+            elif current[pk] in allowed_from:
+                outcome = 'updated'
+            elif current[pk] == new_status:
+                outcome = 'unchanged'
+            else:
+                outcome = 'invalid_transition'
+            results.append({'id': pk, 'previous_status': current.get(pk), 'result': outcome})
+
+        return Response({'status': new_status, 'updated': updated, 'results': results})
+
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         """Mark receipt as completed (customer picked up)"""
@@ -96,6 +241,11 @@ class ReceiptViewSet(viewsets.ModelViewSet):
                 {'error': 'Receipt already completed'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if not receipt.can_transition_to('completed'):
+            return Response(
+                {'error': f"Cannot complete a receipt that is '{receipt.status}'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         serializer = self.get_serializer(
             receipt,
@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from config.admin_performance import LargeTableAdminMixin
 from .models import User
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     list_display = ('username', 'email', 'phone', 'role', 'laundromat', 'is_active', 'created_at')
+    list_select_related = ('laundromat',)
     list_filter = ('role', 'is_active', 'laundromat')
     search_fields = ('username', 'email', 'phone', 'first_name', 'last_name')
 
@@ -0,0 +1,15 @@
+"""
+Async version of the current-user endpoint, served under ASGI.
+See config/async_api.py and config/urls_asgi.py.
+"""
+from config.async_api import async_api_view, get_viewset, json_response
+from .serializers import UserProfileSerializer
+from .views import UserViewSet
+
+
+@async_api_view
+async def me(request):
+    """GET /api/users/me/"""
+    view = get_viewset(UserViewSet, request, 'me')
+    serializer = UserProfileSerializer(request.user, context=view.get_serializer_context())
+    return json_response(serializer.data)
@@ -29,14 +29,18 @@ class Command(BaseCommand):
             name='Downtown Laundry',
             address='123 Main St, Downtown',
             phone='+1234567891',
-            email='downtown@lavendia.com'
+            email='downtown@lavendia.com',
+            latitude=40.7128,
+            longitude=-74.0060,
         )
 
         laundromat2 = Laundromat.objects.create(
             name='Uptown Wash & Dry',
             address='456 Park Ave, Uptown',
             phone='+1234567892',
-            email='uptown@lavendia.com'
+            email='uptown@lavendia.com',
+            latitude=40.7831,
+            longitude=-73.9712,
         )
 
         self.stdout.write(self.style.SUCCESS('Created 2 laundromats'))
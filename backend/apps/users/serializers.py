@@ -1,12 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from config.fast_serializers import absolute_file_url
+from config.sparse_fields import SparseFieldsMixin
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
-    """Serializer for User model"""
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for User model; supports ?fields= and ?expand="""
     profile_picture_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -17,6 +19,9 @@ class UserSerializer(serializers.ModelSerializer):
             'laundromat', 'is_active', 'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'profile_picture_url', 'created_at', 'updated_at')
+        sparse_sources = {'profile_picture_url': ('profile_picture',)}
+        # How config.fast_serializers reads fields that are not model fields
+        fast_fields = {'profile_picture_url': ('profile_picture', absolute_file_url(User, 'profile_picture'))}
 
     def get_profile_picture_url(self, obj):
         """Get full URL for profile picture"""
@@ -51,7 +56,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Detailed serializer for user profile"""
     laundromat_name = serializers.CharField(source='laundromat.name', read_only=True)
     profile_picture_url = serializers.SerializerMethodField()
@@ -3,6 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import get_user_model
+from config.fast_serializers import fast_streaming_response
+from config.sparse_fields import SparseFieldsViewMixin
+from config.streaming import stream_queryset
 from .models import PasswordResetToken
 from .serializers import (
     UserSerializer,
@@ -17,8 +20,13 @@ from .serializers import (
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
-    """ViewSet for User model"""
+class UserViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for User model.
+    list, retrieve and me accept ?fields= and ?expand=. Only list and
+    retrieve trim their queryset to match; me serializes request.user,
+    which authentication has already loaded, so only its output is pruned.
+    """
     queryset = User.objects.all()
     serializer_class = UserSerializer
     filterset_fields = ['role', 'is_active', 'laundromat']
@@ -97,16 +105,20 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def customers(self, request):
         """Get all customers"""
-        customers = User.objects.filter(role='customer')
-        serializer = self.get_serializer(customers, many=True)
-        return Response(serializer.data)
+        return self.stream_users(User.objects.filter(role='customer'))
 
     @action(detail=False, methods=['get'])
     def staff(self, request):
         """Get all staff members"""
-        staff = User.objects.filter(role='staff')
-        serializer = self.get_serializer(staff, many=True)
-        return Response(serializer.data)
+        return self.stream_users(User.objects.filter(role='staff'))
+
+    def stream_users(self, users):
+        """Stream every user in `users` as one JSON array"""
+        if self.is_sparse_request():
+            return stream_queryset(
+                self.request, users, self.get_serializer_class(), self.get_serializer_context()
+            )
+        return fast_streaming_response(self, users, UserSerializer)
 
     @action(detail=False, methods=['post'])
     def request_password_reset(self, request):
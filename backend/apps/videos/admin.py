@@ -1,12 +1,17 @@
 from django.contrib import admin
+from apps.receipts.admin import ReceiptNumberSearchMixin
+from config.admin_performance import LargeTableAdminMixin
 from .models import Video
 
 
 @admin.register(Video)
-class VideoAdmin(admin.ModelAdmin):
+class VideoAdmin(ReceiptNumberSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('receipt', 'video_type', 'file_size_mb', 'duration', 'uploaded_at')
+    # str(receipt) reads its customer
+    list_select_related = ('receipt__customer',)
     list_filter = ('video_type', 'uploaded_at')
     search_fields = ('receipt__receipt_number',)
+    autocomplete_fields = ('receipt',)
     readonly_fields = ('uploaded_at', 'updated_at', 'file_size', 'file_size_mb')
 
     fieldsets = (
@@ -0,0 +1,25 @@
+"""
+Async version of the videos-by-receipt endpoint, served under ASGI.
+See config/async_api.py and config/urls_asgi.py.
+"""
+from rest_framework import status
+
+from config.async_api import async_api_view, get_viewset, json_response
+from .serializers import VideoSerializer
+from .views import VideoViewSet
+
+
+@async_api_view
+async def by_receipt(request):
+    """GET /api/videos/by_receipt/?receipt_id={id}"""
+    receipt_id = request.query_params.get('receipt_id')
+    if not receipt_id:
+        return json_response(
+            {'error': 'receipt_id parameter is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    view = get_viewset(VideoViewSet, request, 'by_receipt')
+    videos = [video async for video in view.get_queryset().filter(receipt_id=receipt_id)]
+    serializer = VideoSerializer(videos, many=True, context=view.get_serializer_context())
+    return json_response(serializer.data)
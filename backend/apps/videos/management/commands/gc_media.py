@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from config import media_gc
+
+
+class Command(BaseCommand):
+    help = (
+        'Quarantines (or deletes) uploaded files no row refers to, such as the videos, '
+        'thumbnails and QR codes of deleted receipts and replaced profile pictures'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=int, default=settings.MEDIA_GC_GRACE_HOURS,
+            help='Leave files modified less than this many hours ago alone'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Threads listing directories; the walk waits on the disk, not the CPU'
+        )
+        parser.add_argument('--delete', action='store_true', help='Delete orphans instead of quarantining them')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the orphans')
+        parser.add_argument('--restart', action='store_true', help='Ignore the state of an unfinished run')
+
+    def handle(self, *args, **options):
+        action = 'report' if options['dry_run'] else 'delete' if options['delete'] else 'quarantine'
+        stats = media_gc.collect(
+            action=action,
+            grace=timedelta(hours=options['grace_hours']),
+            workers=options['workers'],
+            resume=not options['restart'],
+            log=self.stdout.write,
+        )
+
+        summary = (
+            f'Scanned {stats.files} files in {stats.directories} directories in {stats.seconds:.1f}s '
+            f'({stats.files_per_second:.0f} files/s); {stats.referenced} paths referenced, '
+            f'{stats.recent} recent files kept'
+        )
+        megabytes = stats.orphan_bytes / 1024 / 1024
+        if action == 'report':
+            self.stdout.write(f'{summary}. {stats.orphans} orphans ({megabytes:.1f} MB) would be collected')
+            return
+        moved = 'deleted' if action == 'delete' else f'moved to {settings.MEDIA_GC_QUARANTINE_ROOT}'
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary}. {stats.reclaimed} orphans {moved}, '
+            f'{stats.reclaimed_bytes / 1024 / 1024:.1f} MB reclaimed'
+        ))
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0006_receipt_archive'),
+        ('videos', '0002_remove_video_videos_receipt_655917_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedVideo',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('video_type', models.CharField(choices=[('intake', 'Intake Video'), ('completion', 'Completion Video')], max_length=20)),
+                ('video_file', models.FileField(upload_to='videos/%Y/%m/%d/')),
+                ('thumbnail', models.ImageField(blank=True, null=True, upload_to='thumbnails/%Y/%m/%d/')),
+                ('duration', models.IntegerField(blank=True, null=True)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('uploaded_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('receipt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='videos', to='receipts.archivedreceipt')),
+            ],
+            options={
+                'db_table': 'archived_videos',
+                'ordering': ['-uploaded_at'],
+                'indexes': [models.Index(fields=['receipt', 'uploaded_at'], name='archived_videos_receipt_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0003_archived_videos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['video_type', 'uploaded_at'], name='videos_type_uploaded_idx'),
+        ),
+    ]
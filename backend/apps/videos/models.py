@@ -50,6 +50,8 @@ class Video(models.Model):
             models.Index(fields=['video_type']),
             # index to speed up global ordering/filtering by upload time
             models.Index(fields=['uploaded_at']),
+            # index for the admin's video_type filter, newest first
+            models.Index(fields=['video_type', 'uploaded_at'], name='videos_type_uploaded_idx'),
         ]
         constraints = [
             # ensure one video type per receipt
@@ -70,3 +72,38 @@ class Video(models.Model):
         if self.file_size:
             return round(self.file_size / (1024 * 1024), 2)
         return 0
+
+
+class ArchivedVideo(models.Model):
+    """A Video moved to the archive together with its receipt"""
+    id = models.BigIntegerField(primary_key=True)
+    receipt = models.ForeignKey(
+        'receipts.ArchivedReceipt',
+        on_delete=models.CASCADE,
+        related_name='videos'
+    )
+    video_type = models.CharField(max_length=20, choices=Video.VIDEO_TYPE_CHOICES)
+    video_file = models.FileField(upload_to='videos/%Y/%m/%d/')
+    thumbnail = models.ImageField(upload_to='thumbnails/%Y/%m/%d/', blank=True, null=True)
+    duration = models.IntegerField(null=True, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+
+    uploaded_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'archived_videos'
+        ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['receipt', 'uploaded_at'], name='archived_videos_receipt_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_video_type_display()} - {self.receipt.receipt_number} (archived)"
+
+    @property
+    def file_size_mb(self):
+        """Get file size in MB"""
+        if self.file_size:
+            return round(self.file_size / (1024 * 1024), 2)
+        return 0
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from config.sparse_fields import SparseFieldsMixin
 from .models import Video
 
 
-class VideoSerializer(serializers.ModelSerializer):
-    """Serializer for Video model"""
+class VideoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for Video model; supports ?fields= and ?expand="""
     file_size_mb = serializers.FloatField(read_only=True)
     video_url = serializers.SerializerMethodField()
 
@@ -15,6 +16,10 @@ class VideoSerializer(serializers.ModelSerializer):
             'uploaded_at', 'updated_at'
         )
         read_only_fields = ('id', 'file_size', 'uploaded_at', 'updated_at')
+        sparse_sources = {
+            'video_url': ('video_file',),
+            'file_size_mb': ('file_size',),
+        }
 
     def get_video_url(self, obj):
         """Get full URL for video file"""
@@ -32,9 +37,10 @@ class VideoUploadSerializer(serializers.ModelSerializer):
         fields = ('receipt', 'video_type', 'video_file', 'thumbnail', 'duration')
 
 
-class VideoListSerializer(serializers.ModelSerializer):
+class VideoListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for listing videos"""
 
     class Meta:
         model = Video
         fields = ('id', 'video_type', 'thumbnail', 'duration', 'file_size_mb', 'uploaded_at')
+        sparse_sources = {'file_size_mb': ('file_size',)}
@@ -2,22 +2,27 @@ from rest_framework import viewsets, status, parsers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from config.sparse_fields import SparseFieldsViewMixin
 from .models import Video
 from .serializers import VideoSerializer, VideoUploadSerializer, VideoListSerializer
 
 
-class VideoViewSet(viewsets.ModelViewSet):
-    """ViewSet for Video model"""
+class VideoViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for Video model.
+    list, retrieve and by_receipt accept ?fields= and ?expand=.
+    """
     queryset = Video.objects.select_related('receipt')
     serializer_class = VideoSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ['video_type', 'receipt']
     parser_classes = (parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser)
+    sparse_actions = ('list', 'retrieve', 'by_receipt')
 
     def get_serializer_class(self):
         if self.action == 'create':
             return VideoUploadSerializer
-        elif self.action == 'list':
+        elif self.action == 'list' and not self.is_sparse_request():
             return VideoListSerializer
         return VideoSerializer
 
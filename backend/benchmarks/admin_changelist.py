@@ -0,0 +1,89 @@
+"""
+Admin changelist response time and query count on large tables.
+
+Seeds a fresh database with --rows users, receipts and videos, then times
+the receipt, video and user changelists - unfiltered, filtered and
+searched - as a superuser sees them (config/admin_performance.py). Each
+page should stay well under a second and its query count should not grow
+with --rows.
+
+Usage (from backend/):
+
+    python -m benchmarks.admin_changelist --rows 200000 --repeat 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.serializers import BACKEND_DIR, seed, setup_django
+
+PAGES = [
+    '/admin/receipts/receipt/',
+    '/admin/receipts/receipt/?status__exact=completed',
+    '/admin/receipts/receipt/?q=RCP',
+    '/admin/videos/video/',
+    '/admin/videos/video/?video_type__exact=intake',
+    '/admin/users/user/',
+]
+
+
+def seed_videos():
+    from apps.receipts.models import Receipt
+    from apps.videos.models import Video
+
+    Video.objects.bulk_create(
+        (Video(receipt_id=pk, video_type='intake', video_file='videos/bench.mp4', file_size=1)
+         for pk in Receipt.objects.values_list('pk', flat=True).iterator()),
+        batch_size=1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'admin_changelist.sqlite3'
+        env = {**os.environ, 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+        setup_django(db_path)
+        seed(args.rows)
+        seed_videos()
+
+        from django.db import connection, reset_queries
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+        from apps.users.models import User
+
+        admin = User.objects.create_superuser(
+            username='bench_superuser', password='x', phone='+19990000000', role='admin'
+        )
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(admin)
+
+        print(f'{args.rows} rows per table, best of {args.repeat}')
+        print(f'{"page":<52}{"ms":>10}{"queries":>10}')
+        for page in PAGES:
+            best = float('inf')
+            for _ in range(args.repeat):
+                # Seeding filled the query log past its limit
+                reset_queries()
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = client.get(page)
+                    best = min(best, time.perf_counter() - started)
+                assert response.status_code == 200, (page, response.status_code)
+            print(f'{page:<52}{best * 1000:>10.1f}{len(ctx.captured_queries):>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Compare the read endpoints under WSGI/gunicorn and ASGI/uvicorn.
+
+Seeds a throwaway SQLite database, starts each server in turn on a local
+port and drives it with keep-alive connections at increasing concurrency.
+Every connection loops over the hot read endpoints (receipt list/detail/
+active, users/me, videos/by_receipt, analytics overview) until the time is
+up. --client-delay makes each client wait before reading the response, to
+mimic slow mobile networks that hold a connection open.
+
+Requires gunicorn and uvicorn. Usage (from backend/):
+
+    python -m benchmarks.asgi_vs_wsgi --concurrency 100 250 500 1000 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'wsgi': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning',
+    ],
+    'asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'config.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+        '--log-level', 'warning', '--no-access-log',
+    ],
+}
+
+SEED_SCRIPT = """
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from apps.videos.models import Video
+
+laundromat = Laundromat.objects.create(name='Bench', address='-', phone='0')
+staff = User.objects.create_user(username='bench', password='x', phone='1', role='staff', laundromat=laundromat)
+customer = User.objects.create_user(username='bench_customer', password='x', phone='2')
+now = timezone.now()
+receipts = Receipt.objects.bulk_create([
+    Receipt(laundromat=laundromat, customer=customer, staff=staff, status='washing',
+            expected_pickup_date=now + timedelta(days=1), items_description='bench',
+            price=Decimal('12.00'), qr_code='qr_codes/bench.png')
+    for _ in range({receipts})
+])
+Video.objects.bulk_create([
+    Video(receipt=receipts[0], video_type='intake', video_file='videos/bench.mp4', file_size=1)
+])
+print(AccessToken.for_user(staff), receipts[0].pk)
+"""
+
+
+def seed(env, receipts):
+    subprocess.run(
+        [sys.executable, 'manage.py', 'migrate', '-v', '0'], cwd=BACKEND_DIR, env=env, check=True
+    )
+    output = subprocess.run(
+        [sys.executable, 'manage.py', 'shell', '-c', SEED_SCRIPT.format(receipts=receipts)],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return output[-2], output[-1]
+
+
+def build_paths(receipt_id):
+    return [
+        '/api/receipts/',
+        f'/api/receipts/{receipt_id}/',
+        '/api/receipts/active/',
+        '/api/users/me/',
+        f'/api/videos/by_receipt/?receipt_id={receipt_id}',
+        '/api/analytics/overview/',
+    ]
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; return (status code, keep-alive)."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {
+        name.strip().lower(): value.strip()
+        for name, _, value in (line.partition(':') for line in lines[1:] if line)
+    }
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def client(port, token, paths, deadline, delay, latencies, errors):
+    reader = writer = None
+    index = 0
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            writer.write((
+                f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+                f'Authorization: Bearer {token}\r\nAccept: application/json\r\n\r\n'
+            ).encode())
+            await writer.drain()
+            if delay:
+                await asyncio.sleep(delay)
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+            if not keep_alive:
+                # gunicorn's sync workers close the connection after each response.
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors.append('connection')
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(port, token, paths, concurrency, seconds, delay):
+    latencies, errors = [], []
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(*(
+        client(port, token, paths, deadline, delay, latencies, errors)
+        for _ in range(concurrency)
+    ))
+    latencies.sort()
+    return {
+        'rps': len(latencies) / seconds,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        'errors': len(errors),
+    }
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(asyncio.open_connection('127.0.0.1', port))
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[100, 250, 500, 1000])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--receipts', type=int, default=500)
+    parser.add_argument('--client-delay', type=float, default=0.0,
+                        help='seconds each client waits before reading a response')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--server', choices=list(SERVERS), action='append')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            'DB_NAME': str(Path(tmp) / 'bench.sqlite3'),
+            'DB_SQLITE_CONCURRENT': 'True',
+            'DB_REPLICAS': '',
+        }
+        token, receipt_id = seed(env, args.receipts)
+        paths = build_paths(receipt_id)
+
+        print(f'{args.workers} workers per server, {args.seconds}s per level, '
+              f'client delay {args.client_delay}s')
+        print(f'{"server":<8}{"conns":>7}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"errors":>8}')
+        for name in args.server or list(SERVERS):
+            server = subprocess.Popen(
+                SERVERS[name](args.port, args.workers), cwd=BACKEND_DIR, env=env,
+                start_new_session=True,
+            )
+            try:
+                wait_for_port(args.port)
+                for concurrency in args.concurrency:
+                    stats = asyncio.run(run_load(
+                        args.port, token, paths, concurrency, args.seconds, args.client_delay
+                    ))
+                    print(f'{name:<8}{concurrency:>7}{stats["rps"]:>10.1f}'
+                          f'{stats["p50_ms"]:>10.1f}{stats["p99_ms"]:>10.1f}{stats["errors"]:>8}')
+            finally:
+                os.killpg(server.pid, signal.SIGTERM)
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+JSON encode time and bytes on the wire, stock vs fast renderer.
+
+Seeds a fresh database and builds three typical payloads: a receipt list
+(serializer output, strings throughout), a user list, and an analytics
+style payload of raw Decimals and datetimes. For each it reports the time
+to encode with DRF's JSONRenderer and with config.renderers.FastJSONRenderer,
+and the body size uncompressed, gzipped and brotli-compressed as
+config.middleware.CompressionMiddleware would send it.
+
+Usage (from backend/):
+
+    python -m benchmarks.json_rendering --rows 5000 --repeat 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from benchmarks.serializers import BACKEND_DIR, seed, setup_django
+
+
+def best_ms(repeat, encode):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'json_rendering.sqlite3'
+        env = {**os.environ, 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+        setup_django(db_path)
+        seed(args.rows)
+
+        from django.utils import timezone
+        from rest_framework.renderers import JSONRenderer
+        from apps.receipts.models import Receipt
+        from apps.receipts.serializers import ReceiptListSerializer
+        from apps.users.models import User
+        from apps.users.serializers import UserSerializer
+        from config import middleware
+        from config.renderers import FastJSONRenderer
+
+        now = timezone.now()
+        payloads = [
+            ('receipts', ReceiptListSerializer(
+                Receipt.objects.select_related('customer', 'laundromat'), many=True
+            ).data),
+            ('users', UserSerializer(User.objects.all(), many=True).data),
+            ('trends', [
+                {'period': now - timedelta(hours=index), 'orders': index % 40,
+                 'revenue': row.price * (index % 40), 'average': row.price}
+                for index, row in enumerate(Receipt.objects.only('price'))
+            ]),
+        ]
+
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        encodings = ['gzip'] + (['br'] if middleware.brotli is not None else [])
+        print(f'{args.rows} rows, best of {args.repeat}')
+        print(
+            f'{"payload":<10}{"drf ms":>10}{"fast ms":>10}{"speedup":>10}{"same":>6}'
+            f'{"raw KB":>10}' + ''.join(f'{encoding + " KB":>10}' for encoding in encodings)
+        )
+        for name, data in payloads:
+            stock_ms = best_ms(args.repeat, lambda: stock.render(data))
+            fast_ms = best_ms(args.repeat, lambda: fast.render(data))
+            body = fast.render(data)
+            sizes = [len(middleware.COMPRESSORS[encoding](body)) for encoding in encodings]
+            print(
+                f'{name:<10}{stock_ms:>10.1f}{fast_ms:>10.1f}{stock_ms / fast_ms:>9.1f}x'
+                f'{"yes" if body == stock.render(data) else "NO":>6}{len(body) / 1024:>10.1f}'
+                + ''.join(f'{size / 1024:>10.1f}' for size in sizes)
+            )
+
+
+if __name__ == '__main__':
+    main()
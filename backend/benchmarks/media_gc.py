@@ -0,0 +1,111 @@
+"""
+Media garbage collection: scan rate with one thread vs several, and memory.
+
+Seeds a fresh database with --files receipts whose QR codes live under
+qr_codes/YYYY/MM/DD/ in a temporary MEDIA_ROOT, writes one more file per
+receipt that nothing refers to, then runs `manage.py gc_media`'s code with
+1 and --workers scanning threads, reporting files per second. Runs after
+the first only count orphans so each sees the same tree; the last one
+quarantines them and reports bytes reclaimed. Also prints the bytes per
+path of the referenced set next to a plain set of the same names.
+
+Usage (from backend/):
+
+    python -m benchmarks.media_gc --files 100000 --workers 8
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks.serializers import BACKEND_DIR, setup_django
+
+# 12 months of 28 days
+DAYS = 336
+OLD = time.time() - 7 * 24 * 3600
+
+
+def tree(files):
+    """(referenced, orphan) names spread over a year of day directories"""
+    for index in range(files):
+        day = index % DAYS
+        day = f'qr_codes/2025/{day // 28 + 1:02}/{day % 28 + 1:02}'
+        yield f'{day}/{index}.png', f'{day}/{index}-old.png'
+
+
+def seed(files, media_root):
+    from django.utils import timezone
+    from apps.laundromats.models import Laundromat
+    from apps.receipts.models import Receipt
+    from apps.users.models import User
+
+    laundromat = Laundromat.objects.create(name='Bench', address='-', phone='0')
+    customer = User.objects.create_user(username='bench_customer', password='x', phone='+19990000001')
+    now = timezone.now()
+    receipts = []
+    for referenced, orphan in tree(files):
+        for name in (referenced, orphan):
+            path = media_root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b'\x89PNG' + b'\0' * 1020)
+            os.utime(path, (OLD, OLD))
+        receipts.append(Receipt(
+            laundromat=laundromat, customer=customer, expected_pickup_date=now,
+            items_count=1, price=Decimal('9.99'), qr_code=referenced,
+        ))
+        if len(receipts) == 5000:
+            Receipt.objects.bulk_create(receipts, batch_size=500)
+            receipts = []
+    Receipt.objects.bulk_create(receipts, batch_size=500)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--files', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path = tmp / 'media_gc.sqlite3'
+        env = {**os.environ, 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+        setup_django(db_path)
+        seed(args.files, tmp / 'media')
+
+        from config import media_gc
+
+        names = [referenced for referenced, _ in tree(args.files)]
+        referenced = media_gc.ReferencedPaths(names)
+        plain = sys.getsizeof(set(names)) + sum(map(sys.getsizeof, names))
+        print(
+            f'{args.files} referenced paths: {referenced.hashes.itemsize * len(referenced) / args.files:.0f} '
+            f'bytes/path as hashes, {plain / args.files:.0f} as a set of str'
+        )
+
+        print(f'{"scan":<18}{"files/s":>10}{"seconds":>10}{"orphans":>10}{"MB":>8}')
+        runs = [(1, 'report'), (args.workers, 'report'), (args.workers, 'quarantine')]
+        for workers, action in runs:
+            stats = media_gc.collect(
+                action=action, grace=timedelta(hours=24), workers=workers, resume=False,
+                media_root=tmp / 'media', quarantine_root=tmp / 'quarantine',
+                state_path=tmp / 'media_gc.json',
+            )
+            megabytes = (stats.reclaimed_bytes or stats.orphan_bytes) / 1024 / 1024
+            label = f'{workers} threads' + (', move' if action != 'report' else '')
+            print(
+                f'{label:<18}{stats.files_per_second:>10.0f}{stats.seconds:>10.2f}'
+                f'{stats.orphans:>10}{megabytes:>8.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Nearest-laundromat search, geohash grid index vs a full scan.
+
+Seeds a fresh database with --rows laundromats scattered over the
+continental US, then answers --queries random nearby/ searches both ways:
+through apps.laundromats.geo.nearest() (prefix ranges of the geohash
+index) and by reading every row and ranking them all. Reports the average
+time per search, the rows read, and whether both found the same
+laundromats.
+
+Usage (from backend/):
+
+    python -m benchmarks.nearby --rows 50000 --queries 200
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.serializers import BACKEND_DIR, setup_django
+
+# Continental US
+SOUTH, NORTH, WEST, EAST = 25.0, 49.0, -124.0, -67.0
+
+
+def seed(rows, rng):
+    from apps.laundromats.models import Laundromat
+
+    Laundromat.objects.bulk_create([
+        Laundromat(
+            name=f'Bench {index}', address='-', phone='0',
+            latitude=rng.uniform(SOUTH, NORTH), longitude=rng.uniform(WEST, EAST),
+        )
+        for index in range(rows)
+    ], batch_size=1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--radius', type=float, default=25, help='search radius in km')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'nearby.sqlite3'
+        env = {**os.environ, 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+        setup_django(db_path)
+        rng = random.Random(0)
+        seed(args.rows, rng)
+
+        from apps.laundromats import geo
+        from apps.laundromats.models import Laundromat
+
+        queryset = Laundromat.objects.filter(is_active=True).only('id', 'latitude', 'longitude')
+        points = [(rng.uniform(SOUTH, NORTH), rng.uniform(WEST, EAST)) for _ in range(args.queries)]
+
+        class Counting:
+            """Wraps the queryset to count the rows nearest() reads"""
+            rows = 0
+
+            def __init__(self, queryset):
+                self.queryset = queryset
+
+            def __getattr__(self, name):
+                method = getattr(self.queryset, name)
+                return lambda *args, **kwargs: Counting(method(*args, **kwargs))
+
+            def __iter__(self):
+                for row in self.queryset:
+                    Counting.rows += 1
+                    yield row
+
+        def indexed(lat, lng):
+            return [row.pk for row, _ in geo.nearest(Counting(queryset), lat, lng, args.radius, args.limit)]
+
+        def scan(lat, lng):
+            ranked = sorted(
+                (distance, row.pk) for row in queryset
+                if (distance := geo.distance_km(lat, lng, row.latitude, row.longitude)) <= args.radius
+            )
+            return [pk for _, pk in ranked[:args.limit]]
+
+        results = {}
+        print(f'{args.rows} laundromats, {args.queries} searches, radius {args.radius} km, limit {args.limit}')
+        print(f'{"mode":<10}{"ms/search":>12}{"rows read":>12}')
+        for name, search in (('scan', scan), ('geohash', indexed)):
+            Counting.rows = 0
+            started = time.perf_counter()
+            results[name] = [search(lat, lng) for lat, lng in points]
+            elapsed = (time.perf_counter() - started) / args.queries
+            rows_read = Counting.rows / args.queries if name == 'geohash' else args.rows
+            print(f'{name:<10}{elapsed * 1000:>12.2f}{rows_read:>12.0f}')
+        print('same results:', 'yes' if results['scan'] == results['geohash'] else 'NO')
+
+
+if __name__ == '__main__':
+    main()
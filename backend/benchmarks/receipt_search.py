@@ -0,0 +1,147 @@
+"""
+Receipt text search, inverted index vs a LIKE scan, and index rebuild speed.
+
+Seeds a fresh database with --rows receipts spread over --laundromats,
+their items and instructions drawn from a small garment vocabulary, then:
+
+- rebuilds receipt_search_terms with `manage.py rebuild_search_index`'s
+  code, in this process and with --workers processes, reporting receipts
+  per second;
+- answers --queries random two-word searches as a staff member of one
+  laundromat would, through apps.receipts.search.ranked() and with
+  icontains filters on both fields, reporting the average time to count
+  the matches and read the first page, as the paginated list does.
+  Common searches are a colour or fabric and a garment, each matching a
+  tenth or more of the receipts; specific ones name a detail a few
+  receipts in a hundred mention.
+
+Usage (from backend/):
+
+    python -m benchmarks.receipt_search --rows 100000 --workers 4
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks.serializers import BACKEND_DIR, setup_django
+
+COLOURS = ['red', 'blue', 'black', 'white', 'green', 'navy', 'grey', 'beige', 'pink', 'brown']
+FABRICS = ['wool', 'cotton', 'silk', 'linen', 'denim', 'leather', 'velvet', 'polyester', 'cashmere']
+GARMENTS = [
+    'coat', 'shirt', 'dress', 'scarf', 'jacket', 'trousers', 'sweater', 'blazer', 'skirt',
+    'curtain', 'towel', 'duvet', 'pillowcase', 'tablecloth', 'suit', 'blouse', 'jeans',
+]
+DETAILS = [
+    'missing button', 'wine stain', 'fur trim', 'monogram', 'sequins', 'pleats', 'embroidery',
+    'zip repair', 'torn lining', 'suede patches', 'beaded collar', 'pet hair', 'ink mark',
+    'shoulder pads', 'lace cuffs', 'ripped seam', 'mothball smell', 'tailored hem',
+]
+INSTRUCTIONS = [
+    '', '', '', 'gentle detergent', 'no starch', 'extra starch', 'hang dry', 'cold wash only',
+    'fragrance free', 'iron on low', 'remove stain on collar', 'fold do not hang',
+]
+
+
+def description(rng):
+    items = rng.randint(1, 4)
+    text = ', '.join(
+        f'{rng.randint(1, 5)} {rng.choice(COLOURS)} {rng.choice(FABRICS)} {rng.choice(GARMENTS)}'
+        for _ in range(items)
+    )
+    if rng.random() < 0.3:
+        text += f', {rng.choice(DETAILS)}'
+    return text
+
+
+def seed(rows, laundromats, rng):
+    from django.utils import timezone
+    from apps.laundromats.models import Laundromat
+    from apps.receipts.models import Receipt
+    from apps.users.models import User
+
+    shops = Laundromat.objects.bulk_create([
+        Laundromat(name=f'Bench {index}', address='-', phone='0') for index in range(laundromats)
+    ])
+    customer = User.objects.create_user(username='bench_customer', password='x', phone='+19990000001')
+    now = timezone.now()
+    for start in range(0, rows, 5000):
+        Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=shops[index % laundromats], customer=customer,
+                expected_pickup_date=now, items_description=description(rng),
+                special_instructions=rng.choice(INSTRUCTIONS), items_count=3,
+                price=Decimal('9.99'), qr_code='qr_codes/bench.png',
+            )
+            for index in range(start, min(start + 5000, rows))
+        ], batch_size=500)
+    return shops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--laundromats', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--queries', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'receipt_search.sqlite3'
+        env = {**os.environ, 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+        setup_django(db_path)
+        rng = random.Random(0)
+        shops = seed(args.rows, args.laundromats, rng)
+
+        from django.db.models import Q
+        from apps.receipts import search
+        from apps.receipts.models import Receipt
+
+        print(f'{args.rows} receipts in {args.laundromats} laundromats')
+        print(f'{"rebuild":<14}{"receipts/s":>12}{"seconds":>10}{"terms":>10}')
+        for workers in sorted({1, args.workers}):
+            started = time.perf_counter()
+            indexed, terms = search.rebuild(Receipt.objects.all(), workers=workers)
+            seconds = time.perf_counter() - started
+            print(f'{f"{workers} workers":<14}{indexed / seconds:>12.0f}{seconds:>10.2f}{terms:>10}')
+
+        queries = {
+            'common': [f'{rng.choice(COLOURS + FABRICS)} {rng.choice(GARMENTS)}' for _ in range(args.queries)],
+            'specific': [rng.choice(DETAILS) for _ in range(args.queries)],
+        }
+        scope = Receipt.objects.filter(laundromat=shops[0])
+
+        def page(queryset):
+            return queryset.count(), list(queryset.values_list('pk', flat=True)[:20])
+
+        def indexed_search(query):
+            return page(search.ranked(scope, query, shops[0].pk))
+
+        def scan(query):
+            words = query.split()
+            matches = Q()
+            for word in words:
+                matches |= Q(items_description__icontains=word) | Q(special_instructions__icontains=word)
+            return page(scope.filter(matches))
+
+        print(f'{"ms/search":<14}{"common":>10}{"specific":>10}')
+        for name, run in (('scan', scan), ('index', indexed_search)):
+            timings = []
+            for kind in ('common', 'specific'):
+                started = time.perf_counter()
+                for query in queries[kind]:
+                    run(query)
+                timings.append((time.perf_counter() - started) / args.queries)
+            print(f'{name:<14}' + ''.join(f'{elapsed * 1000:>10.2f}' for elapsed in timings))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+List serialization throughput, DRF serializers vs config.fast_serializers.
+
+Seeds a fresh database, then for each list shape serializes the same rows
+both ways - model instances through the DRF serializer, and values_list()
+rows through RowSerializer - and reports rows per second including the
+query, plus whether the rendered JSON is byte-identical.
+
+Usage (from backend/):
+
+    python -m benchmarks.serializers --rows 5000 --repeat 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path):
+    os.environ['DB_NAME'] = str(db_path)
+    os.environ['DB_REPLICAS'] = ''
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    sys.path.insert(0, str(BACKEND_DIR))
+    import django
+    django.setup()
+
+
+def seed(rows):
+    from django.utils import timezone
+    from apps.laundromats.models import Laundromat
+    from apps.receipts.models import Receipt
+    from apps.users.models import User
+
+    laundromat = Laundromat.objects.create(name='Bench', address='-', phone='0')
+    User.objects.bulk_create([
+        User(
+            username=f'bench{index}', phone=f'+1555{index:07d}', email=f'bench{index}@example.com',
+            first_name='Bench', last_name=str(index), password='!',
+            profile_picture=f'profile_pictures/{index}.png' if index % 2 else '',
+        )
+        for index in range(rows)
+    ], batch_size=500)
+    customers = list(User.objects.all())
+    now = timezone.now()
+    Receipt.objects.bulk_create([
+        Receipt(
+            laundromat=laundromat, customer=customers[index % len(customers)],
+            expected_pickup_date=now, items_description='bench load', items_count=3,
+            price=Decimal('9.99'), qr_code='qr_codes/bench.png',
+        )
+        for index in range(rows)
+    ], batch_size=500)
+
+
+def best_rate(rows, repeat, serialize):
+    """Rows per second of the fastest of `repeat` runs, and the last output"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = serialize()
+        best = min(best, time.perf_counter() - started)
+    return rows / best, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'serializers.sqlite3'
+        env = {**os.environ, 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+        setup_django(db_path)
+        seed(args.rows)
+
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from apps.receipts.models import Receipt
+        from apps.receipts.serializers import ReceiptListSerializer
+        from apps.users.models import User
+        from apps.users.serializers import UserSerializer
+        from config.fast_serializers import RowSerializer
+
+        request = Request(APIRequestFactory().get('/api/users/customers/', HTTP_HOST='localhost'))
+        cases = [
+            ('receipts', ReceiptListSerializer, Receipt.objects.select_related('customer', 'laundromat'), {}),
+            ('users', UserSerializer, User.objects.all(), {'request': request}),
+        ]
+
+        print(f'{args.rows} rows, best of {args.repeat}')
+        print(f'{"list":<10}{"drf rows/s":>14}{"fast rows/s":>14}{"speedup":>10}{"same bytes":>12}')
+        for name, serializer_class, queryset, context in cases:
+            drf_rate, drf_data = best_rate(args.rows, args.repeat, lambda: serializer_class(
+                queryset.all(), many=True, context=context
+            ).data)
+
+            def fast():
+                row_serializer = RowSerializer(serializer_class, context)
+                return row_serializer.serialize(row_serializer.rows(queryset.all()))
+            fast_rate, fast_data = best_rate(args.rows, args.repeat, fast)
+
+            same = JSONRenderer().render(drf_data) == JSONRenderer().render(fast_data)
+            print(
+                f'{name:<10}{drf_rate:>14,.0f}{fast_rate:>14,.0f}'
+                f'{fast_rate / drf_rate:>9.1f}x{"yes" if same else "NO":>12}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+SQLite concurrency stress test.
+
+Runs the same mixed workload against a fresh database file twice - once with
+the stock sqlite3 backend and once with DB_SQLITE_CONCURRENT - and reports
+write throughput, read throughput, lock-error rate and write latency.
+
+Each worker is a separate process, like gunicorn workers:
+
+- writers mimic update_status: read a receipt and save a new status inside
+  one transaction;
+- readers mimic an analytics export: aggregate the whole receipts table.
+
+Usage (from backend/):
+
+    python -m benchmarks.sqlite_stress --writers 4 --readers 4 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'default': {'DB_SQLITE_CONCURRENT': 'False'},
+    'concurrent': {'DB_SQLITE_CONCURRENT': 'True'},
+}
+
+
+def setup_django(db_path, mode):
+    os.environ.update(MODES[mode])
+    os.environ['DB_NAME'] = str(db_path)
+    os.environ['DB_REPLICAS'] = ''
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    sys.path.insert(0, str(BACKEND_DIR))
+    import django
+    django.setup()
+
+
+def seed(db_path, mode, receipts):
+    setup_django(db_path, mode)
+    from django.utils import timezone
+    from apps.laundromats.models import Laundromat
+    from apps.receipts.models import Receipt
+    from apps.users.models import User
+
+    laundromat = Laundromat.objects.create(name='Stress', address='-', phone='0')
+    customer = User.objects.create_user(username='stress', password='x', phone='0')
+    now = timezone.now()
+    Receipt.objects.bulk_create([
+        Receipt(
+            laundromat=laundromat, customer=customer,
+            expected_pickup_date=now, items_description='stress',
+            price=Decimal('9.99'), qr_code='qr_codes/stress.png',
+        )
+        for _ in range(receipts)
+    ], batch_size=500)
+
+
+def run_worker(db_path, mode, role, seconds, results):
+    setup_django(db_path, mode)
+    from django.db import OperationalError, transaction
+    from django.db.models import Count, Sum
+    from apps.receipts.models import Receipt
+
+    statuses = [choice for choice, _ in Receipt.STATUS_CHOICES]
+    ids = list(Receipt.objects.values_list('id', flat=True))
+    ops = errors = 0
+    latencies = []
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == 'writer':
+                with transaction.atomic():
+                    receipt = Receipt.objects.get(pk=random.choice(ids))
+                    receipt.status = random.choice(statuses)
+                    receipt.save(update_fields=['status', 'updated_at'])
+            else:
+                list(Receipt.objects.values('status').annotate(
+                    count=Count('id'), revenue=Sum('price')
+                ))
+            ops += 1
+            latencies.append(time.perf_counter() - started)
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            errors += 1
+
+    results.put((role, ops, errors, latencies))
+
+
+def run_mode(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'stress.sqlite3'
+        env = {**os.environ, **MODES[mode], 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+
+        ctx = multiprocessing.get_context('spawn')
+        seeder = ctx.Process(target=seed, args=(db_path, mode, args.receipts))
+        seeder.start()
+        seeder.join()
+
+        results = ctx.Queue()
+        workers = [
+            ctx.Process(target=run_worker, args=(db_path, mode, role, args.seconds, results))
+            for role in ['writer'] * args.writers + ['reader'] * args.readers
+        ]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    summary = {}
+    for role in ('writer', 'reader'):
+        rows = [row for row in collected if row[0] == role]
+        ops = sum(row[1] for row in rows)
+        errors = sum(row[2] for row in rows)
+        latencies = sorted(lat for row in rows for lat in row[3])
+        summary[role] = {
+            'ops_per_sec': ops / args.seconds,
+            'error_rate': errors / (ops + errors) if ops + errors else 0.0,
+            'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+            'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--receipts', type=int, default=5000)
+    parser.add_argument('--mode', choices=list(MODES), action='append')
+    args = parser.parse_args()
+
+    print(f'{args.writers} writers, {args.readers} readers, {args.seconds}s, {args.receipts} receipts')
+    print(f'{"mode":<12}{"role":<8}{"ops/s":>10}{"locked":>10}{"p50 ms":>10}{"p95 ms":>10}')
+    for mode in args.mode or list(MODES):
+        for role, stats in run_mode(mode, args).items():
+            print(
+                f'{mode:<12}{role:<8}{stats["ops_per_sec"]:>10.1f}'
+                f'{stats["error_rate"]:>9.1%}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
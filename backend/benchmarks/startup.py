@@ -0,0 +1,41 @@
+"""
+Worker cold start: time to first response and peak RSS.
+
+Starts the app --runs times in fresh interpreters (config/startup.py), each
+serving one request in-process, as it is and with ReportLab, qrcode and
+Pillow imported up front as they were before being deferred to first use.
+Reports the median setup time, first-request time, time from process
+start to the first response and peak RSS of each.
+
+Usage (from backend/):
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+from statistics import median
+
+from config import startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/api/receipts/')
+    args = parser.parse_args()
+
+    print(f'{args.runs} cold starts each, serving {args.path}, medians')
+    print(f"{'imports':<28}{'setup ms':>10}{'first req ms':>14}{'to response ms':>16}{'RSS MB':>9}")
+    for label, import_deferred in (('deferred (current)', False), ('eager', True)):
+        runs = [startup.measure(args.path, import_deferred=import_deferred) for _ in range(args.runs)]
+        rss = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+        print(
+            f'{label:<28}'
+            f"{median(run['setup_ms'] for run in runs):10.1f}"
+            f"{median(run['first_request_ms'] for run in runs):14.1f}"
+            f"{median(run['time_to_first_response_ms'] for run in runs):16.1f}"
+            f"{median(rss) if rss else float('nan'):9.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Time to first byte and peak memory of a streamed list vs a buffered one.
+
+Seeds a fresh database with --rows customers and requests
+/api/users/customers/ (streamed by config/streaming.py), then builds the
+same body the pre-streaming way: serialize the whole queryset, then render
+it. Reports the time to the first row, the total time and the peak Python
+heap (tracemalloc) of each.
+
+Usage (from backend/):
+
+    python -m benchmarks.streaming --rows 50000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.serializers import BACKEND_DIR, setup_django
+
+
+def seed(rows):
+    from apps.users.models import User
+
+    User.objects.create_user(username='bench_admin', password='x', phone='+15550000000', role='admin')
+    User.objects.bulk_create([
+        User(
+            username=f'bench{index}', phone=f'+1555{index:07d}', email=f'bench{index}@example.com',
+            first_name='Bench', last_name=str(index), password='!',
+        )
+        for index in range(1, rows + 1)
+    ], batch_size=1000)
+
+
+def measure(produce):
+    """(seconds to first row, total seconds, peak MB, bytes) for a chunk iterable"""
+    started = time.perf_counter()
+    first_row = None
+    size = 0
+    for chunk in produce():
+        if first_row is None and chunk not in (b'[', b''):
+            first_row = time.perf_counter() - started
+        size += len(chunk)
+    total = time.perf_counter() - started
+
+    # Again under tracemalloc, which slows everything down too much to time
+    tracemalloc.start()
+    for chunk in produce():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_row or total, total, peak / 2 ** 20, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'streaming.sqlite3'
+        env = {**os.environ, 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+        setup_django(db_path)
+        seed(args.rows)
+
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.request import Request
+        from rest_framework.test import APIClient, APIRequestFactory
+        from apps.users.models import User
+        from apps.users.serializers import UserSerializer
+
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(User.objects.get(username='bench_admin'))
+        request = Request(APIRequestFactory().get('/api/users/customers/', HTTP_HOST='localhost'))
+
+        def streamed():
+            return client.get('/api/users/customers/').streaming_content
+
+        def buffered():
+            customers = User.objects.filter(role='customer')
+            data = UserSerializer(customers, many=True, context={'request': request}).data
+            return [JSONRenderer().render(data)]
+
+        print(f'{args.rows} customers')
+        print(f'{"mode":<10}{"first row ms":>14}{"total ms":>10}{"peak MB":>10}{"body MB":>10}')
+        for name, produce in (('buffered', buffered), ('streamed', streamed)):
+            first_row, total, peak, size = measure(produce)
+            print(f'{name:<10}{first_row * 1000:>14.1f}{total * 1000:>10.1f}{peak:>10.1f}{size / 2 ** 20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Rows per second and peak memory of the Excel export vs the CSV export.
+
+Seeds a fresh database with --rows receipts, then runs
+/api/analytics/export/xlsx/ and /api/analytics/export/csv/ (time_range=year)
+each in a fresh process, as an admin, reading the whole body. Reports
+rows per second, the body size, the process's peak RSS and how far it
+grew over the RSS after Django had started. The xlsx growth should stay
+about the same at 20k and 200k rows; the CSV response is built in memory.
+
+Usage (from backend/):
+
+    python -m benchmarks.xlsx_export --rows 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.serializers import BACKEND_DIR, seed, setup_django
+from config.startup import peak_rss_mb
+
+FORMATS = ('xlsx', 'csv')
+
+
+def run_export(db_path, export_format):
+    """In a fresh process: time one export and report its memory"""
+    setup_django(db_path)
+    from rest_framework.test import APIClient
+    from apps.users.models import User
+
+    client = APIClient(HTTP_HOST='localhost')
+    client.force_authenticate(User.objects.get(username='bench_admin'))
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    response = client.get(f'/api/analytics/export/{export_format}/', {'time_range': 'year'})
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    seconds = time.perf_counter() - started
+    assert response.status_code == 200, response.status_code
+    print(json.dumps({
+        'seconds': seconds, 'bytes': size, 'baseline_mb': baseline, 'peak_mb': peak_rss_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--child', choices=FORMATS, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_export(args.db, args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'xlsx_export.sqlite3'
+        env = {**os.environ, 'DB_NAME': str(db_path), 'DB_REPLICAS': ''}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+        setup_django(db_path)
+        seed(args.rows)
+        from apps.users.models import User
+        User.objects.create_user(username='bench_admin', password='x', phone='+19990000000', role='admin')
+
+        print(f'{args.rows} receipts')
+        print(f'{"format":<8}{"rows/s":>10}{"seconds":>10}{"body MB":>10}{"peak RSS MB":>13}{"growth MB":>11}')
+        for export_format in FORMATS:
+            result = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.xlsx_export', '--child', export_format, '--db', str(db_path)],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+            )
+            report = json.loads(result.stdout.splitlines()[-1])
+            print(
+                f'{export_format:<8}{args.rows / report["seconds"]:>10.0f}{report["seconds"]:>10.2f}'
+                f'{report["bytes"] / 2 ** 20:>10.1f}{report["peak_mb"]:>13.1f}'
+                f'{report["peak_mb"] - report["baseline_mb"]:>11.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Admin changelists for tables with millions of rows.
+
+Django's changelist runs an exact ``COUNT(*)`` for its paginator and a
+second one for the "N total" link next to the search box. On a large
+table either can take longer than the page itself. LargeTableAdminMixin:
+
+- drops the second count (``show_full_result_count = False``), and
+- paginates with EstimatedCountPaginator, which for an unfiltered list
+  reads the row count from database statistics once the table is bigger
+  than ADMIN_ESTIMATED_COUNT_THRESHOLD. Filtered lists, which the admins'
+  list_filters keep on indexed columns, are still counted exactly.
+
+The admins using it also set list_select_related for whatever list_display
+and __str__ read, and use autocomplete widgets for foreign keys to big
+tables instead of <select>s listing every row.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, models
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using):
+    """The table's approximate row count from statistics, or None"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql, params = 'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [table]
+    elif connection.vendor == 'mysql':
+        sql, params = (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s'
+        ), [table]
+    elif connection.vendor == 'sqlite' and isinstance(model._meta.pk, models.IntegerField):
+        # SQLite keeps no row count; the id span is two index lookups
+        pk = quote(model._meta.pk.column)
+        sql, params = f'SELECT MAX({pk}) - MIN({pk}) + 1 FROM {quote(table)}', []
+    else:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    # PostgreSQL reports -1 for a table that has never been analyzed
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the count of a large, unfiltered queryset"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """ModelAdmin mixin for changelists of tables with millions of rows"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -9,8 +9,27 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+
+class AsyncRoutesASGIHandler(ASGIHandler):
+    """
+    Routes every request through config/urls_asgi.py, which serves the
+    hottest read endpoints with async views. The URLconf is set on each
+    request rather than in settings, so nothing else that imports this
+    module (or runs in the same process) sees it.
+    """
+    urlconf = 'config.urls_asgi'
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+
+django.setup(set_prefix=False)
+application = AsyncRoutesASGIHandler()
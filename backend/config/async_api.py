@@ -0,0 +1,182 @@
+"""
+Helpers for the async read endpoints served under ASGI.
+
+DRF views are synchronous, so under ASGI every request to them runs in
+Django's thread-sensitive executor. The async views in ``apps/*/async_views.py``
+serve the hottest GET routes on the event loop instead. They reuse each
+viewset's queryset scoping, filters, pagination settings and serializers,
+and only swap database access for the async ORM, so responses match the
+DRF views.
+
+Anything these views do not handle - other methods, or browsers asking for
+the browsable API - falls through to the sync view in ``config.urls``.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.http import Http404, HttpResponse
+from django.urls import resolve
+from django.utils.cache import patch_vary_headers
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from config.renderers import FastJSONRenderer
+
+# URLconf holding the sync DRF views the async ones stand in for.
+SYNC_URLCONF = 'config.urls'
+
+READ_METHODS = ('GET', 'HEAD')
+
+json_renderer = FastJSONRenderer()
+jwt_authentication = JWTAuthentication()
+
+
+def json_response(data, status=200, headers=None):
+    """Render `data` exactly as the DRF views' JSON renderer would."""
+    response = HttpResponse(
+        json_renderer.render(data),
+        status=status,
+        content_type=json_renderer.media_type,
+        headers=headers,
+    )
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+async def authenticate(request):
+    """
+    Async counterpart of JWTAuthentication.authenticate().
+
+    The user is loaded with its laundromat so role scoping can read
+    `user.laundromat` without a sync query on the event loop.
+    """
+    header = jwt_authentication.get_header(request)
+    if header is None:
+        raise NotAuthenticated()
+    raw_token = jwt_authentication.get_raw_token(header)
+    if raw_token is None:
+        raise NotAuthenticated()
+
+    validated_token = jwt_authentication.get_validated_token(raw_token)
+    try:
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    User = get_user_model()
+    try:
+        user = await User.objects.select_related('laundromat').aget(
+            **{jwt_settings.USER_ID_FIELD: user_id}
+        )
+    except User.DoesNotExist:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    return user
+
+
+async def call_sync_view(request):
+    """Serve the request with the DRF view registered for this path."""
+    match = resolve(request.path_info, urlconf=SYNC_URLCONF)
+    return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+
+def handle_exception(request, exc):
+    """Turn an exception into the same response DRF's APIView would send."""
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        exc.auth_header = jwt_authentication.authenticate_header(request)
+    response = exception_handler(exc, {})
+    if response is None:
+        raise exc
+    headers = {
+        name: value for name, value in response.headers.items()
+        if name in ('WWW-Authenticate', 'Retry-After')
+    }
+    return json_response(response.data, status=response.status_code, headers=headers)
+
+
+def async_api_view(view):
+    """
+    Wrap an async read view: authenticate with the JWT, call
+    ``view(request, *args, **kwargs)`` with a DRF Request and render
+    exceptions the DRF way. Non-read methods and HTML requests fall through
+    to the sync view.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in READ_METHODS or 'text/html' in request.headers.get('Accept', ''):
+            return await call_sync_view(request)
+
+        drf_request = Request(request)
+        try:
+            drf_request.user = await authenticate(request)
+            return await view(drf_request, *args, **kwargs)
+        except (APIException, Http404) as exc:
+            return handle_exception(request, exc)
+
+    # Like DRF views, these authenticate with a JWT rather than a session.
+    # (Django 4.2's csrf_exempt decorator does not support async views.)
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+def get_viewset(viewset_class, request, action, **kwargs):
+    """Instantiate a viewset for its queryset, filter and serializer logic."""
+    return viewset_class(
+        request=request, action=action, format_kwarg=None, args=(), kwargs=kwargs
+    )
+
+
+async def filter_queryset(view, queryset):
+    """
+    Apply the viewset's filter backends and filter_queryset() override.
+    Either may query (foreign-key filters validate their value, ?q= reads
+    the search index), so this always runs in a thread.
+    """
+    return await sync_to_async(view.filter_queryset)(queryset)
+
+
+async def get_object_or_404(queryset, **filter_kwargs):
+    """Async counterpart of rest_framework.generics.get_object_or_404."""
+    try:
+        return await queryset.aget(**filter_kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+    except (TypeError, ValueError, ValidationError):
+        raise Http404
+
+
+async def paginate_queryset(paginator, queryset, request):
+    """
+    Async counterpart of PageNumberPagination.paginate_queryset. Leaves the
+    paginator ready for get_paginated_response().
+    """
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    # Prime the cached count so the paginator never queries synchronously.
+    django_paginator.count = await queryset.acount()
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        number = django_paginator.validate_number(page_number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(
+            page_number=page_number, message=str(exc)
+        ))
+
+    bottom = (number - 1) * page_size
+    objects = [obj async for obj in queryset[bottom:bottom + page_size]]
+    paginator.page = Page(objects, number, django_paginator)
+    paginator.request = request
+    return objects
@@ -0,0 +1,178 @@
+"""
+POST /api/batch/ - several GET requests in one round trip.
+
+The body lists relative GET requests:
+
+    {"requests": [
+        {"id": "me", "path": "/api/users/me/"},
+        {"id": "video", "path": "videos/by_receipt/", "params": {"receipt_id": 7}}
+    ]}
+
+Each one is resolved against config.urls and run in-process as the caller,
+without re-authenticating. Sub-requests are read-only, so they run
+concurrently on up to BATCH_MAX_WORKERS threads, each with its own database
+connection. Inside an open transaction (e.g. ATOMIC_REQUESTS or tests) they
+run one after another instead, because other threads could not see its
+uncommitted rows. An item whose view raises gets a 500 of its own (logged
+like any unhandled error) rather than failing the batch. The response keeps
+the request order and reports every item's status code, body and time taken:
+
+    {"duration_ms": 41.2, "concurrent": true, "responses": [
+        {"id": "me", "path": "/api/users/me/", "status": 200,
+         "duration_ms": 12.9, "body": {...}},
+        ...
+    ]}
+"""
+import io
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from config.db_router import request_routing
+
+# URLconf the sub-requests are resolved against. It holds the sync views,
+# which can run on worker threads under both WSGI and ASGI.
+BATCH_URLCONF = 'config.urls'
+API_PREFIX = '/api/'
+BATCH_PATH = '/api/batch/'
+
+# Where Django's handler logs unhandled view errors
+logger = logging.getLogger('django.request')
+
+
+class BatchItemSerializer(serializers.Serializer):
+    id = serializers.CharField(max_length=100, required=False)
+    path = serializers.CharField(max_length=2000)
+    params = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False)
+
+    def validate_path(self, value):
+        path = value if value.startswith('/') else API_PREFIX + value
+        if not path.startswith(API_PREFIX):
+            raise serializers.ValidationError(f'Only paths under {API_PREFIX} can be batched')
+        if urlsplit(path).path.rstrip('/') == BATCH_PATH.rstrip('/'):
+            raise serializers.ValidationError('Batches cannot be nested')
+        return path
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'At most {limit} requests per batch')
+        return value
+
+
+class BatchView(APIView):
+    """Run a list of GET requests as the caller and return all responses"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = BatchSerializer
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['requests']
+
+        started = time.perf_counter()
+        workers = min(getattr(settings, 'BATCH_MAX_WORKERS', 4), len(items))
+        concurrent = workers > 1 and not any(
+            connection.in_atomic_block for connection in connections.all()
+        )
+        if concurrent:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as pool:
+                responses = list(pool.map(lambda item: self.run_in_thread(request, item), items))
+        else:
+            responses = [self.run(request, item) for item in items]
+
+        return Response({
+            'duration_ms': elapsed_ms(started),
+            'concurrent': concurrent,
+            'responses': responses,
+        })
+
+    def run_in_thread(self, request, item):
+        try:
+            return self.run(request, item)
+        finally:
+            # Worker threads open their own connections; don't leak them
+            connections.close_all()
+
+    def run(self, request, item):
+        """Run one sub-request and describe its response"""
+        started = time.perf_counter()
+        path, _, query = item['path'].partition('?')
+        if item.get('params'):
+            query = '&'.join(filter(None, [query, urlencode(item['params'])]))
+        result = {'id': item.get('id'), 'path': item['path']}
+
+        try:
+            match = resolve(path, urlconf=BATCH_URLCONF)
+        except Resolver404:
+            return {**result, 'status': status.HTTP_404_NOT_FOUND,
+                    'duration_ms': elapsed_ms(started), 'body': {'detail': 'Not found.'}}
+
+        # Each sub-request is a fresh read-only request for routing purposes
+        try:
+            with request_routing():
+                response = match.func(self.build_request(request, path, query), *match.args, **match.kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+        except Exception:
+            logger.exception('Internal Server Error in batch item: %s', path)
+            return {**result, 'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    'duration_ms': elapsed_ms(started), 'body': {'detail': 'A server error occurred.'}}
+
+        return {
+            **result,
+            'status': response.status_code,
+            'duration_ms': elapsed_ms(started),
+            'body': decode_body(content, response.get('Content-Type', '')),
+        }
+
+    def build_request(self, request, path, query):
+        """A GET request for `path` carrying the caller's headers and identity"""
+        environ = {key: value for key, value in request.META.items() if isinstance(value, str)}
+        environ.update({
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': query,
+            'CONTENT_LENGTH': '0',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.url_scheme': request.scheme,
+        })
+        environ.pop('CONTENT_TYPE', None)
+        sub_request = WSGIRequest(environ)
+        sub_request.user = request.user
+        # DRF's hook for reusing an authenticated identity (as in its test client)
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
+
+
+def decode_body(content, content_type):
+    """JSON bodies are embedded as data, text as a string, anything else as null"""
+    if not content:
+        return None
+    if content_type.startswith('application/json'):
+        return json.loads(content)
+    if content_type.startswith('text/'):
+        return content.decode('utf-8', errors='replace')
+    return None
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
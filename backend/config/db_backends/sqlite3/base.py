@@ -0,0 +1,56 @@
+"""
+SQLite backend tuned for several worker processes sharing one database file.
+
+Stock SQLite uses a rollback journal, so a writer blocks every reader, and
+Django opens transactions with a deferred ``BEGIN``. A deferred transaction
+that reads first and writes later has to upgrade its lock; if another
+connection wrote in the meantime the upgrade fails with "database is locked"
+immediately, without waiting for busy_timeout.
+
+This backend fixes both on connection creation:
+
+- ``journal_mode=WAL`` lets readers run alongside a writer.
+- ``busy_timeout`` makes writers queue for the lock instead of failing.
+- ``synchronous=NORMAL`` is durable in WAL mode except across power loss,
+  and avoids an fsync per commit.
+- ``mmap_size`` and ``cache_size`` keep hot pages in memory.
+- Transactions start with ``BEGIN IMMEDIATE`` so the write lock is taken up
+  front, where busy_timeout applies.
+
+Enable it with ``DB_SQLITE_CONCURRENT=True``; each pragma can be tuned
+through OPTIONS (see config/settings.py).
+"""
+from django.db.backends.sqlite3 import base
+
+# OPTIONS keys consumed here rather than passed to sqlite3.connect().
+PRAGMA_DEFAULTS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative values are KiB rather than pages: 64 MiB.
+    'cache_size': -64000,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {
+            name: kwargs.pop(name, default)
+            for name, default in PRAGMA_DEFAULTS.items()
+        }
+        # sqlite3's own busy handler, used while connecting.
+        kwargs.setdefault('timeout', self.pragmas['busy_timeout'] / 1000)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        """Take the write lock when the transaction starts, not on first write."""
+        self.cursor().execute('BEGIN IMMEDIATE')
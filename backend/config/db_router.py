@@ -0,0 +1,172 @@
+"""
+Database routing for a primary database plus optional read replicas.
+
+Only reads made inside ``read_from_replica()`` (or a view using
+``ReadReplicaMixin``) are sent to a replica; every write, and every read
+outside that scope, uses ``default``. Once a request has written - or if it
+is an unsafe method to begin with - the rest of that request reads from the
+primary, so it always sees its own writes.
+
+Replicas are configured in settings via ``DB_REPLICAS`` and listed in
+``DATABASE_REPLICAS``. With no replicas configured the router always returns
+``default``.
+"""
+import contextvars
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_routing_state = contextvars.ContextVar('db_routing_state', default=None)
+
+# alias -> (healthy, monotonic time of last check)
+_replica_health = {}
+
+
+class RoutingState:
+    """Per-request routing flags, mutated by the router as queries run."""
+    __slots__ = ('use_replica', 'pinned')
+
+    def __init__(self, pinned=False):
+        self.use_replica = False
+        self.pinned = pinned
+
+
+@contextmanager
+def request_routing(pinned=False):
+    """Give the enclosed request its own routing state."""
+    state = RoutingState(pinned=pinned)
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+@contextmanager
+def read_from_replica():
+    """Send reads inside this block to a replica, unless pinned to primary."""
+    state = _routing_state.get()
+    token = None
+    if state is None:
+        state = RoutingState()
+        token = _routing_state.set(state)
+
+    previous = state.use_replica
+    state.use_replica = True
+    try:
+        yield state
+    finally:
+        state.use_replica = previous
+        if token is not None:
+            _routing_state.reset(token)
+
+
+def replica_is_healthy(alias):
+    """
+    Check that a replica answers a query against a table every migrated
+    database has, caching the result for DATABASE_REPLICA_HEALTH_CHECK_SECONDS
+    so a dead replica costs at most one failed attempt per interval.
+
+    Connecting to a SQLite path that does not exist creates an empty
+    database there, so a missing file counts as unhealthy without
+    connecting.
+    """
+    interval = getattr(settings, 'DATABASE_REPLICA_HEALTH_CHECK_SECONDS', 30)
+    now = time.monotonic()
+    cached = _replica_health.get(alias)
+    if cached is not None and now - cached[1] < interval:
+        return cached[0]
+
+    try:
+        connection = connections[alias]
+        if (
+            connection.vendor == 'sqlite'
+            and not connection.is_in_memory_db()
+            and not os.path.exists(connection.settings_dict['NAME'])
+        ):
+            healthy = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+            healthy = True
+    except Exception:
+        healthy = False
+
+    _replica_health[alias] = (healthy, now)
+    return healthy
+
+
+class ReplicaRouter:
+    """Route replica-scoped reads to a healthy replica, everything else to default."""
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or not state.use_replica or state.pinned:
+            return 'default'
+
+        # Reads inside a transaction on the primary must see its writes.
+        if connections['default'].in_atomic_block:
+            return 'default'
+
+        replicas = [
+            alias for alias in getattr(settings, 'DATABASE_REPLICAS', [])
+            if replica_is_healthy(alias)
+        ]
+        if not replicas:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.pinned = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any alias can relate.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication.
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Start each request with fresh routing state. Unsafe methods are pinned to
+    the primary from the first query.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_routing(pinned=request.method not in SAFE_METHODS):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with request_routing(pinned=request.method not in SAFE_METHODS):
+            return await self.get_response(request)
+
+
+class ReadReplicaMixin:
+    """ViewSet mixin that serves the view's reads from a read replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,73 @@
+"""
+Downloads of generated files held in memory (PDF reports, exports).
+
+bytes_response() sends a bytes body with Content-Length and, when the
+content has an ETag, answers conditional and partial requests from it:
+
+- ``If-None-Match`` with the current ETag gets a 304 without a body.
+- A single ``Range: bytes=...`` gets a 206 with that slice, unless
+  ``If-Range`` names another version. Unsatisfiable ranges get a 416;
+  multi-range requests get the whole file, which HTTP allows.
+"""
+import re
+
+from django.http import HttpResponse, HttpResponseNotModified
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single-range header, None to ignore the
+    header, or False when the range lies outside the content.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # The final N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # Syntactically invalid, so ignored rather than unsatisfiable
+        return None
+    if start >= size:
+        return False
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def bytes_response(request, content, content_type, filename=None, etag=None):
+    quoted_etag = f'"{etag}"' if etag else None
+    if quoted_etag and quoted_etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = quoted_etag
+        return response
+
+    size = len(content)
+    byte_range = None
+    if quoted_etag and 'Range' in request.headers:
+        if_range = request.headers.get('If-Range')
+        if if_range is None or if_range == quoted_etag:
+            byte_range = parse_range(request.headers['Range'], size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range:
+        start, end = byte_range
+        response = HttpResponse(content[start:end + 1], content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        response = HttpResponse(content, content_type=content_type)
+
+    response['Content-Length'] = str(len(response.content))
+    if quoted_etag:
+        response['ETag'] = quoted_etag
+        response['Accept-Ranges'] = 'bytes'
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,179 @@
+"""
+values()-based serialization for read-only list actions.
+
+DRF's ModelSerializer builds a model instance per row and then, per field,
+resolves its source, calls get_attribute and to_representation and fills
+an OrderedDict. For the plain list serializers that is most of the CPU
+time of a list request. RowSerializer compiles each serializer class once
+per process into:
+
+- the values_list() lookups its fields read (``customer.username`` becomes
+  ``customer__username``, so no related instances are built), and
+- a generated ``row -> dict`` function that only calls a converter where
+  the value needs one (dates, decimals, choices, file URLs).
+
+Converters are the bound DRF fields' own to_representation methods, so the
+rendered JSON is byte-identical to the serializer's. Converters that need
+the serializer context (file URLs are absolute for the request) are built
+per request from factories and passed to the compiled function. Fields it cannot
+compile (SerializerMethodFields, nested serializers, properties) need an
+entry in ``Meta.fast_fields``, mapping the field name to ``(lookup,
+factory)`` where ``factory(context)`` returns the converter for that
+column. Otherwise compiling raises TypeError.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from config.streaming import stream_chunk_size, streaming_list_response
+
+# to_representation methods that return a database value unchanged
+PASSTHROUGH_METHODS = {
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+    serializers.BooleanField.to_representation,
+}
+
+
+def absolute_file_url(model, field_name):
+    """Converter factory: stored file name -> URL, as DRF's FileField renders it"""
+    storage = model._meta.get_field(field_name).storage
+
+    def factory(context):
+        request = context.get('request')
+
+        def convert(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+    return factory
+
+
+class RowSerializer:
+    """A serializer class compiled for values_list() rows"""
+
+    # serializer class -> (lookups, context factories, make_to_dict)
+    plans = {}
+
+    def __init__(self, serializer_class, context=None):
+        self.context = context or {}
+        plan = self.plans.get(serializer_class)
+        if plan is None:
+            plan = self.plans[serializer_class] = self.compile(serializer_class)
+        self.lookups, factories, make_to_dict = plan
+        # Only converters that read the context (file URLs need the request) are bound per call
+        self.to_dict = make_to_dict(*(factory(self.context) for factory in factories))
+
+    @classmethod
+    def compile(cls, serializer_class):
+        """The plan for `serializer_class`, shared by every request that serializes with it"""
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        fast_fields = getattr(serializer.Meta, 'fast_fields', {})
+
+        lookups = []
+        columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in fast_fields:
+                lookup, factory = fast_fields[name]
+                converter = None
+            else:
+                lookup, converter, factory = cls.compile_field(model, name, field)
+            lookups.append(lookup)
+            columns.append((name, converter, factory))
+        factories = [factory for _, _, factory in columns if factory is not None]
+        return lookups, factories, cls.build_function(columns)
+
+    @staticmethod
+    def compile_field(model, name, field):
+        """(lookup, converter, factory); a factory builds the converter from the context"""
+        if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+            raise TypeError(f'{name}: add it to Meta.fast_fields to serialize it from rows')
+        try:
+            model_field = model._meta.get_field(field.source.split('.')[0])
+        except FieldDoesNotExist:
+            raise TypeError(f'{name}: {field.source} is not a model field; add it to Meta.fast_fields')
+        # A foreign key's own column (laundromat_id) is read like any other
+        if model_field.is_relation and '.' not in field.source and field.source != model_field.attname and not isinstance(
+            field, serializers.PrimaryKeyRelatedField
+        ):
+            raise TypeError(f'{name}: add it to Meta.fast_fields to serialize it from rows')
+
+        lookup = field.source.replace('.', '__')
+        if isinstance(field, serializers.FileField):
+            if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+                return lookup, None, None
+            return lookup, None, absolute_file_url(model, field.source)
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # values_list() reads the key itself, not the related instance
+            pk_field = field.pk_field
+            return lookup, None if pk_field is None else pk_field.to_representation, None
+        if type(field).to_representation in PASSTHROUGH_METHODS:
+            return lookup, None, None
+        return lookup, field.to_representation, None
+
+    @staticmethod
+    def build_function(columns):
+        """
+        Generate `make_to_dict(*bound) -> (row -> dict)`, with one literal key
+        per field. `columns` are (name, converter, factory); the converters
+        built by the factories are make_to_dict's arguments, in order.
+        """
+        namespace = {}
+        parameters = []
+        items = []
+        for index, (name, converter, factory) in enumerate(columns):
+            if factory is not None:
+                parameters.append(f'convert_{index}')
+            elif converter is not None:
+                namespace[f'convert_{index}'] = converter
+            else:
+                items.append(f'{name!r}: row[{index}]')
+                continue
+            items.append(f'{name!r}: None if row[{index}] is None else convert_{index}(row[{index}])')
+        source = (
+            f'def make_to_dict({", ".join(parameters)}):\n'
+            '    def to_dict(row):\n'
+            '        return {' + ', '.join(items) + '}\n'
+            '    return to_dict\n'
+        )
+        exec(compile(source, '<row serializer>', 'exec'), namespace)
+        return namespace['make_to_dict']
+
+    def rows(self, queryset, *extra):
+        """values_list() queryset for these fields, plus any `extra` lookups"""
+        # Related rows come from the joins in the lookups instead
+        queryset = queryset.select_related(None).prefetch_related(None)
+        return queryset.values_list(*self.lookups, *extra)
+
+    def serialize(self, rows):
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+
+def fast_list_response(view, queryset, serializer_class):
+    """
+    The response of a paginated list action serializing `queryset` with
+    `serializer_class`.
+    """
+    row_serializer = RowSerializer(serializer_class, view.get_serializer_context())
+    rows = row_serializer.rows(queryset)
+    page = view.paginate_queryset(rows)
+    if page is not None:
+        return view.get_paginated_response(row_serializer.serialize(page))
+    return Response(row_serializer.serialize(rows))
+
+
+def fast_streaming_response(view, queryset, serializer_class):
+    """
+    The response of an unpaginated list action: `queryset` streamed as a
+    JSON array (see config/streaming.py), serialized with `serializer_class`.
+    """
+    row_serializer = RowSerializer(serializer_class, view.get_serializer_context())
+    rows = row_serializer.rows(queryset).iterator(chunk_size=stream_chunk_size())
+    return streaming_list_response(view.request, rows, row_serializer.serialize)
@@ -0,0 +1,296 @@
+"""
+Garbage collection of uploaded files nothing refers to any more.
+
+Deleting a receipt deletes its Video rows but not the files under videos/,
+thumbnails/ and qr_codes/, and replacing a profile picture leaves the old
+one behind. collect() (`manage.py gc_media`) removes such files:
+
+1. Every FileField/ImageField value in the database is streamed into
+   ReferencedPaths, a sorted array of 64-bit hashes: 8 bytes per path
+   however long it is. A hash collision can only keep an orphan.
+2. The directories the file fields upload to (their `upload_to` up to the
+   first placeholder, e.g. videos/) are walked by scan_tree() on several
+   threads. Files elsewhere under MEDIA_ROOT are never touched.
+3. Files that are not referenced and were last modified before the grace
+   period are checked once more against the database, in batches, since
+   rows can be written (or moved to the archive) while the walk runs, and
+   are then moved under MEDIA_GC_QUARANTINE_ROOT or deleted.
+
+Progress is saved to MEDIA_GC_STATE_PATH after every CHECKPOINT_EVERY
+directories. A run that stops part way is resumed from there: directories
+already finished are listed again to find their subdirectories, but their
+files are not looked at twice. The state file is removed when a run
+completes.
+"""
+import heapq
+import json
+import os
+import shutil
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from hashlib import blake2b
+from itertools import islice
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+CHECKPOINT_EVERY = 200
+# Orphan candidates checked against the database per query
+CONFIRM_BATCH_SIZE = 500
+
+ACTIONS = ('report', 'quarantine', 'delete')
+
+
+def path_hash(name):
+    return int.from_bytes(blake2b(name.encode(), digest_size=8).digest(), 'little')
+
+
+class ReferencedPaths:
+    """A compact, read-only set of file names: sorted 64-bit hashes"""
+
+    def __init__(self, names=(), run_size=1 << 20):
+        # Sorted in runs and merged so only one run is ever a list of ints
+        runs = []
+        names = iter(names)
+        while run := sorted(map(path_hash, islice(names, run_size))):
+            runs.append(array('Q', run))
+        self.hashes = array('Q', heapq.merge(*runs))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, name):
+        value = path_hash(name)
+        index = bisect_left(self.hashes, value)
+        return index < len(self.hashes) and self.hashes[index] == value
+
+
+def file_fields():
+    """(model, field name) for every file field of the installed models' tables"""
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        if model._meta.managed and not model._meta.proxy
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+def upload_roots(fields):
+    """The top directories `fields` upload to; callables can't be known"""
+    roots = set()
+    for model, name in fields:
+        upload_to = model._meta.get_field(name).upload_to
+        if isinstance(upload_to, str):
+            root = upload_to.split('%')[0].strip('/').split('/')[0]
+            if root:
+                roots.add(root)
+    return sorted(roots)
+
+
+def referenced_names(fields, chunk_size=5000):
+    for model, name in fields:
+        names = model._base_manager.exclude(**{name: ''}).exclude(**{f'{name}__isnull': True})
+        yield from names.values_list(name, flat=True).iterator(chunk_size=chunk_size)
+
+
+def still_referenced(fields, names):
+    """Those of `names` the database refers to now"""
+    found = set()
+    for model, name in fields:
+        found.update(
+            model._base_manager.filter(**{f'{name}__in': names}).values_list(name, flat=True)
+        )
+    return found
+
+
+def list_directory(path):
+    """([(name, size, mtime)], [subdirectory names]) of one directory"""
+    files, directories = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append((entry.name, stat.st_size, stat.st_mtime))
+    except FileNotFoundError:
+        pass
+    return files, directories
+
+
+def scan_tree(root, directories, workers=8):
+    """
+    Yield (relative directory, files) for `directories` under `root` and
+    everything below them, listing up to `workers` directories at a time.
+    Directories come in no particular order.
+    """
+    root = Path(root)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media-gc') as pool:
+        pending = {
+            pool.submit(list_directory, root / directory): directory
+            for directory in directories
+            if (root / directory).is_dir()
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory = pending.pop(future)
+                files, subdirectories = future.result()
+                for name in subdirectories:
+                    child = f'{directory}/{name}'
+                    pending[pool.submit(list_directory, root / child)] = child
+                yield directory, files
+
+
+class Stats:
+    """What a run did; kept in the state file so resumed runs add up"""
+    FIELDS = (
+        'referenced', 'directories', 'files', 'bytes', 'recent', 'orphans', 'orphan_bytes',
+        'reclaimed', 'reclaimed_bytes', 'seconds',
+    )
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field, 0))
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @property
+    def files_per_second(self):
+        return self.files / self.seconds if self.seconds else 0.0
+
+
+class State:
+    """The state file of an unfinished run"""
+
+    def __init__(self, path, cutoff, action, finished=(), stats=None):
+        self.path = Path(path)
+        self.cutoff = cutoff
+        self.action = action
+        self.finished = set(finished)
+        self.stats = stats or Stats()
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text())
+        return cls(path, data['cutoff'], data['action'], data['finished'], Stats(**data['stats']))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(json.dumps({
+            'cutoff': self.cutoff,
+            'action': self.action,
+            'finished': sorted(self.finished),
+            'stats': self.stats.as_dict(),
+        }))
+        # Replaced in one step, so a crash never leaves half a state file
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+def quarantine(source, relative, quarantine_root):
+    target = Path(quarantine_root) / relative
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(source, target)
+
+
+def collect(action='quarantine', grace=None, workers=8, resume=True, media_root=None,
+            quarantine_root=None, state_path=None, log=None):
+    """
+    Find unreferenced uploads older than `grace` (a timedelta, default
+    MEDIA_GC_GRACE_HOURS) and `action` them: 'report' only counts,
+    'quarantine' moves them to `quarantine_root`, 'delete' deletes them.
+    With `resume`, an unfinished run's state file is picked up. Return the
+    run's Stats.
+    """
+    if action not in ACTIONS:
+        raise ValueError(f'action must be one of {", ".join(ACTIONS)}')
+    media_root = Path(media_root or settings.MEDIA_ROOT)
+    quarantine_root = Path(quarantine_root or settings.MEDIA_GC_QUARANTINE_ROOT)
+    state_path = state_path or settings.MEDIA_GC_STATE_PATH
+    if grace is None:
+        grace = timedelta(hours=settings.MEDIA_GC_GRACE_HOURS)
+    log = log or (lambda message: None)
+
+    state = State.load(state_path) if resume else None
+    if state is None or state.action != action:
+        state = State(state_path, (timezone.now() - grace).timestamp(), action)
+    else:
+        log(f'Resuming: {len(state.finished)} directories already done')
+    stats = state.stats
+    started = time.perf_counter() - stats.seconds
+
+    fields = file_fields()
+    referenced = ReferencedPaths(referenced_names(fields))
+    stats.referenced = len(referenced)
+
+    candidates = []
+    # Directories with orphans in `candidates`; done once those are handled
+    waiting = []
+
+    def handle(batch):
+        confirmed = still_referenced(fields, [relative for relative, _ in batch])
+        for relative, size in batch:
+            if relative in confirmed:
+                continue
+            stats.orphans += 1
+            stats.orphan_bytes += size
+            if action == 'report':
+                continue
+            source = media_root / relative
+            try:
+                if action == 'delete':
+                    source.unlink()
+                else:
+                    quarantine(source, relative, quarantine_root)
+            except FileNotFoundError:
+                continue
+            stats.reclaimed += 1
+            stats.reclaimed_bytes += size
+
+    for directory, files in scan_tree(media_root, upload_roots(fields), workers):
+        if directory in state.finished:
+            continue
+        stats.directories += 1
+        for name, size, mtime in files:
+            stats.files += 1
+            stats.bytes += size
+            relative = f'{directory}/{name}'
+            if relative in referenced:
+                continue
+            if mtime >= state.cutoff:
+                stats.recent += 1
+                continue
+            candidates.append((relative, size))
+        waiting.append(directory)
+        if len(candidates) >= CONFIRM_BATCH_SIZE:
+            handle(candidates)
+            candidates = []
+        if not candidates:
+            state.finished.update(waiting)
+            waiting = []
+        if stats.directories % CHECKPOINT_EVERY == 0:
+            stats.seconds = time.perf_counter() - started
+            state.save()
+            log(f'{stats.directories} directories, {stats.files} files, {stats.orphans} orphans so far')
+    if candidates:
+        handle(candidates)
+
+    stats.seconds = time.perf_counter() - started
+    state.clear()
+    return stats
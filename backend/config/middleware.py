@@ -0,0 +1,193 @@
+"""
+Project middleware.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_PATH_PREFIX = '/api/'
+# Responses carrying credentials are never compressed: brotli output has no
+# random padding like gzip's max_random_bytes to blunt BREACH, and a token
+# response is too small for compression to matter
+UNCOMPRESSED_PATH_PREFIXES = ('/api/auth/',)
+# Content types worth compressing; everything else (video, images, PDF) is
+# served as is
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/vnd.oai.openapi',
+    'application/xml',
+    'application/javascript',
+    'text/',
+)
+# Brotli's quality 11 is for static assets; 5 compresses API payloads better
+# than gzip at similar CPU cost
+BROTLI_QUALITY = 5
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise that also runs natively under ASGI.
+
+    Upstream WhiteNoise is sync-only, which makes Django run the whole
+    middleware chain - and every async view below it - through a worker
+    thread. Here only requests under STATIC_URL leave the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if request.path_info.startswith(self.static_prefix):
+            response = await sync_to_async(self.process_request)(request)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    gzip or brotli for /api/ responses, negotiated from Accept-Encoding.
+
+    Only responses at least COMPRESS_MIN_SIZE bytes long and of a textual
+    content type (JSON, CSV, the OpenAPI schema) are compressed; media such
+    as videos, QR code images and PDFs is already compressed and is left
+    alone, as are partial (Range) responses and the token endpoints under
+    /api/auth/. Brotli is used when the client prefers it and the brotli
+    package is installed. Streaming responses are compressed chunk by chunk.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESS_MIN_SIZE', 1024)
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        # Compression is CPU only, so it runs on the event loop
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not request.path_info.startswith(COMPRESS_PATH_PREFIX):
+            return response
+        if request.path_info.startswith(UNCOMPRESSED_PATH_PREFIXES):
+            return response
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compressors = ASYNC_STREAM_COMPRESSORS if response.is_async else STREAM_COMPRESSORS
+            response.streaming_content = compressors[encoding](response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = COMPRESSORS[encoding](response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body is not byte-for-byte the entity the ETag names
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def negotiate_encoding(accept_encoding, supported):
+    """
+    The first of `supported` (in server preference order) with the highest
+    q-value in `accept_encoding`, or None when none is acceptable.
+    """
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name:
+            weights[name.lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in supported:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def brotli_compress_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def brotli_compress_async_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    async for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def gzip_compress_async_sequence(sequence):
+    # Each chunk becomes a gzip member; clients read concatenated members
+    async for chunk in sequence:
+        yield compress_string(chunk, max_random_bytes=GZipMiddleware.max_random_bytes)
+
+
+COMPRESSORS = {
+    'br': lambda content: brotli.compress(content, quality=BROTLI_QUALITY),
+    'gzip': lambda content: compress_string(content, max_random_bytes=GZipMiddleware.max_random_bytes),
+}
+STREAM_COMPRESSORS = {
+    'br': brotli_compress_sequence,
+    'gzip': lambda sequence: compress_sequence(sequence, max_random_bytes=GZipMiddleware.max_random_bytes),
+}
+ASYNC_STREAM_COMPRESSORS = {
+    'br': brotli_compress_async_sequence,
+    'gzip': gzip_compress_async_sequence,
+}
@@ -0,0 +1,49 @@
+"""
+JSON rendering for the API.
+
+FastJSONRenderer is DRF's JSONRenderer on top of orjson: datetimes, dates,
+UUIDs and dict/list subclasses (ReturnDict, ReturnList) are encoded in C,
+and anything else orjson does not know - Decimal, lazy strings, timedeltas,
+querysets - goes through DRF's own encoder, so the bytes match what the
+stock renderer produces for the same data. Indented output (the browsable
+API, ``Accept: application/json; indent=4``), settings orjson cannot honour
+and payloads it rejects (integers wider than 64 bits) fall back to the
+stock renderer. Without orjson installed it is the stock renderer.
+"""
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson where the output is identical"""
+    default = staticmethod(encoders.JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict-javascript-subset escaping as JSONRenderer
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
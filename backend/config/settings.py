@@ -4,7 +4,7 @@ Django settings for Lavendia project.
 
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,20 +48,25 @@ INSTALLED_APPS = [
     'apps.receipts',
     'apps.videos',
     'apps.analytics',
+    'apps.notifications',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files
+    'config.middleware.WhiteNoiseMiddleware',  # Serve static files
+    'config.middleware.CompressionMiddleware',  # gzip/brotli for /api/ responses
     'corsheaders.middleware.CorsMiddleware',  # CORS
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.db_router.ReplicaPinningMiddleware',  # Read-your-writes for replicas
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Requests through config/asgi.py use config.urls_asgi instead, which serves
+# the hottest read endpoints with async views.
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -83,13 +88,77 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite by default. Set DB_ENGINE (e.g. django.db.backends.postgresql) and
+# the DB_* connection variables to use another backend.
+DB_ENGINE = config('DB_ENGINE', default='django.db.backends.sqlite3')
+DB_IS_SQLITE = DB_ENGINE == 'django.db.backends.sqlite3'
+
+# Opt-in SQLite mode for several gunicorn workers sharing one database file:
+# WAL journaling, busy timeout and BEGIN IMMEDIATE transactions. See
+# config/db_backends/sqlite3/base.py.
+DB_SQLITE_CONCURRENT = config('DB_SQLITE_CONCURRENT', default=False, cast=bool)
+
+
+def database_config(name=None, host=None, port=None):
+    """Build a DATABASES entry sharing the primary's engine and credentials"""
+    if DB_IS_SQLITE:
+        if DB_SQLITE_CONCURRENT:
+            return {
+                'ENGINE': 'config.db_backends.sqlite3',
+                'NAME': BASE_DIR / (name or config('DB_NAME', default='db.sqlite3')),
+                'OPTIONS': {
+                    'journal_mode': 'WAL',
+                    'busy_timeout': config('DB_SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+                    'synchronous': config('DB_SQLITE_SYNCHRONOUS', default='NORMAL'),
+                    'mmap_size': config('DB_SQLITE_MMAP_SIZE', default=268435456, cast=int),
+                    'cache_size': config('DB_SQLITE_CACHE_SIZE', default=-64000, cast=int),
+                },
+            }
+        return {
+            'ENGINE': DB_ENGINE,
+            'NAME': BASE_DIR / (name or config('DB_NAME', default='db.sqlite3')),
+        }
+
+    return {
+        'ENGINE': DB_ENGINE,
+        'NAME': config('DB_NAME', default='lavendia'),
+        'USER': config('DB_USER', default=''),
+        'PASSWORD': config('DB_PASSWORD', default=''),
+        'HOST': host or config('DB_HOST', default='localhost'),
+        'PORT': port or config('DB_PORT', default=''),
+        # Persistent connections: reuse a worker's connection across
+        # requests, and check it is alive before reusing it.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
+
+
+DATABASES = {
+    'default': database_config(),
 }
 
+# Read replicas: a comma-separated list of SQLite file names, or of host or
+# host:port entries for other engines. Analytics and export reads are sent to
+# a replica; see config/db_router.py.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    alias = f'replica{index}'
+    if DB_IS_SQLITE:
+        DATABASES[alias] = database_config(name=replica)
+    else:
+        host, _, port = replica.partition(':')
+        DATABASES[alias] = database_config(host=host, port=port)
+    # Tests run against the primary only.
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+
+# How long a replica's health check result is trusted before re-checking.
+DATABASE_REPLICA_HEALTH_CHECK_SECONDS = config(
+    'DB_REPLICA_HEALTH_CHECK_SECONDS', default=30, cast=int
+)
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -123,6 +192,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Media files (User uploads)
 MEDIA_URL = config('MEDIA_URL', default='/media/')
 MEDIA_ROOT = BASE_DIR / config('MEDIA_ROOT', default='media')
+# `manage.py gc_media` leaves unreferenced uploads younger than
+# MEDIA_GC_GRACE_HOURS alone and moves older ones to MEDIA_GC_QUARANTINE_ROOT
+MEDIA_GC_GRACE_HOURS = config('MEDIA_GC_GRACE_HOURS', default=24, cast=int)
+MEDIA_GC_QUARANTINE_ROOT = BASE_DIR / config('MEDIA_GC_QUARANTINE_ROOT', default='media_quarantine')
+MEDIA_GC_STATE_PATH = config('MEDIA_GC_STATE_PATH', default=str(BASE_DIR / 'cache' / 'media_gc.json'))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -140,6 +214,10 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -186,6 +264,63 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = MAX_VIDEO_SIZE_MB * 1024 * 1024
 # Video Retention
 VIDEO_RETENTION_DAYS = config('VIDEO_RETENTION_DAYS', default=90, cast=int)
 
+# Completed/cancelled receipts move to the archive tables after this many days
+RECEIPT_ARCHIVE_AFTER_DAYS = config('RECEIPT_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+
+# Receipt numbers each worker reserves at a time per laundromat
+RECEIPT_NUMBER_BLOCK_SIZE = config('RECEIPT_NUMBER_BLOCK_SIZE', default=50, cast=int)
+
+# Most receipts a ?q= search of the receipt list returns, best first
+RECEIPT_SEARCH_MAX_RESULTS = config('RECEIPT_SEARCH_MAX_RESULTS', default=200, cast=int)
+
+# POST /api/batch/: most sub-requests per call, and threads running them
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+BATCH_MAX_WORKERS = config('BATCH_MAX_WORKERS', default=4, cast=int)
+
+# /api/ responses shorter than this many bytes are sent uncompressed
+COMPRESS_MIN_SIZE = config('COMPRESS_MIN_SIZE', default=1024, cast=int)
+
+# Rows fetched and serialized at a time by streamed list responses
+STREAM_CHUNK_SIZE = config('STREAM_CHUNK_SIZE', default=500, cast=int)
+
+# Receipts read at a time by the Excel export
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Shared cache. The file backend is shared by all workers on one host; point
+# CACHE_BACKEND at Redis or Memcached when they run on several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+    }
+}
+
+# Seconds a worker serves its cached laundromats before checking the shared
+# version, and the most laundromats/ list payloads it keeps
+LAUNDROMAT_CACHE_CHECK_SECONDS = config('LAUNDROMAT_CACHE_CHECK_SECONDS', default=1, cast=float)
+LAUNDROMAT_CACHE_MAX_PAYLOADS = config('LAUNDROMAT_CACHE_MAX_PAYLOADS', default=256, cast=int)
+
+# Seconds a rendered PDF report stays in the shared cache. Reports are keyed
+# by their data, so this only bounds how long unused ones take up space
+ANALYTICS_REPORT_CACHE_SECONDS = config('ANALYTICS_REPORT_CACHE_SECONDS', default=86400, cast=int)
+
+# Unfiltered admin changelists of tables estimated above this many rows show
+# the estimate instead of running COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+
+# Push notifications, queued in the outbox and sent by dispatch_notifications.
+# PUSH_TRANSPORT is a class in apps/notifications/transports.py or your own.
+PUSH_TRANSPORT = config('PUSH_TRANSPORT', default='apps.notifications.transports.FileTransport')
+PUSH_FILE_PATH = config('PUSH_FILE_PATH', default=str(BASE_DIR / 'push_notifications.jsonl'))
+PUSH_HTTP_URL = config('PUSH_HTTP_URL', default='')
+PUSH_HTTP_TIMEOUT = config('PUSH_HTTP_TIMEOUT', default=10, cast=float)
+PUSH_DISPATCH_BATCH_SIZE = config('PUSH_DISPATCH_BATCH_SIZE', default=500, cast=int)
+# Failed sends are retried after PUSH_RETRY_BASE_SECONDS, doubling up to
+# PUSH_RETRY_MAX_SECONDS, and given up after PUSH_MAX_ATTEMPTS attempts
+PUSH_RETRY_BASE_SECONDS = config('PUSH_RETRY_BASE_SECONDS', default=30, cast=int)
+PUSH_RETRY_MAX_SECONDS = config('PUSH_RETRY_MAX_SECONDS', default=3600, cast=int)
+PUSH_MAX_ATTEMPTS = config('PUSH_MAX_ATTEMPTS', default=8, cast=int)
+
 # Production settings
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -0,0 +1,236 @@
+"""
+Sparse fieldsets and selective expansion for read endpoints.
+
+GET requests may pass ``?fields=`` and ``?expand=`` (comma-separated,
+dotted for nested serializers):
+
+    /api/receipts/?fields=id,status,customer.username&expand=laundromat
+
+- ``fields`` keeps only the listed fields; without it every field is kept.
+- Nested serializers (customer, laundromat, videos, ...) are only embedded
+  when listed in ``expand`` or named with a dotted ``fields`` entry.
+  Otherwise they are reduced to their primary key(s), or dropped if
+  ``fields`` leaves them out.
+- Without either parameter, responses are unchanged.
+
+Serializers opt in with SparseFieldsMixin. Viewsets opt in with
+SparseFieldsViewMixin, which rebuilds the queryset from the pruned
+serializer: only expanded relations are joined or prefetched, and ``only()``
+loads just the columns the remaining fields read. Fields that are not model
+columns (properties, SerializerMethodFields) declare the columns they need
+in ``Meta.sparse_sources``; if one does not, ``only()`` is skipped.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_paths(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in filter(None, (part.strip() for part in value.split(','))):
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class FieldSpec:
+    """The fields and expansions requested for one serializer level"""
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand or {}
+
+    @classmethod
+    def from_request(cls, request):
+        """The requested spec, or None when the request does not ask for one"""
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        params = request.query_params
+        if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+            return None
+        fields = parse_paths(params[FIELDS_PARAM]) if FIELDS_PARAM in params else None
+        return cls(fields, parse_paths(params.get(EXPAND_PARAM, '')))
+
+    def child(self, name):
+        return FieldSpec(
+            (self.fields or {}).get(name) or None,
+            self.expand.get(name),
+        )
+
+    def is_expanded(self, name):
+        return name in self.expand or bool((self.fields or {}).get(name))
+
+    def apply(self, fields):
+        """Prune `fields` (a serializer's field dict) to this spec"""
+        unknown = set(self.fields or ()) - set(fields)
+        unknown |= set(self.expand) - set(fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {FIELDS_PARAM: f"Unknown field(s): {', '.join(sorted(unknown))}"}
+            )
+
+        pruned = {}
+        for name, field in fields.items():
+            if isinstance(field, serializers.BaseSerializer):
+                if self.is_expanded(name):
+                    pruned[name] = field
+                elif self.fields is None or name in self.fields:
+                    pruned[name] = primary_key_field(field)
+            elif self.fields is None or name in self.fields:
+                pruned[name] = field
+        return pruned
+
+
+def primary_key_field(serializer):
+    """A read-only primary key field standing in for a nested serializer"""
+    kwargs = {'read_only': True}
+    if serializer._kwargs.get('source'):
+        kwargs['source'] = serializer._kwargs['source']
+    if isinstance(serializer, serializers.ListSerializer):
+        kwargs['many'] = True
+    return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin applying ?fields= and ?expand= to its output. Nested
+    serializers using it follow the dotted entries for their field.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self.get_field_spec()
+        return fields if spec is None else spec.apply(fields)
+
+    def get_field_spec(self):
+        path = []
+        node = self
+        while node.parent is not None:
+            # A many=True serializer is named by its ListSerializer
+            if not isinstance(node.parent, serializers.ListSerializer):
+                path.append(node.field_name)
+            node = node.parent
+        if isinstance(node, serializers.ListSerializer):
+            node = node.child
+        if node is self:
+            self._field_spec = FieldSpec.from_request(self.context.get('request'))
+            return self._field_spec
+
+        spec = getattr(node, '_field_spec', None)
+        if spec is None:
+            return None
+        for name in reversed(path):
+            spec = spec.child(name)
+        return spec
+
+
+def sparse_queryset(queryset, serializer):
+    """
+    Rebuild the related loading and columns of `queryset` for what the
+    (pruned) `serializer` will read.
+    """
+    plan = QueryPlan(queryset.model)
+    plan.add_serializer(serializer)
+    return plan.apply(queryset)
+
+
+class QueryPlan:
+    """select_related paths, prefetches and columns a serializer needs"""
+
+    def __init__(self, model, prefix=''):
+        self.model = model
+        self.prefix = prefix
+        self.select_related = []
+        self.prefetch_related = []
+        # None once some field's columns are unknown
+        self.columns = [prefix + model._meta.pk.name]
+
+    def apply(self, queryset):
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.columns is not None:
+            queryset = queryset.only(*self.columns)
+        return queryset
+
+    def need(self, *names):
+        if self.columns is not None:
+            self.columns.extend(self.prefix + name for name in names)
+
+    def add_serializer(self, serializer):
+        sources = getattr(getattr(serializer, 'Meta', None), 'sparse_sources', {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if source == '*':
+                continue
+            if name in sources:
+                self.need(*sources[name])
+                continue
+            try:
+                model_field = self.model._meta.get_field(source)
+            except FieldDoesNotExist:
+                self.columns = None
+                continue
+
+            if not model_field.is_relation:
+                self.need(model_field.name)
+            elif isinstance(field, serializers.ListSerializer):
+                self.add_prefetch(source, model_field, field.child)
+            elif isinstance(field, serializers.ManyRelatedField):
+                self.add_prefetch(source, model_field, None)
+            elif isinstance(field, serializers.BaseSerializer):
+                # Forward foreign key, joined
+                self.need(model_field.name)
+                self.select_related.append(self.prefix + source)
+                nested = QueryPlan(model_field.related_model, f'{self.prefix}{source}__')
+                nested.add_serializer(field)
+                self.select_related.extend(nested.select_related)
+                self.prefetch_related.extend(nested.prefetch_related)
+                if nested.columns is None:
+                    self.columns = None
+                else:
+                    self.need(*(column[len(self.prefix):] for column in nested.columns))
+            else:
+                # Foreign key reduced to its id
+                self.need(model_field.name)
+
+    def add_prefetch(self, source, model_field, child):
+        """Prefetch a to-many relation with just the columns `child` reads"""
+        related_model = model_field.related_model
+        nested = QueryPlan(related_model)
+        if child is not None:
+            nested.add_serializer(child)
+        remote = getattr(model_field, 'field', None)
+        if remote is not None:
+            # The foreign key that links prefetched rows back
+            nested.need(remote.name)
+        queryset = nested.apply(related_model._default_manager.all())
+        self.prefetch_related.append(Prefetch(self.prefix + source, queryset=queryset))
+
+
+class SparseFieldsViewMixin:
+    """
+    ViewSet mixin: for the actions in `sparse_actions`, a request with
+    ?fields= or ?expand= gets a queryset trimmed to the pruned serializer.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def is_sparse_request(self):
+        return FieldSpec.from_request(getattr(self, 'request', None)) is not None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.sparse_actions and self.is_sparse_request():
+            serializer = self.get_serializer_class()(context=self.get_serializer_context())
+            queryset = sparse_queryset(queryset, serializer)
+        return queryset
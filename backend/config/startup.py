@@ -0,0 +1,156 @@
+"""
+Cold-start measurements for `manage.py startup_profile` and
+`benchmarks/startup.py`.
+
+measure() starts `python -m config.startup` in a fresh interpreter, the way
+a new gunicorn worker starts: it loads the WSGI application, serves one
+request (and then a second) in-process and prints its timings, peak RSS
+and which of DEFERRED_MODULES were imported. With importtime=True the child
+runs under `-X importtime` and the per-package import breakdown is parsed
+from its stderr; those runs are slower, so time them separately. A
+module's self time includes its module-level code, so config.wsgi carries
+django.setup().
+
+This module only imports the standard library at the top so that the
+child's numbers include all of Django.
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Optional, slow-to-import dependencies that must only load on first use
+DEFERRED_MODULES = ('reportlab', 'qrcode', 'PIL')
+
+
+def peak_rss_mb():
+    # ru_maxrss survives exec, so a child would report its parent's peak
+    # if that was higher; Linux's VmHWM starts again with the new program
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def request(application, path):
+    """Serve GET `path` without a server; the response status"""
+    statuses = []
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+    }
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return int(statuses[0].split()[0])
+
+
+def serve(path, import_deferred=False):
+    """Run in the child: start the app, serve `path` twice, report"""
+    started = time.perf_counter()
+    if import_deferred:
+        for name in DEFERRED_MODULES:
+            __import__(name)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    from config.wsgi import application
+    loaded = time.perf_counter()
+    status = request(application, path)
+    first_response_at = time.time()
+    served = time.perf_counter()
+    request(application, path)
+    return {
+        'path': path,
+        'status': status,
+        'setup_ms': (loaded - started) * 1000,
+        'first_request_ms': (served - loaded) * 1000,
+        'second_request_ms': (time.perf_counter() - served) * 1000,
+        'first_response_at': first_response_at,
+        'peak_rss_mb': peak_rss_mb(),
+        'modules': len(sys.modules),
+        'deferred_loaded': [name for name in DEFERRED_MODULES if name in sys.modules],
+    }
+
+
+def import_breakdown(stderr):
+    """Self import time per top-level package from `-X importtime` output"""
+    packages = defaultdict(lambda: {'ms': 0.0, 'modules': 0})
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = packages[name.strip().split('.')[0]]
+        package['ms'] += int(self_us) / 1000
+        package['modules'] += 1
+    return sorted(
+        ({'package': name, **totals} for name, totals in packages.items()),
+        key=lambda package: -package['ms'],
+    )
+
+
+def measure(path='/api/receipts/', importtime=False, import_deferred=False, env=None):
+    """
+    One cold start in a new interpreter. Adds `time_to_first_response_ms`,
+    from launching the process to the first response, and with importtime
+    the `imports` breakdown.
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-m', 'config.startup', '--path', path]
+    if import_deferred:
+        command.append('--import-deferred')
+
+    launched = time.time()
+    result = subprocess.run(
+        command, cwd=BACKEND_DIR, env={**os.environ, **(env or {})},
+        capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.splitlines()[-1])
+    report['time_to_first_response_ms'] = (report.pop('first_response_at') - launched) * 1000
+    if importtime:
+        report['imports'] = import_breakdown(result.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Start the app, serve one path and print timings as JSON')
+    parser.add_argument('--path', default='/api/receipts/')
+    parser.add_argument('--import-deferred', action='store_true',
+                        help='Import DEFERRED_MODULES first, as the app did before they were deferred')
+    args = parser.parse_args()
+    print(json.dumps(serve(args.path, args.import_deferred)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Streaming JSON arrays for list actions that return whole tables.
+
+Unpaginated actions such as users/customers/ or my_receipts/ used to load
+every row and build the full serialized list before sending a byte.
+streaming_list_response() iterates instead: the opening ``[`` goes out
+straight away, then rows are fetched, serialized and rendered
+STREAM_CHUNK_SIZE at a time, so memory stays flat however many rows there
+are. Each chunk is rendered by the negotiated JSON renderer with its
+brackets stripped, so the body is byte-identical to rendering the whole
+list at once.
+
+Requests for another format (the browsable API) or for indented JSON get
+an ordinary Response with the same data.
+
+Under ASGI, Django reads a synchronous streaming body into a list before
+sending any of it, so streaming_response() hands it an async iterator
+instead, which fetches each chunk in Django's sync thread.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+def stream_chunk_size():
+    return getattr(settings, 'STREAM_CHUNK_SIZE', 500)
+
+
+def chunked(iterable, size):
+    """Lists of up to `size` consecutive items of `iterable`"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def json_array(chunks, renderer):
+    """The bytes of a JSON array whose elements come in `chunks` of lists"""
+    yield b'['
+    separator = b''
+    for chunk in chunks:
+        if chunk:
+            yield separator + renderer.render(chunk)[1:-1]
+            separator = b','
+    yield b']'
+
+
+async def iterate_in_thread(iterable):
+    """
+    Async iterator over a sync one. Each item is produced in the thread
+    sync views run in, so lazy querysets use the connection they would
+    under WSGI.
+    """
+    iterator = iter(iterable)
+    done = object()
+    next_item = sync_to_async(next)
+    try:
+        while (item := await next_item(iterator, done)) is not done:
+            yield item
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close)()
+
+
+def streaming_response(request, content, **kwargs):
+    """A StreamingHttpResponse of the sync iterator `content`, streamed under ASGI too"""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = iterate_in_thread(content)
+    return StreamingHttpResponse(content, **kwargs)
+
+
+def can_stream(request):
+    renderer = getattr(request, 'accepted_renderer', None)
+    return isinstance(renderer, JSONRenderer) and renderer.get_indent(
+        request.accepted_media_type, {}
+    ) is None
+
+
+def streaming_list_response(request, items, serialize):
+    """
+    The response of an unpaginated list action: `items` (rows or model
+    instances, ideally from a QuerySet.iterator()) serialized a chunk at a
+    time by `serialize(chunk) -> list`.
+    """
+    if not can_stream(request):
+        return Response(serialize(list(items)))
+
+    renderer = request.accepted_renderer
+    chunks = (serialize(chunk) for chunk in chunked(items, stream_chunk_size()))
+    return streaming_response(request, json_array(chunks, renderer), content_type=renderer.media_type)
+
+
+def stream_queryset(request, queryset, serializer_class, context):
+    """streaming_list_response() for model instances and a serializer class"""
+    return streaming_list_response(
+        request,
+        queryset.iterator(chunk_size=stream_chunk_size()),
+        lambda chunk: serializer_class(chunk, many=True, context=context).data,
+    )
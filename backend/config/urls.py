@@ -15,6 +15,8 @@ from apps.laundromats.views import LaundromatViewSet
 from apps.receipts.views import ReceiptViewSet
 from apps.videos.views import VideoViewSet
 from apps.analytics.views import AnalyticsViewSet
+from apps.notifications.views import DeviceViewSet
+from config.batch import BatchView
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -23,12 +25,14 @@ router.register(r'laundromats', LaundromatViewSet, basename='laundromat')
 router.register(r'receipts', ReceiptViewSet, basename='receipt')
 router.register(r'videos', VideoViewSet, basename='video')
 router.register(r'analytics', AnalyticsViewSet, basename='analytics')
+router.register(r'notifications/devices', DeviceViewSet, basename='device')
 
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
 
     # API Routes
+    path('api/batch/', BatchView.as_view(), name='batch'),
     path('api/', include(router.urls)),
 
     # Authentication
@@ -0,0 +1,22 @@
+"""
+URL configuration used under ASGI (see config/asgi.py).
+
+The hottest read endpoints are served by async views; every other route,
+and every non-GET request to these paths, is handled by config.urls.
+"""
+from django.urls import path
+
+from apps.analytics import async_views as analytics_views
+from apps.receipts import async_views as receipt_views
+from apps.users import async_views as user_views
+from apps.videos import async_views as video_views
+from config.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/receipts/', receipt_views.receipt_list),
+    path('api/receipts/active/', receipt_views.receipt_active),
+    path('api/receipts/<int:pk>/', receipt_views.receipt_detail),
+    path('api/users/me/', user_views.me),
+    path('api/videos/by_receipt/', video_views.by_receipt),
+    path('api/analytics/overview/', analytics_views.overview),
+] + sync_urlpatterns
@@ -0,0 +1,246 @@
+"""
+Streaming .xlsx (SpreadsheetML) workbooks.
+
+workbook() yields the bytes of a zip archive while it is being written:
+the fixed parts first, then each sheet's rows as they come from its
+iterable, so a response can start at once and memory stays flat however
+many rows there are. Sheets are written with inline strings and one fixed
+stylesheet, which is all an export needs and several times faster than
+building cell objects with openpyxl.
+
+Cells are typed by their Python value: str, int, float, Decimal, bool,
+datetime and date (naive, shown as given), None for an empty cell. A
+column's style (BOLD, DATETIME, MONEY, PERCENT) sets its number format,
+and a Styled value overrides it for one cell; header rows are bold and
+frozen.
+"""
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from xml.sax.saxutils import escape, quoteattr
+
+# Indexes into <cellXfs> in STYLES
+PLAIN, BOLD, DATETIME, MONEY, PERCENT = range(5)
+
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2">'
+    '<numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/>'
+    '<numFmt numFmtId="165" formatCode="0.0%"/>'
+    '</numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+)
+
+# Characters XML 1.0 cannot carry, even escaped
+ILLEGAL_CHARACTERS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# Excel's limit on a cell's text
+MAX_CELL_TEXT = 32767
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+ROWS_PER_WRITE = 500
+
+
+class Sheet:
+    """A worksheet: a header row, then `rows` of values"""
+
+    def __init__(self, name, headers, rows, widths=(), styles=()):
+        self.name = name[:31]
+        self.headers = headers
+        self.rows = rows
+        self.widths = widths
+        self.styles = styles
+
+
+class Styled:
+    """A cell value with its own style, overriding the column's"""
+    __slots__ = ('value', 'style')
+
+    def __init__(self, value, style):
+        self.value = value
+        self.style = style
+
+
+def column_letter(index):
+    """'A' for 0, 'AA' for 26"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def text(value):
+    value = ILLEGAL_CHARACTERS.sub('', value)[:MAX_CELL_TEXT]
+    return escape(value)
+
+
+def cell(ref, value, style):
+    style_attr = f' s="{style}"' if style else ''
+    if isinstance(value, str):
+        return f'<c r="{ref}"{style_attr} t="inlineStr"><is><t xml:space="preserve">{text(value)}</t></is></c>'
+    if value is None:
+        return f'<c r="{ref}"{style_attr}/>' if style else ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{ref}"{style_attr}><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        return f'<c r="{ref}"{style_attr}><v>{(value - EXCEL_EPOCH).total_seconds() / 86400}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{ref}"{style_attr}><v>{(value - EXCEL_EPOCH.date()).days}</v></c>'
+    if isinstance(value, Styled):
+        return cell(ref, value.value, value.style)
+    return f'<c r="{ref}"{style_attr} t="inlineStr"><is><t>{text(str(value))}</t></is></c>'
+
+
+def sheet_head(sheet):
+    parts = [
+        SHEET_START,
+        '<sheetViews><sheetView workbookViewId="0">'
+        '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+        '</sheetView></sheetViews>',
+    ]
+    if sheet.widths:
+        parts.append('<cols>')
+        parts += [
+            f'<col min="{index}" max="{index}" width="{width}" customWidth="1"/>'
+            for index, width in enumerate(sheet.widths, 1)
+        ]
+        parts.append('</cols>')
+    parts.append('<sheetData><row r="1">')
+    parts += [cell(f'{column_letter(index)}1', header, BOLD) for index, header in enumerate(sheet.headers)]
+    parts.append('</row>')
+    return ''.join(parts)
+
+
+def sheet_rows(sheet):
+    """The <row> elements of `sheet`'s data, ROWS_PER_WRITE at a time"""
+    letters = [column_letter(index) for index in range(len(sheet.headers))]
+    styles = list(sheet.styles) + [PLAIN] * (len(letters) - len(sheet.styles))
+    columns = list(zip(letters, styles))
+    rows = iter(sheet.rows)
+    number = 1
+    while batch := list(islice(rows, ROWS_PER_WRITE)):
+        parts = []
+        for row in batch:
+            number += 1
+            parts.append(f'<row r="{number}">')
+            parts += [
+                cell(f'{letter}{number}', value, style)
+                for (letter, style), value in zip(columns, row)
+            ]
+            parts.append('</row>')
+        yield ''.join(parts)
+
+
+def package_parts(sheets):
+    """The fixed parts of a workbook with `sheets`, as (name, XML) pairs"""
+    count = len(sheets)
+    overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for index in range(1, count + 1)
+    )
+    sheet_entries = ''.join(
+        f'<sheet name={quoteattr(ILLEGAL_CHARACTERS.sub("", sheet.name))} sheetId="{index}" r:id="rId{index}"/>'
+        for index, sheet in enumerate(sheets, 1)
+    )
+    sheet_rels = ''.join(
+        f'<Relationship Id="rId{index}" '
+        f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{index}.xml"/>'
+        for index in range(1, count + 1)
+    )
+    header = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    return [
+        ('[Content_Types].xml', (
+            f'{header}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'
+        )),
+        ('_rels/.rels', (
+            f'{header}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>'
+        )),
+        ('xl/workbook.xml', (
+            f'{header}<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheet_entries}</sheets></workbook>'
+        )),
+        ('xl/_rels/workbook.xml.rels', (
+            f'{header}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{sheet_rels}<Relationship Id="rId{count + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/></Relationships>'
+        )),
+        ('xl/styles.xml', STYLES),
+    ]
+
+
+class ChunkSink:
+    """Write-only file that collects what zipfile writes until taken"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def workbook(sheets):
+    """The bytes of an .xlsx workbook of `sheets`, yielded as written"""
+    sink = ChunkSink()
+    # zipfile writes sizes after each member when it cannot seek back
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in package_parts(sheets):
+            archive.writestr(name, xml)
+        for index, sheet in enumerate(sheets, 1):
+            with archive.open(f'xl/worksheets/sheet{index}.xml', 'w') as part:
+                part.write(sheet_head(sheet).encode())
+                for chunk in sheet_rows(sheet):
+                    part.write(chunk.encode())
+                    if data := sink.take():
+                        yield data
+                part.write(b'</sheetData></worksheet>')
+            yield sink.take()
+    yield sink.take()
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from apps.videos.models import Video
+from config.admin_performance import EstimatedCountPaginator, estimated_row_count
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AdminPerformanceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15552200000')
+        cls.admin = User.objects.create_superuser(
+            username='admin_perf', password='x', phone='+15552200001', role='admin'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def seed(self, count):
+        first = User.objects.count()
+        customers = User.objects.bulk_create([
+            User(username=f'admin_perf{index}', phone=f'+1555221{index:04d}', password='!')
+            for index in range(first, first + count)
+        ])
+        receipts = Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=self.laundromat, customer=customer, staff=self.admin,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Shirts', price=Decimal('10.00'), qr_code='qr_codes/admin.png',
+                status='completed' if index % 2 else 'pending',
+            )
+            for index, customer in enumerate(customers)
+        ])
+        Video.objects.bulk_create([
+            Video(receipt=receipt, video_type='intake', video_file='videos/admin.mp4', file_size=1)
+            for receipt in receipts
+        ])
+        return receipts
+
+    def changelist_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in ctx.captured_queries]
+
+    def test_changelists_do_not_query_per_row(self):
+        paths = ['/admin/receipts/receipt/', '/admin/videos/video/', '/admin/users/user/']
+        self.seed(3)
+        few = [len(self.changelist_queries(path)) for path in paths]
+        self.seed(20)
+        self.assertEqual([len(self.changelist_queries(path)) for path in paths], few)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=10)
+    def test_large_unfiltered_lists_are_estimated(self):
+        receipts = self.seed(20)
+        # Leave a gap in the ids so the estimate differs from the count
+        Receipt.objects.filter(pk__in=[receipt.pk for receipt in receipts[5:10]]).delete()
+
+        self.assertEqual(estimated_row_count(Receipt, 'default'), 20)
+        self.assertEqual(EstimatedCountPaginator(Receipt.objects.all(), 10).count, 20)
+        self.assertEqual(EstimatedCountPaginator(Receipt.objects.filter(status='pending'), 10).count, 8)
+
+        queries = self.changelist_queries('/admin/receipts/receipt/')
+        self.assertFalse([sql for sql in queries if 'COUNT(*)' in sql and '"receipts"' in sql])
+        self.assertTrue(
+            [sql for sql in self.changelist_queries('/admin/receipts/receipt/?status__exact=pending')
+             if 'COUNT(*)' in sql]
+        )
+
+    def test_small_lists_are_counted_exactly(self):
+        self.seed(3)
+        self.assertEqual(EstimatedCountPaginator(Receipt.objects.all(), 10).count, 3)
+
+    def test_change_form_does_not_list_every_user(self):
+        (receipt,) = self.seed(1)
+        Video.objects.filter(receipt=receipt).delete()
+        response = self.client.get(f'/admin/receipts/receipt/{receipt.pk}/change/')
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, '<option value="%d">' % self.admin.pk)
+
+        response = self.client.get('/admin/videos/video/add/')
+        self.assertContains(response, 'admin-autocomplete')
@@ -0,0 +1,125 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import ArchivedReceipt, Receipt, ReceiptStatusEvent
+from apps.users.models import User
+from apps.videos.models import ArchivedVideo, Video
+
+
+@override_settings(RECEIPT_ARCHIVE_AFTER_DAYS=180)
+class ReceiptArchiveTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15551100000')
+        cls.admin = User.objects.create_user(
+            username='archive_admin', password='x', phone='+15551100001', role='admin'
+        )
+        cls.customer = User.objects.create_user(
+            username='archive_customer', password='x', phone='+15551100002'
+        )
+        cls.other_customer = User.objects.create_user(
+            username='archive_other', password='x', phone='+15551100003'
+        )
+
+        now = timezone.now()
+        cls.old_completed, cls.old_cancelled, cls.old_active, cls.recent_completed = [
+            cls.make_receipt(status, age_days, now)
+            for status, age_days in [
+                ('completed', 300), ('cancelled', 250), ('ready', 310), ('completed', 30)
+            ]
+        ]
+        Video.objects.bulk_create([
+            Video(receipt=cls.old_completed, video_type='intake', video_file='videos/old.mp4', file_size=10),
+            Video(receipt=cls.recent_completed, video_type='intake', video_file='videos/new.mp4', file_size=10),
+        ])
+        ReceiptStatusEvent.objects.create(
+            receipt=cls.old_completed, laundromat=cls.laundromat, status='completed'
+        )
+
+    @classmethod
+    def make_receipt(cls, status, age_days, now):
+        (receipt,) = Receipt.objects.bulk_create([Receipt(
+            laundromat=cls.laundromat,
+            customer=cls.customer,
+            status=status,
+            expected_pickup_date=now,
+            items_description=f'{status} load',
+            price=Decimal('20.00'),
+            qr_code='qr_codes/archive.png',
+        )])
+        timestamp = now - timedelta(days=age_days)
+        Receipt.objects.filter(pk=receipt.pk).update(
+            created_at=timestamp, drop_off_date=timestamp, updated_at=timestamp + timedelta(days=1)
+        )
+        return receipt
+
+    def archive(self):
+        call_command('archive_receipts', '--batch-size', '1', stdout=StringIO())
+
+    def test_closed_receipts_move_with_their_videos(self):
+        self.archive()
+
+        self.assertEqual(
+            set(ArchivedReceipt.objects.values_list('pk', flat=True)),
+            {self.old_completed.pk, self.old_cancelled.pk}
+        )
+        self.assertEqual(
+            set(Receipt.objects.values_list('pk', flat=True)),
+            {self.old_active.pk, self.recent_completed.pk}
+        )
+        archived_video = ArchivedVideo.objects.get()
+        self.assertEqual(archived_video.receipt_id, self.old_completed.pk)
+        self.assertEqual(archived_video.video_file.name, 'videos/old.mp4')
+        self.assertEqual(Video.objects.count(), 1)
+        # The status log is kept for stage analytics
+        self.assertTrue(ReceiptStatusEvent.objects.filter(receipt_id=self.old_completed.pk).exists())
+
+    def test_dry_run_moves_nothing(self):
+        out = StringIO()
+        call_command('archive_receipts', '--dry-run', stdout=out)
+        self.assertIn('2 receipts', out.getvalue())
+        self.assertFalse(ArchivedReceipt.objects.exists())
+
+    def test_retrieve_and_history_fall_through_to_archive(self):
+        self.client.force_authenticate(self.customer)
+        detail = self.client.get(f'/api/receipts/{self.old_completed.pk}/').json()
+        history = json.loads(self.client.get('/api/receipts/my_receipts/').getvalue())
+
+        self.archive()
+
+        response = self.client.get(f'/api/receipts/{self.old_completed.pk}/')
+        self.assertEqual(response.status_code, 200)
+        archived_detail = response.json()
+        self.assertIsNotNone(archived_detail.pop('archived_at'))
+        for key in ('is_active', 'days_since_dropoff', 'updated_at'):
+            archived_detail.pop(key)
+            detail.pop(key)
+        self.assertEqual(archived_detail, detail)
+
+        self.assertEqual(json.loads(self.client.get('/api/receipts/my_receipts/').getvalue()), history)
+        self.assertNotIn(
+            self.old_completed.pk, [row['id'] for row in self.client.get('/api/receipts/').json()['results']]
+        )
+
+        self.client.force_authenticate(self.other_customer)
+        self.assertEqual(self.client.get(f'/api/receipts/{self.old_completed.pk}/').status_code, 404)
+
+    def test_long_analytics_ranges_include_archive(self):
+        self.client.force_authenticate(self.admin)
+        before = self.client.get('/api/analytics/overview/', {'time_range': 'year'}).json()
+
+        self.archive()
+
+        after = self.client.get('/api/analytics/overview/', {'time_range': 'year'}).json()
+        self.assertEqual(after, before)
+        self.assertEqual(after['total_orders'], 4)
+        self.assertEqual(after['cancelled_orders'], 1)
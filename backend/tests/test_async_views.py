@@ -0,0 +1,183 @@
+"""
+The async read endpoints in config/urls_asgi.py must answer exactly like the
+DRF views they stand in for. Each test sends the same request through the
+sync URLconf and, with the ASGI URLconf, through the async view, and compares
+status codes and bodies.
+"""
+import io
+import os
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import AsyncClient, SimpleTestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users import async_views as user_views
+from apps.users.models import User
+from apps.videos.models import Video
+
+
+def to_meta(headers):
+    """Convert headers to the HTTP_* keys APIClient expects."""
+    return {f'HTTP_{name.upper()}': value for name, value in headers.items()}
+
+
+class AsyncReadParityTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15556000000')
+        other = Laundromat.objects.create(name='Other', address='2 Side St', phone='+15556000001')
+        cls.admin = User.objects.create_user(
+            username='async_admin', password='x', phone='+15556000002', role='admin'
+        )
+        cls.staff = User.objects.create_user(
+            username='async_staff', password='x', phone='+15556000003', role='staff',
+            laundromat=cls.laundromat
+        )
+        cls.customer = User.objects.create_user(
+            username='async_customer', password='x', phone='+15556000004',
+            first_name='Ada', profile_picture='profile_pictures/ada.png'
+        )
+
+        now = timezone.now()
+        statuses = [choice for choice, _ in Receipt.STATUS_CHOICES]
+        receipts = Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=cls.laundromat if i % 3 else other,
+                customer=cls.customer,
+                staff=cls.staff,
+                status=statuses[i % len(statuses)],
+                expected_pickup_date=now + timedelta(days=1),
+                items_description=f'Load {i}',
+                price=Decimal('7.25') * (i + 1),
+                qr_code=f'qr_codes/async_{i}.png',
+            )
+            for i in range(25)
+        ])
+        cls.receipt = receipts[1]
+        Video.objects.bulk_create([
+            Video(receipt=cls.receipt, video_type='intake', video_file='videos/a.mp4', file_size=2048)
+        ])
+
+    def fetch(self, user, path, params=None):
+        """Return (sync response, async response) for the same GET request."""
+        headers = {}
+        if user is not None:
+            headers['Authorization'] = f'Bearer {AccessToken.for_user(user)}'
+
+        sync_response = APIClient().get(path, params, **to_meta(headers))
+        with override_settings(ROOT_URLCONF='config.urls_asgi'):
+            async_response = async_to_sync(AsyncClient().get)(path, params, headers=headers)
+        return sync_response, async_response
+
+    def assertParity(self, user, path, params=None, expected_status=200):
+        sync_response, async_response = self.fetch(user, path, params)
+        self.assertEqual(sync_response.status_code, expected_status)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+        return async_response
+
+    def test_receipt_list(self):
+        for user in (self.admin, self.staff, self.customer):
+            with self.subTest(user=user.username):
+                self.assertParity(user, '/api/receipts/')
+
+    def test_receipt_list_pagination_filters_and_search(self):
+        self.assertParity(self.admin, '/api/receipts/', {'page': 2})
+        self.assertParity(self.admin, '/api/receipts/', {'page': 'last'})
+        self.assertParity(self.admin, '/api/receipts/', {'status': 'washing'})
+        self.assertParity(self.admin, '/api/receipts/', {'laundromat': self.laundromat.pk})
+        self.assertParity(self.admin, '/api/receipts/', {'search': 'async_customer'})
+        self.assertParity(self.admin, '/api/receipts/', {'ordering': 'expected_pickup_date'})
+        self.assertParity(self.admin, '/api/receipts/', {'page': 99}, expected_status=404)
+
+    def test_receipt_list_text_search(self):
+        receipt = Receipt.objects.get(pk=self.receipt.pk)
+        receipt.items_description = 'Red wool coat'
+        receipt.save()
+
+        for user in (self.admin, self.staff, self.customer):
+            with self.subTest(user=user.username):
+                response = self.assertParity(user, '/api/receipts/', {'q': 'wool coats'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.receipt.pk])
+        self.assertParity(self.admin, '/api/receipts/', {'q': 'load', 'laundromat': self.laundromat.pk})
+
+    def test_receipt_active(self):
+        for user in (self.admin, self.staff, self.customer):
+            with self.subTest(user=user.username):
+                self.assertParity(user, '/api/receipts/active/')
+
+    def test_receipt_detail(self):
+        self.assertParity(self.customer, f'/api/receipts/{self.receipt.pk}/')
+        self.assertParity(self.staff, '/api/receipts/999999/', expected_status=404)
+
+    def test_sparse_fields(self):
+        # The laundromat column is deferred; reading it would query on the event loop
+        response = self.assertParity(self.admin, f'/api/receipts/{self.receipt.pk}/', {'fields': 'id,status'})
+        self.assertEqual(response.json(), {'id': self.receipt.pk, 'status': self.receipt.status})
+        response = self.assertParity(self.admin, '/api/receipts/', {'fields': 'id,status'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'status'})
+        self.assertParity(self.admin, '/api/receipts/', {'fields': 'id,laundromat', 'expand': 'laundromat'})
+
+    def test_me(self):
+        for user in (self.admin, self.staff, self.customer):
+            with self.subTest(user=user.username):
+                self.assertParity(user, '/api/users/me/')
+
+    def test_videos_by_receipt(self):
+        self.assertParity(self.customer, '/api/videos/by_receipt/', {'receipt_id': self.receipt.pk})
+        self.assertParity(self.customer, '/api/videos/by_receipt/', expected_status=400)
+
+    def test_analytics_overview(self):
+        self.assertParity(self.admin, '/api/analytics/overview/')
+        self.assertParity(self.staff, '/api/analytics/overview/', {'time_range': 'year'})
+        self.assertParity(self.customer, '/api/analytics/overview/', expected_status=403)
+
+    def test_authentication_errors(self):
+        response = self.assertParity(None, '/api/receipts/', expected_status=401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+        sync_response = APIClient().get('/api/users/me/', HTTP_AUTHORIZATION='Bearer nonsense')
+        with override_settings(ROOT_URLCONF='config.urls_asgi'):
+            async_response = async_to_sync(AsyncClient().get)(
+                '/api/users/me/', headers={'Authorization': 'Bearer nonsense'}
+            )
+        self.assertEqual(async_response.status_code, 401)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    def test_other_methods_fall_through_to_drf(self):
+        token = AccessToken.for_user(self.staff)
+        with override_settings(ROOT_URLCONF='config.urls_asgi'):
+            response = async_to_sync(AsyncClient().patch)(
+                f'/api/receipts/{self.receipt.pk}/',
+                {'items_count': 9},
+                content_type='application/json',
+                headers={'Authorization': f'Bearer {token}'},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.receipt.refresh_from_db()
+        self.assertEqual(self.receipt.items_count, 9)
+
+
+class ASGIApplicationTests(SimpleTestCase):
+
+    def test_async_urlconf_is_chosen_per_request(self):
+        from config.asgi import application
+
+        request, _ = application.create_request(
+            {'type': 'http', 'method': 'GET', 'path': '/api/users/me/', 'query_string': b'', 'headers': []},
+            io.BytesIO(),
+        )
+        self.assertEqual(request.urlconf, 'config.urls_asgi')
+        self.assertIs(resolve(request.path_info, urlconf=request.urlconf).func, user_views.me)
+        # Importing the ASGI entry point changes nothing for the rest of the process
+        self.assertEqual(settings.ROOT_URLCONF, 'config.urls')
+        self.assertNotIn('ROOT_URLCONF', os.environ)
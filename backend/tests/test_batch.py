@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from apps.videos.models import Video
+
+
+class BatchFixturesMixin:
+
+    def create_fixtures(self):
+        self.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15551500000')
+        self.customer = User.objects.create_user(
+            username='batch_customer', password='x', phone='+15551500001'
+        )
+        self.admin = User.objects.create_user(
+            username='batch_admin', password='x', phone='+15551500002', role='admin'
+        )
+        (self.receipt,) = Receipt.objects.bulk_create([Receipt(
+            laundromat=self.laundromat, customer=self.customer,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description='Load', price=Decimal('12.00'), qr_code='qr_codes/batch.png',
+        )])
+        Video.objects.bulk_create([Video(
+            receipt=self.receipt, video_type='intake', video_file='videos/batch.mp4', file_size=10
+        )])
+
+    def launch_requests(self):
+        return [
+            {'id': 'me', 'path': '/api/users/me/'},
+            {'id': 'active', 'path': 'receipts/active/'},
+            {'id': 'laundromats', 'path': '/api/laundromats/?page=1'},
+            {'id': 'videos', 'path': 'videos/by_receipt/', 'params': {'receipt_id': str(self.receipt.pk)}},
+            {'id': 'overview', 'path': 'analytics/overview/'},
+        ]
+
+    def assertMatchesDirectRequests(self, response, requests):
+        self.assertEqual(response.status_code, 200)
+        items = response.json()['responses']
+        self.assertEqual([item['id'] for item in items], [request['id'] for request in requests])
+        for request, item in zip(requests, items):
+            path = request['path'] if request['path'].startswith('/') else '/api/' + request['path']
+            direct = self.client.get(path, request.get('params', {}))
+            self.assertEqual(item['status'], direct.status_code, path)
+            self.assertEqual(item['body'], direct.json(), path)
+            self.assertGreaterEqual(item['duration_ms'], 0)
+
+
+class BatchTests(BatchFixturesMixin, APITestCase):
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def batch(self, requests):
+        return self.client.post('/api/batch/', {'requests': requests}, format='json')
+
+    def test_launch_requests_match_individual_calls(self):
+        self.client.force_authenticate(self.customer)
+        requests = self.launch_requests()
+        response = self.batch(requests)
+
+        self.assertMatchesDirectRequests(response, requests)
+        # Tests run inside a transaction, so the items ran in order
+        self.assertFalse(response.json()['concurrent'])
+        statuses = [item['status'] for item in response.json()['responses']]
+        self.assertEqual(statuses, [200, 200, 200, 200, 403])
+
+    def test_unknown_path_is_reported_per_item(self):
+        self.client.force_authenticate(self.customer)
+        response = self.batch([{'path': '/api/nowhere/'}, {'path': '/api/users/me/'}])
+        self.assertEqual([item['status'] for item in response.json()['responses']], [404, 200])
+
+    def test_view_errors_are_reported_per_item(self):
+        self.client.force_authenticate(self.customer)
+        with mock.patch('apps.users.views.UserViewSet.me', side_effect=RuntimeError('boom')):
+            with self.assertLogs('django.request', 'ERROR'):
+                response = self.batch([{'path': '/api/users/me/'}, {'path': 'receipts/active/'}])
+
+        self.assertEqual(response.status_code, 200)
+        first, second = response.json()['responses']
+        self.assertEqual((first['status'], first['body']), (500, {'detail': 'A server error occurred.'}))
+        self.assertGreaterEqual(first['duration_ms'], 0)
+        self.assertEqual(second['status'], 200)
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_invalid_batches_are_rejected(self):
+        self.client.force_authenticate(self.customer)
+        for requests in (
+            [],
+            [{'path': '/api/users/me/'}] * 3,
+            [{'path': '/admin/'}],
+            [{'path': '/api/batch/'}],
+        ):
+            self.assertEqual(self.batch(requests).status_code, 400, requests)
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.batch([{'path': '/api/users/me/'}]).status_code, 401)
+
+
+class ConcurrentBatchTests(BatchFixturesMixin, APITransactionTestCase):
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def test_items_run_concurrently_outside_a_transaction(self):
+        self.client.force_authenticate(self.admin)
+        requests = self.launch_requests()
+        response = self.client.post('/api/batch/', {'requests': requests}, format='json')
+
+        self.assertTrue(response.json()['concurrent'])
+        self.assertMatchesDirectRequests(response, requests)
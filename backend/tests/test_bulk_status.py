@@ -0,0 +1,120 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+
+URL = '/api/receipts/bulk-status/'
+
+
+class StatusTransitionTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15557000000')
+        cls.other = Laundromat.objects.create(name='Other', address='2 Side St', phone='+15557000001')
+        cls.staff = User.objects.create_user(
+            username='bulk_staff', password='x', phone='+15557000002', role='staff',
+            laundromat=cls.laundromat
+        )
+        cls.customer = User.objects.create_user(
+            username='bulk_customer', password='x', phone='+15557000003'
+        )
+
+    def make_receipts(self, statuses, laundromat=None):
+        return Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=laundromat or self.laundromat,
+                customer=self.customer,
+                status=status,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Load',
+                price=Decimal('10.00'),
+                qr_code=f'qr_codes/bulk_{i}.png',
+            )
+            for i, status in enumerate(statuses)
+        ])
+
+    def test_bulk_status_updates_with_one_update(self):
+        receipts = self.make_receipts(['washing'] * 30)
+        self.client.force_authenticate(self.staff)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                URL, {'ids': [r.pk for r in receipts], 'status': 'drying'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 30)
+        self.assertEqual({row['result'] for row in response.data['results']}, {'updated'})
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Receipt.objects.filter(status='drying').count(), 30)
+
+    def test_bulk_status_reports_each_outcome(self):
+        washing, drying, completed = self.make_receipts(['washing', 'drying', 'completed'])
+        (elsewhere,) = self.make_receipts(['washing'], laundromat=self.other)
+        self.client.force_authenticate(self.staff)
+
+        ids = [washing.pk, drying.pk, completed.pk, elsewhere.pk, washing.pk]
+        response = self.client.post(URL, {'ids': ids, 'status': 'drying'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(
+            [(row['id'], row['previous_status'], row['result']) for row in response.data['results']],
+            [
+                (washing.pk, 'washing', 'updated'),
+                (drying.pk, 'drying', 'unchanged'),
+                (completed.pk, 'completed', 'invalid_transition'),
+                (elsewhere.pk, None, 'not_found'),
+            ]
+        )
+        elsewhere.refresh_from_db()
+        self.assertEqual(elsewhere.status, 'washing')
+
+    def test_bulk_complete_sets_pickup_date(self):
+        (ready,) = self.make_receipts(['ready'])
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.post(URL, {'ids': [ready.pk], 'status': 'completed'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        ready.refresh_from_db()
+        self.assertEqual(ready.status, 'completed')
+        self.assertIsNotNone(ready.actual_pickup_date)
+
+    def test_bulk_status_validation(self):
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.post(URL, {'ids': [], 'status': 'drying'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(URL, {'ids': [1], 'status': 'dirty'}, format='json').status_code, 400)
+
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.post(URL, {'ids': [1], 'status': 'drying'}, format='json').status_code, 403)
+
+    def test_update_status_enforces_transitions(self):
+        pending, ready = self.make_receipts(['pending', 'ready'])
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.patch(
+            f'/api/receipts/{pending.pk}/update_status/', {'status': 'ready'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.patch(
+            f'/api/receipts/{pending.pk}/update_status/', {'status': 'washing'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'washing')
+
+        response = self.client.post(f'/api/receipts/{pending.pk}/complete/')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f'/api/receipts/{ready.pk}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'completed')
@@ -0,0 +1,145 @@
+import gzip
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipIf
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from apps.users.models import User
+from config import middleware
+from config.middleware import CompressionMiddleware, negotiate_encoding
+from config.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_output_matches_drf_renderer(self):
+        payload = ReturnDict({
+            'price': Decimal('12.50'),
+            'revenue': [Decimal('0'), Decimal('1234.99')],
+            'created_at': datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'naive': datetime(2026, 3, 1, 9, 30),
+            'offset': datetime(2026, 3, 1, 9, 30, tzinfo=dt_timezone(timedelta(hours=-5))),
+            'day': date(2026, 3, 1),
+            'duration': timedelta(hours=1, seconds=3),
+            'id': uuid.UUID(int=7),
+            'label': gettext_lazy('Active'),
+            'counts': {1: 3, 2: 4},
+            'rows': ReturnList([{'name': 'Café   line'}], serializer=None),
+            'empty': None,
+            'ratio': 0.1,
+        }, serializer=None)
+
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_indented_and_unsupported_payloads_fall_back(self):
+        payload = {'total': 2 ** 70, 'price': Decimal('1.10')}
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        self.assertEqual(
+            FastJSONRenderer().render(payload, 'application/json; indent=2'),
+            JSONRenderer().render(payload, 'application/json; indent=2'),
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class NegotiateEncodingTests(SimpleTestCase):
+
+    def test_q_values_and_server_preference(self):
+        supported = ('br', 'gzip')
+        self.assertEqual(negotiate_encoding('gzip, deflate, br', supported), 'br')
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, br;q=0.5', supported), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0, gzip', supported), 'gzip')
+        self.assertEqual(negotiate_encoding('*', supported), 'br')
+        self.assertEqual(negotiate_encoding('identity', supported), None)
+        self.assertEqual(negotiate_encoding('', supported), None)
+
+
+@override_settings(COMPRESS_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"results":[' + b','.join([b'{"id":1,"status":"pending"}'] * 200) + b']}'
+
+    def respond(self, path, response, accept_encoding='gzip'):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_api_json_is_gzipped(self):
+        response = self.respond('/api/receipts/', HttpResponse(self.body, content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_skipped_responses(self):
+        small = b'{"id":1}'
+        cases = [
+            ('/api/receipts/', small, 'application/json', 200),
+            ('/media/videos/intake.json', self.body, 'application/json', 200),
+            ('/api/receipts/1/qr_code/', self.body, 'image/png', 200),
+            ('/api/analytics/export_pdf/', self.body, 'application/pdf', 200),
+            ('/api/videos/1/', self.body, 'application/json', 206),
+            ('/api/auth/login/', self.body, 'application/json', 200),
+        ]
+        for path, body, content_type, status in cases:
+            for accept_encoding in ('gzip', 'br'):
+                response = self.respond(
+                    path, HttpResponse(body, content_type=content_type, status=status), accept_encoding
+                )
+                self.assertFalse(response.has_header('Content-Encoding'), path)
+                self.assertEqual(response.content, body)
+
+    def test_identity_only_clients_get_plain_responses(self):
+        response = self.respond(
+            '/api/receipts/', HttpResponse(self.body, content_type='application/json'), 'identity'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_streaming_responses_are_compressed_per_chunk(self):
+        chunks = [self.body[:500], self.body[500:]]
+        response = self.respond('/api/users/customers/', StreamingHttpResponse(
+            iter(chunks), content_type='application/json'
+        ))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.body)
+
+    @skipIf(middleware.brotli is None, 'brotli is not installed')
+    def test_brotli_when_preferred(self):
+        response = self.respond(
+            '/api/receipts/', HttpResponse(self.body, content_type='application/json'), 'gzip, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(response.content), self.body)
+
+        response = self.respond('/api/users/customers/', StreamingHttpResponse(
+            iter([self.body[:500], self.body[500:]]), content_type='application/json'
+        ), 'br')
+        self.assertEqual(middleware.brotli.decompress(b''.join(response.streaming_content)), self.body)
+
+
+class CompressedApiTests(APITestCase):
+
+    def test_api_responses_are_negotiated_end_to_end(self):
+        admin = User.objects.create_user(
+            username='compress_admin', password='x', phone='+15551800000', role='admin'
+        )
+        User.objects.bulk_create([
+            User(username=f'compress{index}', phone=f'+1555181{index:04d}', password='!')
+            for index in range(20)
+        ])
+        self.client.force_authenticate(admin)
+
+        plain = self.client.get('/api/users/customers/')
+        compressed = self.client.get('/api/users/customers/', HTTP_ACCEPT_ENCODING='gzip')
+        plain_body, compressed_body = plain.getvalue(), compressed.getvalue()
+
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed_body), plain_body)
+        self.assertLess(len(compressed_body), len(plain_body) // 3)
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.analytics import sketches
+from apps.analytics.models import DailyCustomerSketch
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+
+
+class HyperLogLogTests(SimpleTestCase):
+
+    def test_estimate_is_within_error_bound(self):
+        sketch = sketches.HyperLogLog()
+        for value in range(20000):
+            sketch.add(value)
+        self.assertLess(abs(sketch.count() - 20000) / 20000, 3 * sketches.STANDARD_ERROR)
+
+    def test_small_counts_are_exact(self):
+        sketch = sketches.HyperLogLog()
+        for value in list(range(50)) * 3:
+            sketch.add(value)
+        self.assertEqual(sketch.count(), 50)
+
+    def test_merge_counts_the_union(self):
+        first, second, union = sketches.HyperLogLog(), sketches.HyperLogLog(), sketches.HyperLogLog()
+        for value in range(0, 3000):
+            first.add(value)
+            union.add(value)
+        for value in range(2000, 5000):
+            second.add(value)
+            union.add(value)
+        first.merge_bytes(second.to_bytes())
+        self.assertEqual(first.registers, union.registers)
+
+    def test_serialization_round_trips_sparse_and_dense(self):
+        for size in (3, 5000):
+            sketch = sketches.HyperLogLog()
+            for value in range(size):
+                sketch.add(value)
+            data = sketch.to_bytes()
+            self.assertEqual(data[:1], sketches.SPARSE if size == 3 else sketches.DENSE)
+            self.assertEqual(sketches.HyperLogLog.from_bytes(data).registers, sketch.registers)
+        self.assertEqual(len(sketches.HyperLogLog().to_bytes()), 1)
+
+
+class DistinctCustomerTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15551300000')
+        cls.other_laundromat = Laundromat.objects.create(name='Other', address='2 Side St', phone='+15551300001')
+        cls.admin = User.objects.create_user(
+            username='sketch_admin', password='x', phone='+15551300002', role='admin'
+        )
+        cls.staff = User.objects.create_user(
+            username='sketch_staff', password='x', phone='+15551300003', role='staff',
+            laundromat=cls.laundromat
+        )
+        cls.customers = User.objects.bulk_create([
+            User(username=f'sketch_customer_{i}', phone=f'+155513010{i:02d}', password='!')
+            for i in range(6)
+        ])
+
+    def make_receipts(self, customers, laundromat):
+        return Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=laundromat, customer=customer,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Load', price=Decimal('10.00'), qr_code='qr_codes/sketch.png',
+            )
+            for customer in customers
+        ])
+
+    def overview_customers(self, **params):
+        return self.client.get('/api/analytics/overview/', params).json()['total_customers']
+
+    def test_receipt_creation_updates_day_sketch(self):
+        self.make_receipts(self.customers[:4], self.laundromat)
+        self.make_receipts(self.customers[2:], self.other_laundromat)
+        # A repeat customer leaves the stored sketch as it was
+        self.make_receipts(self.customers[:1], self.laundromat)
+
+        self.assertEqual(DailyCustomerSketch.objects.count(), 2)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.overview_customers(), 6)
+        self.assertEqual(self.overview_customers(exact='true'), 6)
+
+        comparison = self.client.get('/api/analytics/laundromat-comparison/').json()
+        self.assertEqual(
+            {row['laundromat_id']: row['customer_count'] for row in comparison},
+            {self.laundromat.pk: 4, self.other_laundromat.pk: 4}
+        )
+
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.overview_customers(), 4)
+
+    def test_window_start_inside_a_day_is_exact(self):
+        inside, outside = self.make_receipts(self.customers[:2], self.laundromat)
+        now = timezone.now()
+        Receipt.objects.filter(pk=inside.pk).update(created_at=now - timedelta(days=6, hours=23))
+        Receipt.objects.filter(pk=outside.pk).update(created_at=now - timedelta(days=7, hours=1))
+        call_command('rebuild_customer_stats', stdout=StringIO())
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.overview_customers(time_range='week'), 1)
+        self.assertEqual(self.overview_customers(time_range='week', exact='1'), 1)
+        self.assertEqual(self.overview_customers(time_range='month'), 2)
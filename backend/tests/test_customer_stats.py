@@ -0,0 +1,180 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.analytics.models import CustomerDailyStats, CustomerLaundromatStats, CustomerStats
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+
+
+class CustomerStatsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15551200000')
+        cls.other_laundromat = Laundromat.objects.create(name='Other', address='2 Side St', phone='+15551200001')
+        cls.admin = User.objects.create_user(
+            username='stats_admin', password='x', phone='+15551200002', role='admin'
+        )
+        cls.staff = User.objects.create_user(
+            username='stats_staff', password='x', phone='+15551200003', role='staff',
+            laundromat=cls.laundromat
+        )
+        cls.alice = User.objects.create_user(
+            username='alice', password='x', phone='+15551200004', first_name='Alice'
+        )
+        cls.bob = User.objects.create_user(username='bob', password='x', phone='+15551200005')
+
+    def make_receipt(self, customer, price, laundromat=None, status='pending'):
+        receipt = Receipt(
+            laundromat=laundromat or self.laundromat,
+            customer=customer,
+            status=status,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description='Load',
+            price=Decimal(price),
+            qr_code='qr_codes/stats.png',
+        )
+        receipt.save()
+        return receipt
+
+    def stats_rows(self):
+        return (
+            set(CustomerStats.objects.filter(order_count__gt=0).values_list(
+                'customer_id', 'order_count', 'total_spent'
+            )),
+            set(CustomerLaundromatStats.objects.filter(order_count__gt=0).values_list(
+                'customer_id', 'laundromat_id', 'order_count', 'total_spent'
+            )),
+            set(CustomerDailyStats.objects.filter(order_count__gt=0).values_list(
+                'customer_id', 'laundromat_id', 'date', 'order_count', 'total_spent'
+            )),
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.stats_rows()
+        call_command('rebuild_customer_stats', stdout=StringIO())
+        self.assertEqual(incremental, self.stats_rows())
+
+    def test_incremental_updates_match_rebuild(self):
+        first = self.make_receipt(self.alice, '20.00')
+        second = self.make_receipt(self.alice, '15.00', laundromat=self.other_laundromat)
+        cancelled = self.make_receipt(self.bob, '30.00')
+        deleted = self.make_receipt(self.bob, '5.00')
+
+        first.price = Decimal('25.00')
+        first.save(update_fields=['price'])
+        second.laundromat = self.laundromat
+        second.save()
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        deleted.delete()
+        Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=self.other_laundromat, customer=self.bob,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Bulk', price=Decimal('7.50'), qr_code='qr_codes/stats.png',
+            )
+            for _ in range(2)
+        ])
+
+        alice = CustomerStats.objects.get(customer=self.alice)
+        self.assertEqual((alice.order_count, alice.total_spent), (2, Decimal('40.00')))
+        bob = CustomerStats.objects.get(customer=self.bob)
+        self.assertEqual((bob.order_count, bob.total_spent), (2, Decimal('15.00')))
+        self.assertMatchesRebuild()
+
+    def test_deleting_a_laundromat_removes_its_orders(self):
+        closing, closed = [
+            Laundromat.objects.create(name=name, address='-', phone=f'+1555120001{index}')
+            for index, name in enumerate(['Closing', 'Closed'])
+        ]
+        self.make_receipt(self.alice, '20.00')
+        self.make_receipt(self.alice, '15.00', laundromat=closing)
+        self.make_receipt(self.bob, '30.00', laundromat=closing)
+        self.make_receipt(self.bob, '12.00', laundromat=closed)
+
+        closing.delete()
+        Laundromat.objects.filter(pk=closed.pk).delete()
+
+        alice = CustomerStats.objects.get(customer=self.alice)
+        self.assertEqual((alice.order_count, alice.total_spent), (1, Decimal('20.00')))
+        bob = CustomerStats.objects.get(customer=self.bob)
+        self.assertEqual((bob.order_count, bob.total_spent), (0, Decimal('0.00')))
+        self.assertMatchesRebuild()
+
+    def test_bulk_status_cancellation_updates_stats(self):
+        receipts = [self.make_receipt(self.alice, '10.00') for _ in range(3)]
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.post('/api/receipts/bulk-status/', {
+            'ids': [receipt.pk for receipt in receipts[:2]], 'status': 'cancelled'
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        alice = CustomerStats.objects.get(customer=self.alice)
+        self.assertEqual((alice.order_count, alice.total_spent), (1, Decimal('10.00')))
+        self.assertMatchesRebuild()
+
+    def test_top_customers_lifetime_and_range(self):
+        self.make_receipt(self.alice, '50.00')
+        self.make_receipt(self.bob, '20.00')
+        self.make_receipt(self.bob, '80.00', laundromat=self.other_laundromat)
+        self.client.force_authenticate(self.admin)
+
+        lifetime = self.client.get('/api/analytics/top-customers/', {'time_range': 'all'}).json()
+        self.assertEqual(
+            [(row['customer_name'], row['order_count'], row['total_spent']) for row in lifetime],
+            [('bob', 2, '100.00'), ('Alice', 1, '50.00')]
+        )
+        month = self.client.get('/api/analytics/top-customers/', {'limit': 1}).json()
+        self.assertEqual([row['customer_id'] for row in month], [self.bob.pk])
+
+        self.client.force_authenticate(self.staff)
+        scoped = self.client.get('/api/analytics/top-customers/', {'time_range': 'all'}).json()
+        self.assertEqual(
+            [(row['customer_id'], row['total_spent']) for row in scoped],
+            [(self.alice.pk, '50.00'), (self.bob.pk, '20.00')]
+        )
+
+    def test_top_customers_leave_out_cancelled_orders(self):
+        self.make_receipt(self.alice, '50.00')
+        cancelled = self.make_receipt(self.bob, '20.00')
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        self.client.force_authenticate(self.admin)
+
+        for time_range in ('week', 'all'):
+            with self.subTest(time_range=time_range):
+                top = self.client.get('/api/analytics/top-customers/', {'time_range': time_range}).json()
+                self.assertEqual([row['customer_id'] for row in top], [self.alice.pk])
+
+    def test_top_customers_rejects_bad_limit(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/analytics/top-customers/', {'limit': 'ten'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_customer_stats_profile(self):
+        self.make_receipt(self.bob, '20.00')
+        self.make_receipt(self.bob, '80.00', laundromat=self.other_laundromat)
+
+        self.client.force_authenticate(self.admin)
+        profile = self.client.get('/api/analytics/customer-stats/', {'customer_id': self.bob.pk}).json()
+        self.assertEqual((profile['order_count'], profile['total_spent']), (2, '100.00'))
+        self.assertEqual(
+            [row['laundromat_id'] for row in profile['laundromats']],
+            [self.other_laundromat.pk, self.laundromat.pk]
+        )
+
+        self.client.force_authenticate(self.staff)
+        profile = self.client.get('/api/analytics/customer-stats/', {'customer_id': self.bob.pk}).json()
+        self.assertEqual((profile['order_count'], profile['total_spent']), (1, '20.00'))
+        self.assertEqual(len(profile['laundromats']), 1)
+
+        response = self.client.get('/api/analytics/customer-stats/', {'customer_id': self.alice.pk})
+        self.assertEqual(response.status_code, 404)
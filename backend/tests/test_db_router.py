@@ -0,0 +1,126 @@
+"""
+Tests for the primary/replica database router in config/db_router.py.
+
+Routing decisions are checked directly against the router; the replica
+health check is patched so no second database is needed, and is itself
+checked against throwaway SQLite files.
+"""
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db.utils import ConnectionHandler
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.receipts.models import Receipt
+from config import db_router
+from config.db_router import (
+    ReplicaPinningMiddleware,
+    ReplicaRouter,
+    read_from_replica,
+    request_routing,
+)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+@mock.patch.object(db_router, 'replica_is_healthy', return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_default_to_primary(self, healthy):
+        with request_routing():
+            self.assertEqual(self.router.db_for_read(Receipt), 'default')
+
+    def test_replica_scope_reads_from_replica(self, healthy):
+        with request_routing(), read_from_replica():
+            self.assertEqual(self.router.db_for_read(Receipt), 'replica1')
+
+    def test_replica_scope_without_request(self, healthy):
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Receipt), 'replica1')
+        self.assertEqual(self.router.db_for_read(Receipt), 'default')
+
+    def test_write_pins_rest_of_request_to_primary(self, healthy):
+        with request_routing(), read_from_replica():
+            self.assertEqual(self.router.db_for_write(Receipt), 'default')
+            self.assertEqual(self.router.db_for_read(Receipt), 'default')
+
+        # The next request starts unpinned again.
+        with request_routing(), read_from_replica():
+            self.assertEqual(self.router.db_for_read(Receipt), 'replica1')
+
+    def test_unsafe_request_starts_pinned(self, healthy):
+        with request_routing(pinned=True), read_from_replica():
+            self.assertEqual(self.router.db_for_read(Receipt), 'default')
+
+    def test_reads_inside_transaction_use_primary(self, healthy):
+        primary = mock.Mock(in_atomic_block=True)
+        with mock.patch.object(db_router, 'connections', {'default': primary}), read_from_replica():
+            self.assertEqual(self.router.db_for_read(Receipt), 'default')
+
+    def test_unhealthy_replica_falls_back_to_primary(self, healthy):
+        healthy.return_value = False
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Receipt), 'default')
+
+    def test_replicas_are_not_migrated(self, healthy):
+        self.assertIs(self.router.allow_migrate('replica1', 'receipts'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'receipts'))
+
+
+class ReplicaHealthCheckTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.addCleanup(db_router._replica_health.clear)
+
+    def is_healthy(self, path):
+        database = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(path)}
+        connections = ConnectionHandler({'default': database, 'replica1': database})
+        self.addCleanup(connections.close_all)
+        db_router._replica_health.clear()
+        with mock.patch.object(db_router, 'connections', connections):
+            return db_router.replica_is_healthy('replica1')
+
+    def test_missing_sqlite_file_is_unhealthy_and_not_created(self):
+        path = self.directory / 'missing.sqlite3'
+        self.assertFalse(self.is_healthy(path))
+        self.assertFalse(path.exists())
+
+    def test_unmigrated_database_is_unhealthy(self):
+        path = self.directory / 'empty.sqlite3'
+        sqlite3.connect(path).close()
+        self.assertFalse(self.is_healthy(path))
+
+    def test_migrated_database_is_healthy(self):
+        path = self.directory / 'replica.sqlite3'
+        with sqlite3.connect(path) as database:
+            database.execute('CREATE TABLE django_migrations (id integer PRIMARY KEY)')
+        database.close()
+        self.assertTrue(self.is_healthy(path))
+
+
+class ReplicaPinningMiddlewareTests(SimpleTestCase):
+
+    def get_pinned(self, method):
+        seen = {}
+
+        def view(request):
+            seen['pinned'] = db_router._routing_state.get().pinned
+            return None
+
+        request = RequestFactory().generic(method, '/api/analytics/overview/')
+        ReplicaPinningMiddleware(view)(request)
+        self.assertIsNone(db_router._routing_state.get())
+        return seen['pinned']
+
+    def test_safe_methods_start_unpinned(self):
+        self.assertFalse(self.get_pinned('GET'))
+
+    def test_unsafe_methods_start_pinned(self):
+        self.assertTrue(self.get_pinned('POST'))
@@ -0,0 +1,148 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import ArchivedReceipt, Receipt
+from apps.receipts.serializers import (
+    ArchivedReceiptListSerializer,
+    ReceiptListSerializer,
+    ReceiptSerializer,
+)
+from apps.users.models import User
+from apps.users.serializers import UserSerializer
+from config.fast_serializers import RowSerializer
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class FastSerializerTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15551700000')
+        cls.admin = User.objects.create_user(
+            username='fast_admin', password='x', phone='+15551700001', role='admin'
+        )
+        cls.customer = User.objects.create_user(
+            username='fast_customer', password='x', phone='+15551700002',
+            first_name='Ada', profile_picture='profile_pictures/ada.png',
+        )
+        User.objects.create_user(username='fast_plain', password='x', phone='+15551700003')
+
+        now = timezone.now()
+        Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=cls.laundromat, customer=cls.customer, status=status,
+                expected_pickup_date=now + timedelta(days=index),
+                items_description=f'Load {index}', items_count=index,
+                price=Decimal(price), qr_code=f'qr_codes/fast{index}.png',
+            )
+            for index, (status, price) in enumerate([
+                ('pending', '12.5'), ('ready', '0'), ('completed', '1234.99'),
+            ])
+        ])
+        # Same created_at as the newest live receipt, to check tie order
+        newest = Receipt.objects.first()
+        ArchivedReceipt.objects.bulk_create([ArchivedReceipt(
+            id=10_000, receipt_number='ARCHIVED1', laundromat=cls.laundromat,
+            customer=cls.customer, status='completed', drop_off_date=now - timedelta(days=400),
+            expected_pickup_date=now - timedelta(days=399), items_description='Old load',
+            price=Decimal('7.00'), created_at=newest.created_at, updated_at=now,
+        )])
+
+    def assertSameBytes(self, serializer_class, queryset, context=None):
+        row_serializer = RowSerializer(serializer_class, context)
+        fast = row_serializer.serialize(row_serializer.rows(queryset))
+        self.assertEqual(
+            render(fast), render(serializer_class(queryset, many=True, context=context or {}).data)
+        )
+
+    def test_rows_render_like_the_serializers(self):
+        request = Request(APIRequestFactory().get('/api/users/customers/'))
+        receipts = Receipt.objects.select_related('customer', 'laundromat')
+
+        self.assertSameBytes(ReceiptListSerializer, receipts)
+        self.assertSameBytes(ArchivedReceiptListSerializer, ArchivedReceipt.objects.all())
+        self.assertSameBytes(UserSerializer, User.objects.all())
+        self.assertSameBytes(UserSerializer, User.objects.all(), {'request': request})
+
+    def test_endpoints_match_the_serializers(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/receipts/')
+        receipts = ReceiptListSerializer(Receipt.objects.all(), many=True)
+        self.assertEqual(render(response.json()['results']), render(receipts.data))
+
+        response = self.client.get('/api/receipts/active/')
+        active = Receipt.objects.exclude(status__in=['completed', 'cancelled'])
+        self.assertEqual(response.json()['count'], 2)
+        active = ReceiptListSerializer(active, many=True)
+        self.assertEqual(render(response.json()['results']), render(active.data))
+
+        response = self.client.get(f'/api/laundromats/{self.laundromat.pk}/receipts/')
+        self.assertEqual(response.getvalue(), render(receipts.data))
+
+        response = self.client.get('/api/users/customers/')
+        body = response.getvalue()
+        context = {'request': Request(response.wsgi_request)}
+        customers = UserSerializer(User.objects.filter(role='customer'), many=True, context=context)
+        self.assertEqual(body, render(customers.data))
+        pictures = [user['profile_picture_url'] for user in json.loads(body)]
+        self.assertIn('http://testserver/media/profile_pictures/ada.png', pictures)
+
+    def test_history_merges_live_and_archived_rows(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get('/api/receipts/my_receipts/')
+
+        history = sorted(
+            [*Receipt.objects.all(), *ArchivedReceipt.objects.all()],
+            key=lambda receipt: receipt.created_at, reverse=True
+        )
+        expected = [
+            (ArchivedReceiptListSerializer if isinstance(receipt, ArchivedReceipt)
+             else ReceiptListSerializer)(receipt).data
+            for receipt in history
+        ]
+        body = response.getvalue()
+        self.assertEqual(body, render(expected))
+        self.assertEqual(json.loads(body)[1]['receipt_number'], 'ARCHIVED1')
+
+    def test_sparse_requests_keep_the_full_serializer(self):
+        self.client.force_authenticate(self.admin)
+        data = json.loads(self.client.get('/api/users/customers/', {'fields': 'id,username'}).getvalue())
+        self.assertIn({'id': self.customer.pk, 'username': 'fast_customer'}, data)
+
+    @override_settings(ALLOWED_HOSTS=['one.example', 'two.example'])
+    def test_classes_are_compiled_once(self):
+        RowSerializer.plans.pop(UserSerializer, None)
+        requests = [
+            Request(APIRequestFactory().get('/api/users/customers/', HTTP_HOST=host))
+            for host in ('one.example', 'two.example')
+        ]
+        with mock.patch.object(RowSerializer, 'compile', wraps=RowSerializer.compile) as compile_plan:
+            row_serializers = [RowSerializer(UserSerializer, {'request': request}) for request in requests]
+        self.assertEqual(compile_plan.call_count, 1)
+
+        # Converters that read the request are still bound per request
+        customers = User.objects.filter(pk=self.customer.pk)
+        urls = [
+            row_serializer.serialize(row_serializer.rows(customers))[0]['profile_picture_url']
+            for row_serializer in row_serializers
+        ]
+        self.assertEqual(urls, [
+            'http://one.example/media/profile_pictures/ada.png',
+            'http://two.example/media/profile_pictures/ada.png',
+        ])
+
+    def test_fields_without_a_row_source_are_rejected(self):
+        with self.assertRaises(TypeError):
+            RowSerializer(ReceiptSerializer)
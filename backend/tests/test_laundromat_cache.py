@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.cache import LaundromatCache, laundromat_cache
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+
+
+class LaundromatCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15552000000')
+        cls.admin = User.objects.create_user(
+            username='cache_admin', password='x', phone='+15552000001', role='admin'
+        )
+        cls.customer = User.objects.create_user(
+            username='cache_customer', password='x', phone='+15552000002'
+        )
+        (cls.receipt,) = Receipt.objects.bulk_create([Receipt(
+            laundromat=cls.laundromat, customer=cls.customer,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description='Shirts', price=Decimal('12.00'), qr_code='qr_codes/cache.png',
+        )])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        # Forget rows a rolled-back test may have left behind
+        laundromat_cache.invalidate()
+        laundromat_cache.fresh_rows()
+
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), [query['sql'] for query in ctx.captured_queries]
+
+    def test_receipts_read_laundromats_from_the_cache(self):
+        data, queries = self.get('/api/receipts/')
+        self.assertEqual(data['results'][0]['laundromat_name'], 'Main')
+
+        data, detail_queries = self.get(f'/api/receipts/{self.receipt.pk}/')
+        self.assertEqual(data['laundromat'], {
+            'id': self.laundromat.pk, 'name': 'Main', 'address': '1 Main St',
+            'phone': '+15552000000', 'is_active': True,
+        })
+        for sql in queries + detail_queries:
+            self.assertNotIn('JOIN "laundromats"', sql)
+
+    def test_writes_invalidate_this_worker(self):
+        self.laundromat.name = 'Renamed'
+        self.laundromat.save()
+        data, _ = self.get('/api/receipts/')
+        self.assertEqual(data['results'][0]['laundromat_name'], 'Renamed')
+
+        Laundromat.objects.filter(pk=self.laundromat.pk).update(name='Updated')
+        data, _ = self.get(f'/api/receipts/{self.receipt.pk}/')
+        self.assertEqual(data['laundromat']['name'], 'Updated')
+
+    @override_settings(LAUNDROMAT_CACHE_CHECK_SECONDS=0)
+    def test_other_workers_reload_once_the_write_commits(self):
+        other = LaundromatCache()
+        self.assertEqual(other.get(self.laundromat.pk).name, 'Main')
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Laundromat.objects.filter(pk=self.laundromat.pk).update(name='Updated')
+            # Not committed yet, so the shared version has not moved
+            self.assertEqual(other.get(self.laundromat.pk).name, 'Main')
+        self.assertEqual(len(callbacks), 1)
+
+        self.assertEqual(other.get(self.laundromat.pk).name, 'Updated')
+        self.assertEqual(other.get_stats()['loads'], 2)
+
+    def test_list_payload_is_cached_per_url(self):
+        first, _ = self.get('/api/laundromats/')
+        second, queries = self.get('/api/laundromats/')
+        self.assertEqual(second, first)
+        self.assertEqual(queries, [])
+
+        # Other parameters are other payloads
+        data, queries = self.get('/api/laundromats/', is_active='false')
+        self.assertEqual(data['results'], [])
+        self.assertNotEqual(queries, [])
+
+        Laundromat.objects.create(name='Annex', address='2 Main St', phone='+15552000003')
+        data, _ = self.get('/api/laundromats/')
+        self.assertEqual([row['name'] for row in data['results']], ['Annex', 'Main'])
+
+    def test_stats_are_admin_only(self):
+        self.get('/api/receipts/')
+        stats, _ = self.get('/api/laundromats/cache-stats/')
+        self.assertEqual(stats['laundromats'], 1)
+        self.assertGreater(stats['hits'], 0)
+        self.assertIn('hit_rate', stats)
+
+        self.client.force_authenticate(self.customer)
+        response = self.client.get('/api/laundromats/cache-stats/')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.archive import archive_closed_receipts
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from apps.videos.models import Video
+from config import media_gc
+
+OLD = time.time() - 3 * 24 * 3600
+
+
+class MediaGCTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15558200000')
+        cls.customer = User.objects.create_user(
+            username='gc_customer', password='x', phone='+15558200001',
+            profile_picture='profile_pictures/current.png'
+        )
+        cls.receipt = cls.make_receipt('qr_codes/live.png')
+        Video.objects.bulk_create([Video(
+            receipt=cls.receipt, video_type='intake', video_file='videos/2026/01/02/live.mp4',
+            thumbnail='thumbnails/2026/01/02/live.jpg', file_size=4,
+        )])
+
+    @classmethod
+    def make_receipt(cls, qr_code, status='pending'):
+        return Receipt.objects.bulk_create([Receipt(
+            laundromat=cls.laundromat, customer=cls.customer, status=status,
+            expected_pickup_date=timezone.now(), items_description='Shirts',
+            price=Decimal('10.00'), qr_code=qr_code,
+        )])[0]
+
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        self.media = tmp / 'media'
+        self.quarantine = tmp / 'quarantine'
+        self.state_path = tmp / 'media_gc.json'
+        overrides = override_settings(
+            MEDIA_ROOT=self.media, MEDIA_GC_QUARANTINE_ROOT=self.quarantine,
+            MEDIA_GC_STATE_PATH=str(self.state_path), MEDIA_GC_GRACE_HOURS=24,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        for name in [
+            'qr_codes/live.png', 'videos/2026/01/02/live.mp4', 'thumbnails/2026/01/02/live.jpg',
+            'profile_pictures/current.png',
+            'qr_codes/deleted.png', 'videos/2026/01/02/deleted.mp4', 'profile_pictures/replaced.png',
+            'unmanaged/notes.txt',
+        ]:
+            self.write(name)
+
+    def write(self, name, mtime=OLD):
+        path = self.media / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'data')
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def remaining(self, root):
+        return sorted(str(path.relative_to(root)) for path in root.rglob('*') if path.is_file())
+
+    def test_orphans_are_quarantined(self):
+        self.write('videos/2026/01/03/fresh.mp4', mtime=time.time())
+
+        stats = media_gc.collect(workers=2)
+
+        self.assertEqual(self.remaining(self.quarantine), [
+            'profile_pictures/replaced.png', 'qr_codes/deleted.png', 'videos/2026/01/02/deleted.mp4',
+        ])
+        self.assertEqual(self.remaining(self.media), [
+            'profile_pictures/current.png', 'qr_codes/live.png', 'thumbnails/2026/01/02/live.jpg',
+            'unmanaged/notes.txt', 'videos/2026/01/02/live.mp4', 'videos/2026/01/03/fresh.mp4',
+        ])
+        self.assertEqual((stats.files, stats.orphans, stats.recent), (8, 3, 1))
+        self.assertEqual((stats.reclaimed, stats.reclaimed_bytes), (3, 12))
+        self.assertFalse(self.state_path.exists())
+
+    def test_archived_files_are_kept(self):
+        closed = self.make_receipt('qr_codes/archived.png', status='completed')
+        self.write('qr_codes/archived.png')
+        Receipt.objects.filter(pk=closed.pk).update(updated_at=timezone.now() - timedelta(days=400))
+        archive_closed_receipts(timezone.now() - timedelta(days=180))
+
+        media_gc.collect(action='delete')
+
+        self.assertTrue((self.media / 'qr_codes/archived.png').exists())
+        self.assertFalse((self.media / 'qr_codes/deleted.png').exists())
+        self.assertFalse(self.quarantine.exists())
+
+    def test_rows_written_during_the_walk_keep_their_files(self):
+        self.write('qr_codes/late.png')
+        confirm = media_gc.still_referenced
+
+        def late_row(fields, names):
+            # The row shows up after the referenced set was read
+            self.make_receipt('qr_codes/late.png')
+            return confirm(fields, names)
+
+        with mock.patch.object(media_gc, 'still_referenced', late_row):
+            stats = media_gc.collect()
+
+        self.assertTrue((self.media / 'qr_codes/late.png').exists())
+        self.assertEqual(stats.orphans, 3)
+
+    def test_unfinished_run_is_resumed(self):
+        state = media_gc.State(
+            self.state_path, OLD + 3600, 'quarantine', finished=['videos/2026/01/02'],
+            stats=media_gc.Stats(directories=1, files=2, orphans=1, reclaimed=1, reclaimed_bytes=4),
+        )
+        state.save()
+
+        stats = media_gc.collect()
+
+        # Files in the finished directory were handled by the first run
+        self.assertTrue((self.media / 'videos/2026/01/02/deleted.mp4').exists())
+        self.assertEqual(self.remaining(self.quarantine), ['profile_pictures/replaced.png', 'qr_codes/deleted.png'])
+        self.assertEqual((stats.files, stats.orphans, stats.reclaimed, stats.reclaimed_bytes), (7, 3, 3, 12))
+
+        state.save()
+        media_gc.collect(resume=False)
+        self.assertFalse((self.media / 'videos/2026/01/02/deleted.mp4').exists())
+
+    def test_referenced_paths(self):
+        names = [f'videos/2026/01/{day:02}/{day}.mp4' for day in range(1, 31)]
+        referenced = media_gc.ReferencedPaths(iter(names))
+
+        self.assertEqual(len(referenced), 30)
+        self.assertEqual(referenced.hashes.itemsize, 8)
+        self.assertTrue(all(name in referenced for name in names))
+        self.assertNotIn('videos/2026/01/01/2.mp4', referenced)
+        self.assertNotIn('anything', media_gc.ReferencedPaths())
+
+    def test_command_dry_run(self):
+        out = StringIO()
+        call_command('gc_media', dry_run=True, workers=1, stdout=out)
+
+        self.assertIn('Scanned 7 files', out.getvalue())
+        self.assertIn('3 orphans (0.0 MB) would be collected', out.getvalue())
+        self.assertEqual(len(self.remaining(self.media)), 8)
+        self.assertFalse(self.quarantine.exists())
@@ -0,0 +1,93 @@
+import random
+
+from rest_framework.test import APITestCase
+
+from apps.laundromats import geo
+from apps.laundromats.models import Laundromat
+from apps.users.models import User
+
+
+class NearbyLaundromatTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            username='nearby_customer', password='x', phone='+15552100001'
+        )
+        Laundromat.objects.bulk_create([
+            Laundromat(name=name, address=name, phone='+15552100000', latitude=lat, longitude=lng,
+                       is_active=is_active)
+            for name, lat, lng, is_active in [
+                ('City Hall', 40.7128, -74.0060, True),
+                ('Brooklyn', 40.6782, -73.9442, True),
+                ('Midtown', 40.7549, -73.9840, True),
+                ('Closed', 40.7130, -74.0062, False),
+                ('Philadelphia', 39.9526, -75.1652, True),
+            ]
+        ])
+        Laundromat.objects.create(name='Unmapped', address='?', phone='+15552100000')
+
+    def setUp(self):
+        self.client.force_authenticate(self.customer)
+
+    def nearby(self, **params):
+        response = self.client.get('/api/laundromats/nearby/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_closest_first_with_distance(self):
+        data = self.nearby(lat=40.7128, lng=-74.0060)
+        self.assertEqual([row['name'] for row in data], ['City Hall', 'Midtown', 'Brooklyn'])
+        self.assertEqual(data[0]['distance_km'], 0)
+        self.assertAlmostEqual(data[1]['distance_km'], 5.0, delta=0.2)
+        self.assertEqual(data[1]['latitude'], 40.7549)
+
+    def test_radius_and_limit(self):
+        self.assertEqual(len(self.nearby(lat=40.7128, lng=-74.0060, radius=1)), 1)
+        self.assertEqual(len(self.nearby(lat=40.7128, lng=-74.0060, limit=2)), 2)
+        names = [row['name'] for row in self.nearby(lat=40.7128, lng=-74.0060, radius=200)]
+        self.assertEqual(names[-1], 'Philadelphia')
+
+    def test_matches_a_full_scan(self):
+        rng = random.Random(43)
+        Laundromat.objects.bulk_create([
+            Laundromat(name=f'Random {index}', address='-', phone='+15552100000',
+                       latitude=rng.uniform(40.4, 41.0), longitude=rng.uniform(-74.4, -73.6))
+            for index in range(300)
+        ])
+        active = Laundromat.objects.filter(is_active=True).exclude(latitude=None)
+        for _ in range(10):
+            lat, lng = rng.uniform(40.4, 41.0), rng.uniform(-74.4, -73.6)
+            radius = rng.choice([0.5, 2, 10, 50])
+            expected = sorted(
+                (distance, laundromat.pk) for laundromat in active
+                if (distance := geo.distance_km(lat, lng, laundromat.latitude, laundromat.longitude)) <= radius
+            )[:10]
+            data = self.nearby(lat=lat, lng=lng, radius=radius)
+            self.assertEqual([row['id'] for row in data], [pk for _, pk in expected])
+
+    def test_across_the_antimeridian(self):
+        Laundromat.objects.create(
+            name='Fiji', address='-', phone='+15552100000', latitude=-16.5, longitude=179.99
+        )
+        data = self.nearby(lat=-16.5, lng=-179.99)
+        self.assertEqual([row['name'] for row in data], ['Fiji'])
+
+    def test_geohash_follows_the_coordinates(self):
+        laundromat = Laundromat.objects.get(name='Unmapped')
+        self.assertEqual(laundromat.geohash, '')
+        laundromat.latitude, laundromat.longitude = 57.64911, 10.40744
+        laundromat.save(update_fields=['latitude', 'longitude'])
+        laundromat.refresh_from_db()
+        self.assertEqual(laundromat.geohash, 'u4pruydqq')
+
+        Laundromat.objects.filter(pk=laundromat.pk).update(latitude=40.7128, longitude=-74.0060)
+        self.assertEqual(Laundromat.objects.get(pk=laundromat.pk).geohash, geo.encode(40.7128, -74.0060))
+
+    def test_invalid_parameters(self):
+        for params in ({}, {'lat': 40}, {'lat': 'x', 'lng': 0}, {'lat': 91, 'lng': 0},
+                       {'lat': 0, 'lng': 0, 'radius': 1000}, {'lat': 0, 'lng': 0, 'limit': 0},
+                       {'lat': 'nan', 'lng': 0}):
+            response = self.client.get('/api/laundromats/nearby/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
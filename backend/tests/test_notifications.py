@@ -0,0 +1,290 @@
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.notifications import outbox
+from apps.notifications.models import Device, OutboxEvent
+from apps.notifications.transports import (
+    DeliveryError, FileTransport, HTTPTransport, InvalidDevice, Transport, get_transport,
+)
+from apps.receipts.models import Receipt
+from apps.users.models import User
+
+
+class RecordingTransport(Transport):
+    """Returns the queued results in turn and keeps what it was sent"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.sent = []
+
+    def send(self, messages):
+        self.sent.append(messages)
+        if self.results:
+            return self.results.pop(0)(messages)
+        return [None] * len(messages)
+
+
+class IncompleteTransport(Transport):
+    """A transport that forgot to implement send()"""
+
+    def deliver(self, messages):
+        return [None] * len(messages)
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """Push gateway rejecting tokens that start with 'bad'"""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(payload)
+        results = [
+            {'error': 'invalid_token' if message['token'].startswith('bad') else None}
+            for message in payload['messages']
+        ]
+        body = json.dumps({'results': results}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class NotificationTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15552300000')
+        cls.staff = User.objects.create_user(
+            username='push_staff', password='x', phone='+15552300001', role='staff', laundromat=cls.laundromat
+        )
+        cls.customer = User.objects.create_user(username='push_customer', password='x', phone='+15552300002')
+        cls.other = User.objects.create_user(username='push_other', password='x', phone='+15552300003')
+        cls.phone = Device.objects.create(user=cls.customer, token='phone-token', platform='android')
+        cls.tablet = Device.objects.create(user=cls.customer, token='tablet-token', platform='ios')
+
+    def make_receipt(self, customer=None):
+        return Receipt.objects.create(
+            laundromat=self.laundromat, customer=customer or self.customer, staff=self.staff,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description='Shirts', price=Decimal('10.00'), qr_code='qr_codes/push.png',
+        )
+
+    def test_status_change_queues_a_notification_without_sending(self):
+        receipt = self.make_receipt()
+        self.assertFalse(OutboxEvent.objects.exists())
+
+        self.client.force_authenticate(self.staff)
+        with mock.patch('apps.notifications.transports.get_transport') as get_transport:
+            response = self.client.patch(
+                f'/api/receipts/{receipt.pk}/update_status/', {'status': 'washing'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        get_transport.assert_not_called()
+        event = OutboxEvent.objects.get()
+        self.assertEqual(
+            (event.receipt_id, event.receipt_number, event.user_id, event.status),
+            (receipt.pk, receipt.receipt_number, self.customer.pk, 'washing'),
+        )
+        self.assertIsNone(event.sent_at)
+
+    def test_rolled_back_change_queues_nothing(self):
+        receipt = self.make_receipt()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                receipt.status = 'washing'
+                receipt.save()
+                raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_bulk_status_and_complete_queue_notifications(self):
+        first, second = self.make_receipt(), self.make_receipt(self.other)
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(
+            '/api/receipts/bulk-status/', {'ids': [first.pk, second.pk], 'status': 'washing'}, format='json'
+        )
+        self.assertEqual(response.data['updated'], 2)
+        Receipt.objects.filter(pk=first.pk).update(status='ready')
+        response = self.client.post(f'/api/receipts/{first.pk}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(OutboxEvent.objects.values_list('receipt_number', 'user_id', 'status')),
+            sorted([
+                (first.receipt_number, self.customer.pk, 'washing'),
+                (second.receipt_number, self.other.pk, 'washing'),
+                (first.receipt_number, self.customer.pk, 'completed'),
+            ]),
+        )
+
+    def test_dispatch_coalesces_events_per_device(self):
+        first, second = self.make_receipt(), self.make_receipt()
+        for status in ('washing', 'drying', 'ready'):
+            first.status = status
+            first.save()
+        second.status = 'washing'
+        second.save()
+
+        transport = RecordingTransport()
+        stats = outbox.dispatch_batch(transport)
+        self.assertEqual((stats['events'], stats['coalesced'], stats['messages']), (4, 2, 2))
+        (messages,) = transport.sent
+        self.assertEqual(sorted(message['token'] for message in messages), ['phone-token', 'tablet-token'])
+        self.assertEqual(messages[0]['title'], '2 order updates')
+        self.assertEqual(
+            sorted((receipt['id'], receipt['status']) for receipt in messages[0]['data']['receipts']),
+            sorted([(first.pk, 'ready'), (second.pk, 'washing')]),
+        )
+        self.assertFalse(OutboxEvent.objects.pending().exists())
+        self.assertEqual(outbox.dispatch_batch(transport)['events'], 0)
+
+    def test_failures_back_off_then_give_up(self):
+        receipt = self.make_receipt()
+        receipt.status = 'washing'
+        receipt.save()
+        failing = RecordingTransport(*[lambda messages: [DeliveryError('unavailable')] * len(messages)] * 3)
+
+        now = timezone.now()
+        with override_settings(PUSH_MAX_ATTEMPTS=3, PUSH_RETRY_BASE_SECONDS=10, PUSH_RETRY_MAX_SECONDS=15):
+            stats = outbox.dispatch_batch(failing, now=now)
+            self.assertEqual((stats['failed_messages'], stats['retried']), (2, 1))
+            event = OutboxEvent.objects.get()
+            self.assertEqual((event.attempts, event.last_error), (1, 'unavailable'))
+            self.assertTrue(now + timedelta(seconds=5) <= event.next_attempt_at <= now + timedelta(seconds=10))
+            # Not due yet
+            self.assertEqual(outbox.dispatch_batch(failing, now=now)['events'], 0)
+
+            now = event.next_attempt_at
+            outbox.dispatch_batch(failing, now=now)
+            event.refresh_from_db()
+            # The second delay is capped at PUSH_RETRY_MAX_SECONDS
+            self.assertLessEqual(event.next_attempt_at, now + timedelta(seconds=15))
+
+            stats = outbox.dispatch_batch(failing, now=event.next_attempt_at)
+        self.assertEqual(stats['failed'], 1)
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 3)
+        self.assertIsNotNone(event.failed_at)
+        self.assertFalse(OutboxEvent.objects.pending().exists())
+
+    def test_transport_exception_keeps_events_for_retry(self):
+        receipt = self.make_receipt()
+        receipt.status = 'washing'
+        receipt.save()
+
+        def crash(messages):
+            raise ConnectionResetError('reset')
+        stats = outbox.dispatch_batch(RecordingTransport(crash))
+        self.assertEqual(stats['retried'], 1)
+        self.assertIn('ConnectionResetError', OutboxEvent.objects.get().last_error)
+
+    def test_rejected_tokens_deactivate_the_device(self):
+        receipt = self.make_receipt()
+        receipt.status = 'washing'
+        receipt.save()
+
+        def reject_phone(messages):
+            return [InvalidDevice('gone') if message['token'] == 'phone-token' else None for message in messages]
+        stats = outbox.dispatch_batch(RecordingTransport(reject_phone))
+        self.assertEqual((stats['delivered'], stats['deactivated_devices']), (1, 1))
+        self.phone.refresh_from_db()
+        self.assertFalse(self.phone.is_active)
+        self.assertIsNotNone(OutboxEvent.objects.get().sent_at)
+
+    def test_users_without_devices_are_marked_sent(self):
+        receipt = self.make_receipt(self.other)
+        receipt.status = 'washing'
+        receipt.save()
+        transport = RecordingTransport()
+        stats = outbox.dispatch_batch(transport)
+        self.assertEqual((stats['no_device'], stats['messages']), (1, 0))
+        self.assertEqual(transport.sent, [])
+        self.assertFalse(OutboxEvent.objects.pending().exists())
+
+    def test_file_transport_appends_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'push.jsonl'
+            transport = FileTransport(path)
+            self.assertEqual(transport.send([{'token': 'a', 'title': 'One'}]), [None])
+            transport.send([{'token': 'b', 'title': 'Two'}])
+            lines = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual([line['token'] for line in lines], ['a', 'b'])
+        self.assertIn('sent_at', lines[0])
+
+    def test_http_transport_maps_gateway_results(self):
+        server = HTTPServer(('127.0.0.1', 0), GatewayHandler)
+        server.requests = []
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            transport = HTTPTransport(f'http://127.0.0.1:{server.server_port}/send', timeout=5)
+            errors = transport.send([{'token': 'good'}, {'token': 'bad-token'}])
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], InvalidDevice)
+        self.assertEqual(len(server.requests), 1)
+
+        errors = HTTPTransport(f'http://127.0.0.1:{server.server_port}/send', timeout=1).send([{'token': 'x'}])
+        self.assertIsInstance(errors[0], DeliveryError)
+
+    def test_transport_without_send_fails_when_created(self):
+        with override_settings(PUSH_TRANSPORT='tests.test_notifications.IncompleteTransport'):
+            with self.assertRaisesMessage(TypeError, 'send'):
+                get_transport()
+        with override_settings(PUSH_TRANSPORT='apps.notifications.transports.FileTransport'):
+            self.assertIsInstance(get_transport(), FileTransport)
+
+    def test_command_reports_throughput(self):
+        receipt = self.make_receipt()
+        receipt.status = 'washing'
+        receipt.save()
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'push.jsonl'
+            out = StringIO()
+            with override_settings(PUSH_TRANSPORT='apps.notifications.transports.FileTransport',
+                                   PUSH_FILE_PATH=str(path)):
+                call_command('dispatch_notifications', stdout=out)
+            self.assertEqual(len(path.read_text().splitlines()), 2)
+        output = out.getvalue()
+        self.assertIn('Sent 1 events', output)
+        self.assertIn('messages/s', output)
+        self.assertIn('0 pending', output)
+
+    def test_register_and_remove_devices(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.post(
+            '/api/notifications/devices/', {'token': 'phone-token', 'platform': 'android'}, format='json'
+        )
+        # Registering a known token moves it to the caller
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Device.objects.get(token='phone-token').user, self.other)
+
+        response = self.client.post(
+            '/api/notifications/devices/', {'token': 'new-token', 'platform': 'web'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(device['token'] for device in self.client.get('/api/notifications/devices/').data),
+            ['new-token', 'phone-token'],
+        )
+        response = self.client.delete(f"/api/notifications/devices/{response.data['id']}/")
+        self.assertEqual(response.status_code, 204)
+        response = self.client.delete(f'/api/notifications/devices/{self.tablet.pk}/')
+        self.assertEqual(response.status_code, 404)
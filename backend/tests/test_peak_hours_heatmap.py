@@ -0,0 +1,161 @@
+import zoneinfo
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.analytics.models import HourlyReceiptStats
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt, ReceiptStatusEvent
+from apps.users.models import User
+
+
+class PeakHoursHeatmapTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(
+            name='Main', address='1 Main St', phone='+15551400000', timezone='America/New_York'
+        )
+        cls.other_laundromat = Laundromat.objects.create(
+            name='Other', address='2 Side St', phone='+15551400001'
+        )
+        cls.admin = User.objects.create_user(
+            username='heatmap_admin', password='x', phone='+15551400002', role='admin'
+        )
+        cls.staff = User.objects.create_user(
+            username='heatmap_staff', password='x', phone='+15551400003', role='staff',
+            laundromat=cls.laundromat
+        )
+        cls.customer = User.objects.create_user(
+            username='heatmap_customer', password='x', phone='+15551400004'
+        )
+
+    def make_receipt(self, laundromat, price='10.00', status='pending'):
+        receipt = Receipt(
+            laundromat=laundromat, customer=self.customer, status=status,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description='Load', price=Decimal(price), qr_code='qr_codes/heatmap.png',
+        )
+        receipt.save()
+        return receipt
+
+    def place_at(self, receipt, moment):
+        Receipt.objects.filter(pk=receipt.pk).update(created_at=moment)
+
+    def heatmap(self, **params):
+        response = self.client.get('/api/analytics/peak-hours/', {'mode': 'heatmap', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def cell(self, data, moment, zone):
+        local = moment.astimezone(zoneinfo.ZoneInfo(zone))
+        (cell,) = [
+            cell for cell in data['cells']
+            if (cell['day_of_week'], cell['hour']) == (local.weekday(), local.hour)
+        ]
+        return cell
+
+    def test_rollups_follow_receipt_writes(self):
+        receipt = self.make_receipt(self.laundromat)
+        cancelled = self.make_receipt(self.laundromat, price='5.00')
+        for status in ('washing', 'drying', 'ready', 'completed'):
+            receipt.status = status
+            receipt.save()
+        cancelled.status = 'cancelled'
+        cancelled.save()
+
+        totals = HourlyReceiptStats.objects.filter(laundromat=self.laundromat).aggregate(
+            orders=Sum('order_count'), revenue=Sum('revenue'), completions=Sum('completed_count')
+        )
+        self.assertEqual(totals, {'orders': 2, 'revenue': Decimal('10.00'), 'completions': 1})
+
+        incremental = set(HourlyReceiptStats.objects.values_list(
+            'laundromat_id', 'hour', 'order_count', 'revenue', 'completed_count'
+        ))
+        call_command('rebuild_customer_stats', stdout=StringIO())
+        self.assertEqual(incremental, set(HourlyReceiptStats.objects.values_list(
+            'laundromat_id', 'hour', 'order_count', 'revenue', 'completed_count'
+        )))
+
+    def test_heatmap_uses_laundromat_time_zone(self):
+        moment = (timezone.now() - timedelta(days=2)).replace(minute=30)
+        receipts = [self.make_receipt(self.laundromat), self.make_receipt(self.other_laundromat)]
+        for receipt in receipts:
+            self.place_at(receipt, moment)
+        call_command('rebuild_customer_stats', stdout=StringIO())
+
+        self.client.force_authenticate(self.staff)
+        data = self.heatmap(time_range='week')
+        self.assertEqual(data['timezone'], 'America/New_York')
+        self.assertEqual(len(data['cells']), 7 * 24)
+        self.assertEqual(self.cell(data, moment, 'America/New_York')['order_count'], 1)
+        self.assertEqual(sum(cell['order_count'] for cell in data['cells']), 1)
+
+        self.client.force_authenticate(self.admin)
+        data = self.heatmap(time_range='week', tz='UTC')
+        self.assertEqual(self.cell(data, moment, 'UTC')['order_count'], 2)
+        data = self.heatmap(time_range='week', laundromat=self.other_laundromat.pk)
+        self.assertEqual(data['timezone'], 'UTC')
+        self.assertEqual(self.cell(data, moment, 'UTC')['order_count'], 1)
+
+    def test_zones_off_the_hour_are_counted_from_receipts(self):
+        kolkata = Laundromat.objects.create(
+            name='Kolkata', address='3 Park St', phone='+15551400005', timezone='Asia/Kolkata'
+        )
+        hour = (timezone.now() - timedelta(days=2)).replace(minute=0, second=0, microsecond=0)
+        early, late = self.make_receipt(kolkata), self.make_receipt(kolkata, price='7.00')
+        # One UTC hour, two local hours: xx:10 UTC is yy:40 in Kolkata, xx:45 the next hour
+        self.place_at(early, hour + timedelta(minutes=10))
+        self.place_at(late, hour + timedelta(minutes=45))
+        late = Receipt.objects.get(pk=late.pk)
+        late.status = 'completed'
+        late.save()
+        ReceiptStatusEvent.objects.filter(receipt=late).update(created_at=hour + timedelta(minutes=50))
+        call_command('rebuild_customer_stats', stdout=StringIO())
+
+        self.client.force_authenticate(self.admin)
+        data = self.heatmap(time_range='week', laundromat=kolkata.pk)
+        self.assertEqual(data['timezone'], 'Asia/Kolkata')
+        early_cell = self.cell(data, hour + timedelta(minutes=10), 'Asia/Kolkata')
+        late_cell = self.cell(data, hour + timedelta(minutes=45), 'Asia/Kolkata')
+        self.assertNotEqual(early_cell, late_cell)
+        self.assertEqual((early_cell['order_count'], early_cell['revenue']), (1, '10.00'))
+        self.assertEqual((late_cell['order_count'], late_cell['completed_count']), (1, 1))
+        self.assertEqual(sum(cell['order_count'] for cell in data['cells']), 2)
+
+        data = self.heatmap(time_range='week', tz='Asia/Kathmandu')
+        self.assertEqual(data['timezone'], 'Asia/Kathmandu')
+        self.assertEqual(self.cell(data, hour + timedelta(minutes=10), 'Asia/Kathmandu')['order_count'], 1)
+        self.assertEqual(self.cell(data, hour + timedelta(minutes=45), 'Asia/Kathmandu')['order_count'], 1)
+        self.assertEqual(sum(cell['order_count'] for cell in data['cells']), 2)
+
+    def test_unknown_laundromat_is_not_found(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/analytics/peak-hours/', {'mode': 'heatmap', 'laundromat': 999999})
+        self.assertEqual(response.status_code, 404)
+
+    def test_compare_with_previous_period(self):
+        now = timezone.now()
+        current, previous = self.make_receipt(self.laundromat), self.make_receipt(self.laundromat)
+        self.place_at(current, now - timedelta(days=3))
+        self.place_at(previous, now - timedelta(days=10))
+        call_command('rebuild_customer_stats', stdout=StringIO())
+
+        self.client.force_authenticate(self.staff)
+        data = self.heatmap(time_range='week', compare='true')
+        self.assertEqual(sum(cell['order_count'] for cell in data['cells']), 1)
+        self.assertEqual(sum(cell['previous_order_count'] for cell in data['cells']), 1)
+        self.assertEqual(
+            self.cell(data, now - timedelta(days=10), 'America/New_York')['previous_revenue'], '10.00'
+        )
+        self.assertIsNone(self.heatmap(time_range='week')['cells'][0]['previous_order_count'])
+
+    def test_unknown_time_zone_is_rejected(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/analytics/peak-hours/', {'mode': 'heatmap', 'tz': 'Mars/Base'})
+        self.assertEqual(response.status_code, 400)
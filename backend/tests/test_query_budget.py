@@ -0,0 +1,269 @@
+"""
+Query-budget regression tests for every GET route in config/urls.py.
+
+Each route is requested once with a small data set and again after the data
+set has grown tenfold. The number of SQL queries must not change between the
+two runs, so an N+1 introduced anywhere (a missing select_related, a per-row
+query inside a serializer or a loop in a view) fails here instead of in
+production.
+
+Routes are discovered from the URL resolver rather than listed by hand, so a
+new viewset or @action is covered as soon as it is registered.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from apps.videos.models import Video
+
+# Rows seeded per scale step. The second measurement runs at 10x this.
+SEED_ROWS = 3
+
+# Hard ceiling for any single GET route, whatever the data volume.
+MAX_QUERIES = 12
+
+# Routes that never touch the database and are slow to render.
+SKIPPED_ROUTES = {
+    'schema': 'OpenAPI schema generation, no database access',
+    'swagger-ui': 'static documentation page, no database access',
+}
+
+# Query parameters required by routes that reject bare requests.
+ROUTE_QUERY_PARAMS = {
+    'video-by-receipt': lambda fx: {'receipt_id': fx['receipt'].pk},
+    'analytics-customer-stats': lambda fx: {'customer_id': fx['user'].pk},
+    'laundromat-nearby': lambda fx: {'lat': 40.7, 'lng': -74.0, 'radius': 50},
+}
+
+
+def get_api_routes():
+    """
+    Return (name, kwarg names) for every GET-able DRF route in the URLconf.
+
+    Format-suffix duplicates are skipped; they resolve to the same view.
+    """
+    routes = {}
+
+    def walk(patterns):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                walk(pattern.url_patterns)
+                continue
+
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is None or not pattern.name:
+                continue
+
+            actions = getattr(pattern.callback, 'actions', None)
+            if actions is not None:
+                if 'get' not in actions:
+                    continue
+            elif not hasattr(view_class, 'get'):
+                continue
+
+            regex = getattr(pattern.pattern, 'regex', None)
+            kwargs = tuple(regex.groupindex) if regex is not None else ()
+            if 'format' in kwargs or 'format' in str(pattern.pattern):
+                continue
+
+            routes.setdefault(pattern.name, (view_class, kwargs))
+
+    walk(get_resolver().url_patterns)
+    return routes
+
+
+class QueryBudgetTests(APITestCase):
+    """Every GET route must issue a fixed number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(
+            name='Main Laundry', address='1 Main St', phone='+15551000000'
+        )
+        cls.admin = User.objects.create_user(
+            username='budget_admin', password='x', phone='+15551000001', role='admin'
+        )
+        cls.staff = User.objects.create_user(
+            username='budget_staff', password='x', phone='+15551000002',
+            role='staff', laundromat=cls.laundromat
+        )
+        cls.customer = User.objects.create_user(
+            username='budget_customer', password='x', phone='+15551000003',
+            role='customer'
+        )
+        cls.seeded = 0
+
+    def seed(self, count):
+        """
+        Add `count` rows of every kind that the API lists or aggregates:
+        laundromats, staff, customers, receipts (for the main customer and
+        for new customers, across every status) and their videos.
+        """
+        start = self.seeded
+        self.seeded += count
+        now = timezone.now()
+        statuses = [choice for choice, _ in Receipt.STATUS_CHOICES]
+
+        laundromats = Laundromat.objects.bulk_create([
+            Laundromat(name=f'Branch {i}', address=f'{i} Side St', phone=f'+1555200{i:04d}')
+            for i in range(start, start + count)
+        ])
+        staff = User.objects.bulk_create([
+            User(
+                username=f'staff_{i}', phone=f'+1555300{i:04d}', role='staff',
+                laundromat=self.laundromat, password='!'
+            )
+            for i in range(start, start + count)
+        ])
+        customers = User.objects.bulk_create([
+            User(username=f'customer_{i}', phone=f'+1555400{i:04d}', role='customer', password='!')
+            for i in range(start, start + count)
+        ])
+
+        receipts = []
+        for i in range(count):
+            for customer, laundromat in (
+                (self.customer, self.laundromat),
+                (customers[i], self.laundromat),
+                (customers[i], laundromats[i]),
+            ):
+                receipts.append(Receipt(
+                    laundromat=laundromat,
+                    customer=customer,
+                    staff=staff[i],
+                    status=statuses[i % len(statuses)],
+                    expected_pickup_date=now + timedelta(days=2),
+                    actual_pickup_date=now + timedelta(days=1),
+                    items_description='Shirts',
+                    items_count=3,
+                    price=Decimal('12.50'),
+                    qr_code=f'qr_codes/budget_{start + i}.png',
+                ))
+        receipts = Receipt.objects.bulk_create(receipts)
+
+        Video.objects.bulk_create([
+            Video(receipt=receipt, video_type='intake', video_file='videos/budget.mp4', file_size=1024)
+            for receipt in receipts
+        ])
+
+    def get_fixtures(self):
+        receipt = Receipt.objects.filter(
+            customer=self.customer, laundromat=self.laundromat
+        ).order_by('pk').first()
+        return {
+            'receipt': receipt,
+            'video': receipt.videos.first(),
+            'laundromat': self.laundromat,
+            'user': self.customer,
+        }
+
+    def build_url(self, name, view_class, kwargs, fixtures):
+        url_kwargs = {}
+        if 'pk' in kwargs:
+            model = view_class.queryset.model
+            fixture = {
+                Receipt: fixtures['receipt'],
+                Video: fixtures['video'],
+                Laundromat: fixtures['laundromat'],
+                User: fixtures['user'],
+            }[model]
+            url_kwargs['pk'] = fixture.pk
+        return reverse(name, kwargs=url_kwargs)
+
+    def count_queries(self, user, routes):
+        """Request every route as `user` and return {name: query count}."""
+        self.client.force_authenticate(user=user)
+        fixtures = self.get_fixtures()
+        counts = {}
+        for name, (view_class, kwargs) in routes.items():
+            url = self.build_url(name, view_class, kwargs, fixtures)
+            params = ROUTE_QUERY_PARAMS.get(name, lambda fx: {})(fixtures)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, params)
+                # Streaming responses query as their body is read
+                response.getvalue()
+            self.assertLess(
+                response.status_code, 500,
+                f'{name} ({url}) returned {response.status_code}'
+            )
+            counts[name] = len(ctx.captured_queries)
+        return counts
+
+    def test_routes_are_discovered(self):
+        """The harness must see the routes the issue was raised for."""
+        routes = get_api_routes()
+        for name in (
+            'receipt-list', 'receipt-my-receipts', 'receipt-active',
+            'laundromat-receipts', 'laundromat-staff',
+            'user-customers', 'user-staff', 'video-by-receipt',
+            'analytics-overview', 'analytics-staff-performance',
+        ):
+            self.assertIn(name, routes)
+
+    def test_query_count_is_independent_of_row_count(self):
+        routes = {
+            name: route for name, route in get_api_routes().items()
+            if name not in SKIPPED_ROUTES
+        }
+
+        self.seed(SEED_ROWS)
+        small = {
+            role: self.count_queries(user, routes)
+            for role, user in (('admin', self.admin), ('staff', self.staff), ('customer', self.customer))
+        }
+
+        self.seed(SEED_ROWS * 9)
+        large = {
+            role: self.count_queries(user, routes)
+            for role, user in (('admin', self.admin), ('staff', self.staff), ('customer', self.customer))
+        }
+
+        for role in small:
+            for name in routes:
+                with self.subTest(role=role, route=name):
+                    self.assertEqual(
+                        large[role][name], small[role][name],
+                        f'{name} as {role}: {small[role][name]} queries with '
+                        f'{SEED_ROWS} rows, {large[role][name]} with {SEED_ROWS * 10}'
+                    )
+                    self.assertLessEqual(large[role][name], MAX_QUERIES)
+
+
+class StaffPerformanceTests(APITestCase):
+    """staff-performance computes processing time in SQL, not per staff member."""
+
+    def test_average_processing_hours(self):
+        laundromat = Laundromat.objects.create(name='L', address='A', phone='+15559000000')
+        admin = User.objects.create_user(username='perf_admin', password='x', phone='+15559000001', role='admin')
+        staff = User.objects.create_user(
+            username='perf_staff', password='x', phone='+15559000002', role='staff', laundromat=laundromat
+        )
+        customer = User.objects.create_user(username='perf_customer', password='x', phone='+15559000003')
+
+        now = timezone.now()
+        receipts = Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=laundromat, customer=customer, staff=staff, status='completed',
+                expected_pickup_date=now, items_description='x', price=Decimal('10.00'),
+                qr_code='qr_codes/perf.png',
+            )
+            for _ in range(2)
+        ])
+        for receipt, hours in zip(receipts, (2, 4)):
+            Receipt.objects.filter(pk=receipt.pk).update(
+                actual_pickup_date=receipt.drop_off_date + timedelta(hours=hours)
+            )
+
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('analytics-staff-performance'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['avg_processing_hours'], 3.0)
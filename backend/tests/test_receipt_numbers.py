@@ -0,0 +1,179 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts import numbering
+from apps.receipts.models import Receipt, ReceiptNumberSequence
+from apps.users.models import User
+
+
+class ReceiptNumberFormatTests(TestCase):
+
+    def test_round_trip(self):
+        number = numbering.format_receipt_number(1023, 4711)
+        self.assertEqual(number[:7], 'LV-0ZZ-')
+        self.assertLessEqual(len(number), 20)
+        self.assertTrue(numbering.is_valid_receipt_number(number))
+        self.assertTrue(numbering.is_valid_receipt_number(number.lower()))
+
+    def test_check_character_catches_typos(self):
+        number = numbering.format_receipt_number(7, 123456)
+        body = number[3:]
+        for i, char in enumerate(body):
+            if char == '-':
+                continue
+            for replacement in numbering.ALPHABET:
+                if replacement != char:
+                    typo = 'LV-' + body[:i] + replacement + body[i + 1:]
+                    self.assertFalse(numbering.is_valid_receipt_number(typo), typo)
+
+        swapped = 'LV-' + body[:5] + body[6] + body[5] + body[7:]
+        if swapped != number:
+            self.assertFalse(numbering.is_valid_receipt_number(swapped))
+
+    def test_look_alike_characters_are_normalized(self):
+        number = numbering.format_receipt_number(1, 1)
+        self.assertTrue(numbering.is_valid_receipt_number(number.replace('0', 'O')))
+
+    def test_random_numbers_are_not_valid(self):
+        self.assertFalse(numbering.is_valid_receipt_number('LV-AB12CD34'))
+
+
+@override_settings(RECEIPT_NUMBER_BLOCK_SIZE=5)
+class ReceiptNumberAllocatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15559000000')
+        cls.other = Laundromat.objects.create(name='Other', address='2 Side St', phone='+15559000001')
+        cls.customer = User.objects.create_user(
+            username='numbers_customer', password='x', phone='+15559000002'
+        )
+
+    def setUp(self):
+        numbering.clear_cache()
+        self.addCleanup(numbering.clear_cache)
+
+    def test_numbers_are_sequential_per_laundromat(self):
+        numbers = numbering.allocate_receipt_numbers(self.laundromat.pk, 12)
+        other = numbering.allocate_receipt_number(self.other.pk)
+
+        self.assertEqual(numbers, sorted(numbers))
+        self.assertEqual(len(set(numbers + [other])), 13)
+        self.assertEqual(
+            numbers[0], numbering.format_receipt_number(self.laundromat.pk, 1)
+        )
+        self.assertEqual(ReceiptNumberSequence.objects.get(laundromat=self.laundromat).next_value, 13)
+
+    def test_blocks_are_reserved_once_per_block_size(self):
+        numbering.allocate_receipt_number(self.laundromat.pk)
+        with self.assertNumQueries(0):
+            for _ in range(4):
+                numbering.allocate_receipt_number(self.laundromat.pk)
+        numbering.allocate_receipt_number(self.laundromat.pk)
+        self.assertEqual(ReceiptNumberSequence.objects.get(laundromat=self.laundromat).next_value, 11)
+
+    def test_other_workers_get_separate_blocks(self):
+        first = numbering.allocate_receipt_number(self.laundromat.pk)
+        numbering.clear_cache()  # as seen from a different worker
+        second = numbering.allocate_receipt_number(self.laundromat.pk)
+        self.assertEqual(second, numbering.format_receipt_number(self.laundromat.pk, 6))
+        self.assertNotEqual(first, second)
+
+    def test_rolled_back_block_is_discarded(self):
+        try:
+            with transaction.atomic():
+                rolled_back = numbering.allocate_receipt_number(self.laundromat.pk)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        # The reservation was rolled back, so the same range is reserved again
+        # instead of continuing from a block the database no longer knows.
+        self.assertEqual(numbering.allocate_receipt_number(self.laundromat.pk), rolled_back)
+        self.assertEqual(ReceiptNumberSequence.objects.get(laundromat=self.laundromat).next_value, 6)
+
+    def test_receipts_are_numbered_on_create(self):
+        receipts = Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=laundromat, customer=self.customer,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Load', qr_code='qr_codes/numbers.png',
+            )
+            for laundromat in (self.laundromat, self.laundromat, self.other)
+        ])
+        numbers = [receipt.receipt_number for receipt in receipts]
+        self.assertTrue(all(numbering.is_valid_receipt_number(number) for number in numbers))
+        self.assertEqual(len(set(numbers)), 3)
+
+        receipt = Receipt(
+            laundromat=self.other, customer=self.customer,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description='Load', qr_code='qr_codes/numbers.png',
+        )
+        receipt.save()
+        self.assertEqual(receipt.receipt_number, numbering.format_receipt_number(self.other.pk, 2))
+
+
+class ReceiptNumberLookupTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15559100000')
+        cls.admin = User.objects.create_superuser(
+            username='numbers_admin', password='x', phone='+15559100001', role='admin'
+        )
+        customer = User.objects.create_user(username='numbers_lookup', password='x', phone='+15559100002')
+        cls.receipt, cls.legacy = Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=cls.laundromat, customer=customer, receipt_number=number,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Load', qr_code='qr_codes/numbers.png',
+            )
+            # An allocated number with 0s and 1s, and a random one from before blocks
+            for number in (numbering.format_receipt_number(32, 1025), 'LV-AB1OXYZL')
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def typed(self, number):
+        """The number as read out over the phone: lower case, O for 0, l for 1"""
+        return number.replace('0', 'O').replace('1', 'l').lower()
+
+    def ids(self, **params):
+        response = self.client.get('/api/receipts/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_lookup_by_number(self):
+        number = self.receipt.receipt_number
+        self.assertIn('0', number)
+        self.assertEqual(self.ids(receipt_number=self.typed(number)), [self.receipt.pk])
+        self.assertEqual(self.ids(receipt_number=self.legacy.receipt_number.lower()), [self.legacy.pk])
+
+    def test_bad_check_character_is_rejected(self):
+        number = self.receipt.receipt_number
+        wrong = number[:-1] + ('X' if number[-1] != 'X' else 'Y')
+        for params in ({'receipt_number': wrong}, {'search': wrong}):
+            with self.subTest(**params):
+                response = self.client.get('/api/receipts/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('not a valid receipt number', str(response.data))
+
+    def test_search_by_number(self):
+        number = self.receipt.receipt_number
+        self.assertEqual(self.ids(search=self.typed(number)), [self.receipt.pk])
+        # The start of a number is not checked
+        self.assertEqual(self.ids(search=self.typed(number[:9])), [self.receipt.pk])
+        self.assertEqual(self.ids(search='lv-ab1oxyzl'), [self.legacy.pk])
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_admin_search(self):
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin/receipts/receipt/', {'q': self.typed(self.receipt.receipt_number)})
+        self.assertEqual([receipt.pk for receipt in response.context['cl'].result_list], [self.receipt.pk])
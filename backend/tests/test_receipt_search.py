@@ -0,0 +1,142 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts import search
+from apps.receipts.archive import archive_closed_receipts
+from apps.receipts.models import Receipt, ReceiptSearchTerm
+from apps.users.models import User
+
+URL = '/api/receipts/'
+
+
+class TokenizeTests(SimpleTestCase):
+
+    def test_terms_are_folded(self):
+        self.assertEqual(
+            search.tokenize('Red WOOL coats, 2 dresses & a Café-au-lait scarf!'),
+            ['red', 'wool', 'coat', 'dress', 'cafe', 'au', 'lait', 'scarf'],
+        )
+
+    def test_query_terms_are_distinct(self):
+        self.assertEqual(search.query_terms('Gentle gentle detergent, please'), ['gentle', 'detergent'])
+        self.assertEqual(search.query_terms('a the of'), [])
+
+
+class ReceiptSearchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15558100000')
+        cls.other = Laundromat.objects.create(name='Other', address='2 Side St', phone='+15558100001')
+        cls.staff = User.objects.create_user(
+            username='search_staff', password='x', phone='+15558100002', role='staff',
+            laundromat=cls.laundromat
+        )
+        cls.admin = User.objects.create_user(
+            username='search_admin', password='x', phone='+15558100003', role='admin'
+        )
+        cls.customer = User.objects.create_user(
+            username='search_customer', password='x', phone='+15558100004'
+        )
+
+    def make_receipt(self, description, instructions='', laundromat=None, status='pending'):
+        return Receipt.objects.bulk_create([Receipt(
+            laundromat=laundromat or self.laundromat,
+            customer=self.customer,
+            status=status,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description=description,
+            special_instructions=instructions,
+            price=Decimal('10.00'),
+            qr_code='qr_codes/search.png',
+        )])[0]
+
+    def search(self, query, user=None, **params):
+        self.client.force_authenticate(user or self.staff)
+        response = self.client.get(URL, {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_matches_are_ranked(self):
+        coat = self.make_receipt('Red wool coat')
+        red_shirts = self.make_receipt('3 red shirts, 1 red scarf')
+        wool = self.make_receipt('Wool sweater')
+        self.make_receipt('Jeans')
+
+        self.assertEqual(self.search('red wool coats'), [coat.pk, red_shirts.pk, wool.pk])
+
+    def test_instructions_are_searched(self):
+        gentle = self.make_receipt('Shirts', 'Please use GENTLE detergent')
+        self.make_receipt('Shirts', 'Extra starch')
+        self.assertEqual(self.search('gentle detergent'), [gentle.pk])
+
+    def test_search_is_scoped_per_laundromat(self):
+        mine = self.make_receipt('Silk dress')
+        theirs = self.make_receipt('Silk dress', laundromat=self.other)
+
+        self.assertEqual(self.search('silk'), [mine.pk])
+        self.assertEqual(sorted(self.search('silk', user=self.admin)), sorted([mine.pk, theirs.pk]))
+        self.assertEqual(self.search('silk', user=self.admin, laundromat=self.other.pk), [theirs.pk])
+        self.assertEqual(self.search('silk', user=self.admin, status='washing'), [])
+
+    def test_list_filters_apply_to_matches(self):
+        washing = [self.make_receipt('Wool socks', status='washing') for _ in range(3)]
+        for _ in range(3):
+            self.make_receipt('Wool socks wool')
+
+        with self.settings(RECEIPT_SEARCH_MAX_RESULTS=2):
+            self.assertEqual(len(self.search('wool', status='washing')), 2)
+        self.assertEqual(sorted(self.search('wool', status='washing')), [r.pk for r in washing])
+        self.assertEqual(
+            sorted(self.search('wool', user=self.customer, status='washing')), [r.pk for r in washing]
+        )
+
+    def test_edits_reindex_the_receipt(self):
+        receipt = self.make_receipt('Blue blazer')
+        receipt = Receipt.objects.get(pk=receipt.pk)
+        receipt.items_description = 'Green blazer'
+        receipt.save()
+
+        self.assertEqual(self.search('blue'), [])
+        self.assertEqual(self.search('green'), [receipt.pk])
+
+        receipt.status = 'washing'
+        with CaptureQueriesContext(connection) as queries:
+            receipt.save()
+        self.assertFalse([q for q in queries.captured_queries if 'receipt_search_terms' in q['sql']])
+
+    def test_archived_receipts_leave_the_index(self):
+        receipt = self.make_receipt('Velvet curtains', status='completed')
+        Receipt.objects.filter(pk=receipt.pk).update(updated_at=timezone.now() - timedelta(days=400))
+        archive_closed_receipts(timezone.now() - timedelta(days=180))
+
+        self.assertFalse(ReceiptSearchTerm.objects.filter(receipt_id=receipt.pk).exists())
+
+    @override_settings(RECEIPT_SEARCH_MAX_RESULTS=2)
+    def test_results_are_capped(self):
+        for _ in range(4):
+            self.make_receipt('Towels')
+        self.assertEqual(len(self.search('towel')), 2)
+
+    def test_rebuild_command(self):
+        first = self.make_receipt('Linen tablecloth')
+        second = self.make_receipt('Linen napkins', laundromat=self.other)
+        ReceiptSearchTerm.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_search_index', workers=2, batch_size=1, stdout=out)
+
+        self.assertIn('Indexed 2 receipts', out.getvalue())
+        self.assertEqual(sorted(self.search('linen', user=self.admin)), sorted([first.pk, second.pk]))
+        self.assertEqual(
+            ReceiptSearchTerm.objects.get(receipt=second, term='napkin').laundromat_id, self.other.pk
+        )
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.analytics import reports
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from config.downloads import parse_range
+
+URL = '/api/analytics/export/pdf/'
+
+
+class PdfReportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15552500000')
+        cls.other_laundromat = Laundromat.objects.create(name='Other', address='2 Side St', phone='+15552500001')
+        cls.admin = User.objects.create_user(
+            username='report_admin', password='x', phone='+15552500002', role='admin'
+        )
+        cls.staff = User.objects.create_user(
+            username='report_staff', password='x', phone='+15552500003', role='staff',
+            laundromat=cls.laundromat
+        )
+        cls.customer = User.objects.create_user(username='report_customer', password='x', phone='+15552500004')
+        Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=laundromat, customer=cls.customer, status=status,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Load', price=Decimal(price), qr_code='qr_codes/report.png',
+            )
+            for laundromat, status, price in (
+                (cls.laundromat, 'completed', '10.00'),
+                (cls.laundromat, 'pending', '5.00'),
+                (cls.laundromat, 'cancelled', '7.00'),
+                (cls.other_laundromat, 'completed', '20.00'),
+            )
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(URL, **headers)
+        return response, len(ctx.captured_queries)
+
+    def test_repeated_exports_are_served_from_cache(self):
+        with mock.patch('apps.analytics.reports.build_pdf', wraps=reports.build_pdf) as build_pdf:
+            first, miss_queries = self.export()
+            second, hit_queries = self.export()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertTrue(first.content.startswith(b'%PDF'))
+        self.assertEqual(first['Content-Length'], str(len(first.content)))
+        self.assertEqual(first['Accept-Ranges'], 'bytes')
+        self.assertEqual(build_pdf.call_count, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertLess(hit_queries, miss_queries)
+
+    def test_data_changes_and_scope_change_the_key(self):
+        first, _ = self.export()
+        receipt = Receipt.objects.filter(laundromat=self.laundromat).first()
+        receipt.status = 'cancelled'
+        receipt.save()
+        changed, _ = self.export()
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+        self.client.force_authenticate(self.staff)
+        staff, _ = self.export()
+        self.assertNotEqual(staff['ETag'], changed['ETag'])
+
+    def test_ranges_and_conditional_requests(self):
+        full, _ = self.export()
+        etag, size = full['ETag'], len(full.content)
+
+        partial, _ = self.export(HTTP_RANGE='bytes=0-99')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, full.content[:100])
+        self.assertEqual(partial['Content-Range'], f'bytes 0-99/{size}')
+        self.assertEqual(partial['Content-Length'], '100')
+
+        tail, _ = self.export(HTTP_RANGE='bytes=-10')
+        self.assertEqual(tail.content, full.content[-10:])
+
+        self.assertEqual(self.export(HTTP_RANGE=f'bytes={size}-')[0].status_code, 416)
+        stale, _ = self.export(HTTP_RANGE='bytes=0-99', HTTP_IF_RANGE='"old"')
+        self.assertEqual((stale.status_code, stale.content), (200, full.content))
+        self.assertEqual(self.export(HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+    def test_summary_comes_from_one_query(self):
+        queryset = Receipt.objects.filter(laundromat=self.laundromat)
+        start = timezone.now() - timedelta(days=7)
+        with CaptureQueriesContext(connection) as ctx:
+            summary = reports.summarize(queryset, start, timezone.now())
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(summary['total_orders'], 3)
+        self.assertEqual(summary['completed_orders'], 1)
+        self.assertEqual(summary['total_revenue'], Decimal('15.00'))
+        self.assertEqual(dict(summary['statuses']), {'completed': 1, 'pending': 1, 'cancelled': 1})
+        self.assertEqual(len(summary['revenue_trend']), 8)
+        self.assertEqual(summary['revenue_trend'][-1], (timezone.localdate(), Decimal('15.00')))
+        self.assertEqual(sum(summary['orders_by_hour']), 3)
+
+    def test_styles_are_built_once(self):
+        self.export()
+        styles = reports.get_styles()
+        self.client.get(URL, {'time_range': 'year'})
+        self.assertIs(reports.get_styles(), styles)
+
+    def test_empty_range_renders(self):
+        Receipt.objects.all().delete()
+        response, _ = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_customers_cannot_export(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.export()[0].status_code, 403)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=10-', 100), (10, 99))
+        self.assertEqual(parse_range('bytes=10-500', 100), (10, 99))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        self.assertIsNone(parse_range('items=0-1', 100))
+        self.assertIsNone(parse_range('bytes=5-1', 100))
+        self.assertFalse(parse_range('bytes=100-', 100))
+        self.assertFalse(parse_range('bytes=-0', 100))
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.cache import laundromat_cache
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from apps.videos.models import Video
+
+
+class SparseFieldsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15551600000')
+        cls.admin = User.objects.create_user(
+            username='sparse_admin', password='x', phone='+15551600001', role='admin'
+        )
+        cls.customer = User.objects.create_user(
+            username='sparse_customer', password='x', phone='+15551600002'
+        )
+        (cls.receipt,) = Receipt.objects.bulk_create([Receipt(
+            laundromat=cls.laundromat, customer=cls.customer, staff=cls.admin,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description='Shirts', special_instructions='Cold wash',
+            price=Decimal('12.00'), qr_code='qr_codes/sparse.png',
+        )])
+        cls.video = Video.objects.bulk_create([Video(
+            receipt=cls.receipt, video_type='intake', video_file='videos/sparse.mp4', file_size=2048
+        )])[0]
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), [query['sql'] for query in ctx.captured_queries]
+
+    def test_fields_prune_output_and_columns(self):
+        detail_path = f'/api/receipts/{self.receipt.pk}/'
+        # So neither request counts the laundromat cache's load
+        laundromat_cache.fresh_rows()
+        full, full_queries = self.get(detail_path)
+        data, queries = self.get(detail_path, fields='id,status,is_active,customer.username')
+
+        self.assertEqual(data, {
+            'id': self.receipt.pk,
+            'status': 'pending',
+            'is_active': True,
+            'customer': {'username': 'sparse_customer'},
+        })
+        self.assertEqual(data['customer']['username'], full['customer']['username'])
+        # The videos prefetch is gone and unrequested columns are not read
+        self.assertEqual(len(queries), len(full_queries) - 1)
+        receipt_query = queries[-1]
+        self.assertNotIn('items_description', receipt_query)
+        self.assertNotIn('"password"', receipt_query)
+        self.assertNotIn('laundromats', receipt_query)
+
+    def test_unexpanded_relations_become_ids(self):
+        data, queries = self.get(f'/api/receipts/{self.receipt.pk}/', expand='laundromat')
+
+        self.assertEqual(data['laundromat']['name'], 'Main')
+        self.assertEqual(data['customer'], self.customer.pk)
+        self.assertEqual(data['staff'], self.admin.pk)
+        self.assertEqual(data['videos'], [self.video.pk])
+        self.assertIn('items_description', data)
+
+        data, _ = self.get(f'/api/receipts/{self.receipt.pk}/', fields='id,customer')
+        self.assertEqual(data, {'id': self.receipt.pk, 'customer': self.customer.pk})
+
+    def test_list_and_nested_lists(self):
+        data, _ = self.get('/api/receipts/', fields='id,receipt_number,videos.video_type')
+        self.assertEqual(data['results'], [{
+            'id': self.receipt.pk,
+            'receipt_number': self.receipt.receipt_number,
+            'videos': [{'video_type': 'intake'}],
+        }])
+
+        data, _ = self.get('/api/videos/by_receipt/', receipt_id=self.receipt.pk, fields='id,file_size_mb')
+        self.assertEqual(data, [{'id': self.video.pk, 'file_size_mb': 0.0}])
+
+    def test_laundromat_counts_are_skipped_when_not_requested(self):
+        path = f'/api/laundromats/{self.laundromat.pk}/'
+        full, full_queries = self.get(path)
+        data, queries = self.get(path, fields='id,name,timezone')
+
+        self.assertEqual(data, {key: full[key] for key in ('id', 'name', 'timezone')})
+        self.assertEqual(len(queries), len(full_queries) - 2)
+
+    def test_me_prunes_its_output(self):
+        self.client.force_authenticate(self.customer)
+        data, _ = self.get('/api/users/me/', fields='id,username')
+        self.assertEqual(data, {'id': self.customer.pk, 'username': 'sparse_customer'})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(f'/api/receipts/{self.receipt.pk}/', {'fields': 'id,nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.json()['fields'])
@@ -0,0 +1,65 @@
+"""
+Tests for the concurrent SQLite backend in config/db_backends/sqlite3.
+
+Each test opens its own connection, built by settings.database_config()
+with DB_SQLITE_CONCURRENT on, to a throwaway database file.
+"""
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db import transaction
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from config import settings as project_settings
+
+
+class ConcurrentSQLiteBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'concurrent.sqlite3'
+
+        with mock.patch.object(project_settings, 'DB_SQLITE_CONCURRENT', True), \
+                mock.patch.object(project_settings, 'DB_IS_SQLITE', True):
+            database = project_settings.database_config(name=str(self.path))
+        database['OPTIONS']['busy_timeout'] = 1234
+        connections = ConnectionHandler({'default': database})
+        self.addCleanup(connections.close_all)
+        self.connection = connections['default']
+        # transaction.atomic() looks the alias up in django.db.connections
+        patcher = mock.patch.object(transaction, 'connections', connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_settings_pick_the_backend(self):
+        self.assertEqual(self.connection.settings_dict['ENGINE'], 'config.db_backends.sqlite3')
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        for _ in range(2):
+            self.assertEqual(self.pragma('journal_mode'), 'wal')
+            self.assertEqual(self.pragma('busy_timeout'), 1234)
+            # 1 is NORMAL
+            self.assertEqual(self.pragma('synchronous'), 1)
+            self.connection.close()
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        with CaptureQueriesContext(self.connection) as ctx:
+            with transaction.atomic():
+                # No write yet, but another writer already has to wait
+                other = sqlite3.connect(self.path, timeout=0)
+                try:
+                    with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+                        other.execute('BEGIN IMMEDIATE')
+                finally:
+                    other.close()
+        self.assertEqual(ctx.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
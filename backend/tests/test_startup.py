@@ -0,0 +1,65 @@
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from config import startup
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:      1200 |       1200 |     django.utils
+import time:       800 |       2000 |   django
+import time:      3000 |       3000 | reportlab.lib
+"""
+
+
+class StartupTests(APITestCase):
+
+    def test_cold_start_skips_deferred_modules(self):
+        report = startup.measure('/api/receipts/')
+        self.assertEqual(report['status'], 401)
+        self.assertEqual(report['deferred_loaded'], [])
+        self.assertGreater(report['time_to_first_response_ms'], report['setup_ms'])
+
+        eager = startup.measure('/api/receipts/', import_deferred=True)
+        self.assertEqual(eager['deferred_loaded'], list(startup.DEFERRED_MODULES))
+
+    def test_import_breakdown_groups_by_package(self):
+        self.assertEqual(startup.import_breakdown(IMPORTTIME_OUTPUT), [
+            {'package': 'reportlab', 'ms': 3.0, 'modules': 1},
+            {'package': 'django', 'ms': 2.0, 'modules': 2},
+        ])
+
+    def test_command_reports_breakdown(self):
+        out = StringIO()
+        call_command('startup_profile', runs=1, top=3, stdout=out)
+        output = out.getvalue()
+        self.assertIn('Process start to first response', output)
+        self.assertIn('Import time by package', output)
+        self.assertIn('django', output)
+        self.assertNotIn('only needed on first use', output)
+
+    def test_deferred_features_still_work(self):
+        laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15552400000')
+        admin = User.objects.create_user(username='startup_admin', password='x', phone='+15552400001', role='admin')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            receipt = Receipt.objects.create(
+                laundromat=laundromat, customer=admin,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Shirts', price=Decimal('10.00'),
+            )
+            self.assertTrue(receipt.qr_code.name.endswith('.png'))
+
+        self.client.force_authenticate(admin)
+        response = self.client.get('/api/analytics/export/pdf/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
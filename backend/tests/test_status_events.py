@@ -0,0 +1,103 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt, ReceiptStatusEvent
+from apps.users.models import User
+
+
+class StatusEventLogTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15558000000')
+        cls.staff = User.objects.create_user(
+            username='events_staff', password='x', phone='+15558000001', role='staff',
+            laundromat=cls.laundromat
+        )
+        cls.customer = User.objects.create_user(
+            username='events_customer', password='x', phone='+15558000002'
+        )
+
+    def make_receipt(self, status='washing'):
+        (receipt,) = Receipt.objects.bulk_create([Receipt(
+            laundromat=self.laundromat,
+            customer=self.customer,
+            staff=self.staff,
+            status=status,
+            expected_pickup_date=timezone.now() + timedelta(days=1),
+            items_description='Load',
+            price=Decimal('10.00'),
+            qr_code='qr_codes/events.png',
+        )])
+        return receipt
+
+    def test_status_changes_are_logged(self):
+        receipt = self.make_receipt()
+        self.client.force_authenticate(self.staff)
+
+        self.client.patch(f'/api/receipts/{receipt.pk}/update_status/', {'status': 'drying'}, format='json')
+        self.client.post('/api/receipts/bulk-status/', {'ids': [receipt.pk], 'status': 'ready'}, format='json')
+        self.client.post(f'/api/receipts/{receipt.pk}/complete/')
+        # Saving without a status change adds nothing
+        receipt.refresh_from_db()
+        receipt.save()
+
+        events = list(receipt.status_events.values_list('status', 'laundromat_id', 'staff_id'))
+        self.assertEqual(events, [
+            ('drying', self.laundromat.pk, self.staff.pk),
+            ('ready', self.laundromat.pk, self.staff.pk),
+            ('completed', self.laundromat.pk, self.staff.pk),
+        ])
+
+    def test_events_are_append_only(self):
+        receipt = self.make_receipt()
+        event = ReceiptStatusEvent.objects.create(
+            receipt=receipt, laundromat=self.laundromat, status='washing'
+        )
+        with self.assertRaises(ValueError):
+            event.save()
+        with self.assertRaises(ValueError):
+            event.delete()
+
+    def test_stage_durations(self):
+        start = timezone.now() - timedelta(hours=10)
+        timeline = [
+            [('pending', 0), ('washing', 1), ('drying', 3), ('ready', 4), ('completed', 6)],
+            [('pending', 0), ('washing', 2), ('drying', 6)],
+        ]
+        events = []
+        for steps in timeline:
+            receipt = self.make_receipt()
+            events += [
+                ReceiptStatusEvent(
+                    receipt=receipt, laundromat=self.laundromat, staff=self.staff,
+                    status=status, created_at=start + timedelta(hours=hours)
+                )
+                for status, hours in steps
+            ]
+        ReceiptStatusEvent.objects.bulk_create(events)
+
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/analytics/stage-durations/')
+
+        self.assertEqual(response.status_code, 200)
+        by_stage = {row['stage']: row for row in response.data}
+        self.assertEqual(list(by_stage), ['pending', 'washing', 'drying', 'ready'])
+        self.assertEqual(by_stage['pending']['count'], 2)
+        self.assertEqual(by_stage['pending']['avg_hours'], 1.5)
+        self.assertEqual(by_stage['washing']['p50_hours'], 2.0)
+        self.assertEqual(by_stage['washing']['max_hours'], 4.0)
+        self.assertEqual(by_stage['drying']['count'], 1)
+        self.assertEqual(by_stage['drying']['in_progress'], 1)
+        self.assertEqual(by_stage['ready']['avg_hours'], 2.0)
+        self.assertIsNone(by_stage['pending']['staff_id'])
+
+        response = self.client.get('/api/analytics/stage-durations/', {'group_by': 'staff'})
+        self.assertEqual({row['staff_id'] for row in response.data}, {self.staff.pk})
+
+        response = self.client.get('/api/analytics/stage-durations/', {'group_by': 'customer'})
+        self.assertEqual(response.status_code, 400)
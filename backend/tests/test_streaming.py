@@ -0,0 +1,96 @@
+import json
+import warnings
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.laundromats.models import Laundromat
+from apps.users.models import User
+from apps.users.serializers import UserSerializer
+from config.streaming import json_array
+
+
+@override_settings(STREAM_CHUNK_SIZE=2)
+class StreamingListTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15551900000')
+        cls.admin = User.objects.create_user(
+            username='stream_admin', password='x', phone='+15551900001', role='admin'
+        )
+        User.objects.bulk_create([
+            User(username=f'stream{index}', phone=f'+1555191{index:04d}', password='!', role=role,
+                 laundromat=cls.laundromat if role == 'staff' else None)
+            for index, role in enumerate(['customer'] * 5 + ['staff'] * 3)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_rows_are_streamed_in_chunks(self):
+        response = self.client.get('/api/users/customers/')
+        self.assertTrue(response.streaming)
+
+        chunks = iter(response.streaming_content)
+        # The array opens before any row is read
+        with self.assertNumQueries(0):
+            self.assertEqual(next(chunks), b'[')
+        rest = list(chunks)
+
+        # Five customers in chunks of two, then the closing bracket
+        self.assertEqual(len(rest), 4)
+        customers = UserSerializer(
+            User.objects.filter(role='customer'), many=True,
+            context={'request': Request(response.wsgi_request)},
+        )
+        self.assertEqual(b'[' + b''.join(rest), JSONRenderer().render(customers.data))
+
+    def test_rows_are_streamed_under_asgi(self):
+        async def read():
+            response = await AsyncClient().get(
+                '/api/users/customers/', headers={'Authorization': f'Bearer {AccessToken.for_user(self.admin)}'}
+            )
+            # Django warns, and buffers the body, when it gets a sync iterator
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                return response, [chunk async for chunk in response]
+
+        response, chunks = async_to_sync(read)()
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(chunks[0], b'[')
+        self.assertEqual(
+            sorted(user['username'] for user in json.loads(b''.join(chunks))),
+            [f'stream{index}' for index in range(5)],
+        )
+
+    def test_sparse_requests_stream_the_full_serializer(self):
+        response = self.client.get('/api/users/staff/', {'fields': 'username,laundromat'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            sorted(json.loads(response.getvalue()), key=lambda user: user['username']),
+            [{'username': f'stream{index}', 'laundromat': self.laundromat.pk} for index in (5, 6, 7)],
+        )
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_browsable_and_indented_requests_are_not_streamed(self):
+        response = self.client.get('/api/users/staff/', HTTP_ACCEPT='text/html')
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.data), 3)
+
+        response = self.client.get('/api/users/staff/', HTTP_ACCEPT='application/json; indent=2')
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_empty_lists(self):
+        self.assertEqual(b''.join(json_array(iter([]), JSONRenderer())), b'[]')
+        self.assertEqual(b''.join(json_array(iter([[], [1], []]), JSONRenderer())), b'[1]')
+
+        response = self.client.get(f'/api/laundromats/{self.laundromat.pk}/receipts/')
+        self.assertEqual(response.getvalue(), b'[]')
@@ -0,0 +1,176 @@
+import csv
+import io
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+import warnings
+from xml.etree import ElementTree
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.laundromats.models import Laundromat
+from apps.receipts.models import Receipt
+from apps.users.models import User
+from config import xlsx
+
+URL = '/api/analytics/export/xlsx/'
+NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def read_sheets(content):
+    """{sheet name: [[cell text, ...], ...]} from a workbook written by config/xlsx.py"""
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        names = [sheet.get('name') for sheet in ElementTree.fromstring(
+            archive.read('xl/workbook.xml')).iterfind('.//s:sheet', NS)]
+        sheets = {}
+        for index, name in enumerate(names, 1):
+            root = ElementTree.fromstring(archive.read(f'xl/worksheets/sheet{index}.xml'))
+            sheets[name] = [
+                [''.join(cell.itertext()) for cell in row.iterfind('s:c', NS)]
+                for row in root.iterfind('.//s:row', NS)
+            ]
+    return sheets
+
+
+class XlsxExportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.laundromat = Laundromat.objects.create(name='Main', address='1 Main St', phone='+15552600000')
+        cls.admin = User.objects.create_user(
+            username='xlsx_admin', password='x', phone='+15552600001', role='admin'
+        )
+        cls.customer = User.objects.create_user(
+            username='xlsx_customer', password='x', phone='+15552600002', first_name='Ada', last_name='Byron'
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def seed(self, count, status='completed'):
+        Receipt.objects.bulk_create([
+            Receipt(
+                laundromat=self.laundromat, customer=self.customer, staff=self.admin, status=status,
+                expected_pickup_date=timezone.now() + timedelta(days=1),
+                items_description='Shirts & <socks>', items_count=3, price=Decimal('12.50'),
+                qr_code='qr_codes/xlsx.png',
+            )
+            for _ in range(count)
+        ])
+
+    def export(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(URL)
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return response, content, len(ctx.captured_queries)
+
+    def test_workbook_sheets(self):
+        self.seed(3)
+        self.seed(1, status='cancelled')
+        response, content, _ = self.export()
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        sheets = read_sheets(content)
+        self.assertEqual(list(sheets), ['Overview', 'Status Distribution', 'Transactions'])
+
+        overview = dict(sheets['Overview'][1:])
+        self.assertEqual(overview['Total Orders'], '4')
+        self.assertEqual(Decimal(overview['Total Revenue']), Decimal('37.50'))
+        self.assertEqual(overview['Time Range'], 'month')
+        self.assertEqual(sheets['Status Distribution'][1:], [['completed', '3', '0.75'], ['cancelled', '1', '0.25']])
+
+        transactions = sheets['Transactions']
+        self.assertEqual(len(transactions), 5)
+        self.assertEqual(transactions[1][2], 'Ada Byron')
+        self.assertEqual(transactions[1][8], 'Shirts & <socks>')
+        self.assertEqual(Decimal(transactions[1][9]), Decimal('12.50'))
+
+    def test_columns_match_csv(self):
+        self.seed(1)
+        csv_response = self.client.get('/api/analytics/export/csv/')
+        csv_header = next(csv.reader(io.StringIO(csv_response.content.decode())))
+        _, content, _ = self.export()
+        self.assertEqual(read_sheets(content)['Transactions'][0], csv_header)
+
+    def test_cells_are_typed_for_spreadsheets(self):
+        self.seed(2)
+        _, content, _ = self.export()
+        workbook = load_workbook(io.BytesIO(content))
+        row = next(workbook['Transactions'].iter_rows(min_row=2))
+        self.assertIsInstance(row[1].value, datetime)
+        self.assertEqual(row[1].number_format, 'yyyy-mm-dd hh:mm')
+        self.assertEqual((row[9].value, row[9].number_format), (12.5, '#,##0.00'))
+        self.assertEqual(row[7].value, 3)
+        self.assertIsNone(row[12].value)
+        self.assertTrue(workbook['Overview']['B2'].font.b is False)
+        self.assertTrue(workbook['Overview']['A1'].font.b)
+        self.assertEqual(workbook['Status Distribution']['C2'].number_format, '0.0%')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_workbook_is_streamed_under_asgi(self):
+        self.seed(5)
+
+        async def read():
+            response = await AsyncClient().get(
+                URL, headers={'Authorization': f'Bearer {AccessToken.for_user(self.admin)}'}
+            )
+            # Django warns, and buffers the body, when it gets a sync iterator
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                return response, [chunk async for chunk in response]
+
+        response, chunks = async_to_sync(read)()
+
+        self.assertTrue(response.is_async)
+        self.assertGreater(len(chunks), 3)
+        self.assertEqual(len(read_sheets(b''.join(chunks))['Transactions']), 6)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_queries_do_not_grow_with_rows(self):
+        self.seed(2)
+        _, _, few = self.export()
+        self.seed(15)
+        _, content, many = self.export()
+        self.assertEqual(many, few)
+        self.assertEqual(len(read_sheets(content)['Transactions']), 18)
+
+    def test_customers_cannot_export(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get(URL).status_code, 403)
+
+
+class XlsxWriterTests(SimpleTestCase):
+
+    def test_rows_are_streamed(self):
+        consumed = []
+
+        def rows():
+            for index in range(xlsx.ROWS_PER_WRITE * 3):
+                consumed.append(index)
+                yield (index, f'row {index}')
+
+        chunks = xlsx.workbook([xlsx.Sheet('Rows', ['Index', 'Text'], rows())])
+        first = next(chunks)
+        # The first bytes go out before the rows have all been read
+        self.assertLess(len(consumed), xlsx.ROWS_PER_WRITE * 3)
+        content = first + b''.join(chunks)
+        self.assertEqual(len(read_sheets(content)['Rows']), xlsx.ROWS_PER_WRITE * 3 + 1)
+
+    def test_cell_values(self):
+        self.assertEqual(xlsx.column_letter(0), 'A')
+        self.assertEqual(xlsx.column_letter(27), 'AB')
+        self.assertEqual(xlsx.cell('A1', 'a\x00b<', xlsx.PLAIN), (
+            '<c r="A1" t="inlineStr"><is><t xml:space="preserve">ab&lt;</t></is></c>'
+        ))
+        self.assertEqual(xlsx.cell('B1', datetime(1900, 1, 1, 12), xlsx.DATETIME), '<c r="B1" s="2"><v>2.5</v></c>')
+        self.assertEqual(xlsx.cell('C1', None, xlsx.PLAIN), '')
+        self.assertEqual(xlsx.cell('D1', True, xlsx.PLAIN), '<c r="D1" t="b"><v>1</v></c>')
+        self.assertEqual(xlsx.cell('E1', xlsx.Styled(Decimal('1.50'), xlsx.MONEY), xlsx.PLAIN),
+                         '<c r="E1" s="3"><v>1.50</v></c>')